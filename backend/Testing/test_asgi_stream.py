@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import asgi_main
+from langchain_core.documents import Document
+from legal_chatbot_logic.llm_pool import LLMPool
+
+def stream_request(message, disconnect_first):
+    """An ASGI call to /api/chat/stream whose client (optionally) hangs up before any of the body is sent."""
+    body = json.dumps({"message": message}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/api/chat/stream", "raw_path": b"/api/chat/stream",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000), "server": ("127.0.0.1", 8000),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    if disconnect_first:
+        messages.append({"type": "http.disconnect"})
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # A client that stays connected
+        await asyncio.Event().wait()
+
+    async def send(message):
+        # Like a real server's send, give the event loop a turn
+        await asyncio.sleep(0)
+        sent.append(message)
+
+    return asgi_main.app(scope, receive, send), sent
+
+def test_disconnect_before_body_releases_slot():
+    pool = LLMPool(2, 4)
+    documents = [Document(page_content="302. Punishment for murder.", metadata={"source": "IPC.pdf"})]
+
+    async def retrieve(message):
+        return None, documents
+
+    # A ready pipeline whose retrieval returns straight away
+    saved = asgi_main.llm_pool, asgi_main.retrieve, asgi_main.pipeline.unavailable
+    asgi_main.llm_pool, asgi_main.retrieve, asgi_main.pipeline.unavailable = pool, retrieve, lambda: None
+
+    async def run():
+        for _ in range(3):
+            call, sent = stream_request("What is section 302?", disconnect_first=True)
+            await call
+            # The response never got to its body
+            assert not any(message["type"] == "http.response.body" for message in sent)
+            assert pool.in_flight == 0
+
+    try:
+        asyncio.run(run())
+    finally:
+        asgi_main.llm_pool, asgi_main.retrieve, asgi_main.pipeline.unavailable = saved
+    assert pool.counts["admitted"] == 3
+    assert pool.stats()["in_flight"] == 0
+
+def test_acquire_timeout_takes_no_slot():
+    async def run():
+        pool = LLMPool(1, 4)
+        await pool.acquire()
+        try:
+            await pool.acquire(timeout=0.01)
+        except asyncio.TimeoutError:
+            pass
+        else:
+            raise AssertionError("acquire() should have timed out")
+        assert pool.in_flight == 1 and pool.waiting == 0
+        pool.release()
+        # The slot is free again, not held by the timed-out waiter
+        await pool.acquire(timeout=0.01)
+        pool.release()
+        return pool
+
+    pool = asyncio.run(run())
+    assert pool.in_flight == 0
+    assert pool.counts["abandoned"] == 1
+
+if __name__ == "__main__":
+    test_disconnect_before_body_releases_slot()
+    test_acquire_timeout_takes_no_slot()
+    print("OK")
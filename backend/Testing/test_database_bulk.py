@@ -0,0 +1,141 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from data_management.database import Database
+
+# The tables the scraper writes, before schemes.url was made unique
+SCRAPER_SCHEMA = '''
+CREATE TABLE schemes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    description TEXT,
+    state TEXT,
+    url TEXT NOT NULL,
+    updated_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_schemes_url ON schemes(url);
+CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, category TEXT NOT NULL);
+CREATE TABLE benefits (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, benefit TEXT NOT NULL);
+CREATE TABLE eligibility_criteria (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, criterion TEXT NOT NULL);
+CREATE TABLE application_process (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, step TEXT NOT NULL);
+CREATE TABLE required_documents (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, document TEXT NOT NULL);
+CREATE TABLE faqs (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, question TEXT NOT NULL, answer TEXT NOT NULL);
+'''
+
+def scratch_db(setup=None):
+    """A scraper database in a temporary directory, optionally seeded with ``setup`` SQL."""
+    directory = tempfile.mkdtemp(prefix='test_database_')
+    path = os.path.join(directory, 'yojnabuddy.db')
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCRAPER_SCHEMA + (setup or ''))
+    return directory, path
+
+def scheme(url, benefits, steps=(), faqs=()):
+    return {
+        'url': url, 'name': url.rsplit('/', 1)[-1], 'description': 'A scheme', 'state': 'Kerala',
+        'benefits': list(benefits), 'application_process': list(steps), 'faqs': list(faqs),
+    }
+
+def child_rows(db, table, column):
+    with db.connection() as conn:
+        return [tuple(row) for row in conn.execute(f'SELECT id, scheme_id, {column} FROM {table} ORDER BY id')]
+
+def test_bulk_upsert_diffs_child_rows():
+    directory, path = scratch_db()
+    db = Database(path, pool_size=1)
+    try:
+        url = 'https://www.myscheme.gov.in/schemes/pmkisan'
+        faq = {'question': 'Who can apply?', 'answer': 'Farmers'}
+        totals = db.save_schemes_bulk([scheme(url, ['a', 'b', 'c'], ['apply', 'verify'], [faq])])
+        assert totals['failed'] == 0 and totals['rows_inserted'] == 6
+        before = child_rows(db, 'benefits', 'benefit')
+        version = db.get_data_version()
+
+        # Same scheme again: nothing is written and the version stays put
+        totals = db.save_schemes_bulk([scheme(url, ['a', 'b', 'c'], ['apply', 'verify'], [faq])])
+        assert (totals['rows_inserted'], totals['rows_deleted']) == (0, 0)
+        assert db.get_data_version() == version
+
+        # Only the rows after the common prefix change; 'a' and 'b' keep their ids
+        totals = db.save_schemes_bulk([scheme(url, ['a', 'b', 'd', 'e'], ['apply', 'verify'], [faq])])
+        assert (totals['rows_inserted'], totals['rows_deleted']) == (2, 1)
+        after = child_rows(db, 'benefits', 'benefit')
+        assert after[:2] == before[:2]
+        assert [row[2] for row in after] == ['a', 'b', 'd', 'e']
+        assert db.get_data_version() == version + 1
+
+        # A reordered list keeps the order it was scraped in
+        db.save_schemes_bulk([scheme(url, ['a', 'b', 'd', 'e'], ['verify', 'apply'], [faq])])
+        assert [row[2] for row in child_rows(db, 'application_process', 'step')] == ['verify', 'apply']
+
+        # Last copy of a URL within a batch wins, and every URL gets one row
+        other = 'https://www.myscheme.gov.in/schemes/pmay'
+        totals = db.save_schemes_bulk(
+            [scheme(other, ['x']), scheme(url, ['a']), scheme(other, ['y'])], batch_size=10
+        )
+        assert totals['schemes'] == 2 and totals['failed'] == 0
+        assert db.get_scheme_by_url(other)['benefits'] == ['y']
+        assert db.get_scheme_by_url(url)['benefits'] == ['a']
+        with db.connection() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM schemes').fetchone()[0] == 2
+    finally:
+        db.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_duplicate_urls_are_merged():
+    # Three rows for one URL, in a database already stamped past the
+    # old URL migration: the newest row (3) has no benefits, so it takes
+    # those of the newest copy that has them (2)
+    directory, path = scratch_db('''
+        INSERT INTO schemes (id, name, url) VALUES (1, 'old', 'u'), (2, 'mid', 'u'), (3, 'new', 'u'), (4, 'solo', 'v');
+        INSERT INTO benefits (scheme_id, benefit) VALUES (1, 'b1'), (2, 'b2'), (2, 'b2 more'), (4, 'b4');
+        INSERT INTO faqs (scheme_id, question, answer) VALUES (1, 'q1', 'a1'), (3, 'q3', 'a3');
+        CREATE TABLE data_version (id INTEGER PRIMARY KEY, version INTEGER NOT NULL, updated_at TIMESTAMP);
+        INSERT INTO data_version (id, version) VALUES (1, 0);
+        PRAGMA user_version = 4;
+    ''')
+    db = Database(path, pool_size=1)
+    try:
+        with db.connection() as conn:
+            assert [tuple(row) for row in conn.execute('SELECT id, name FROM schemes ORDER BY id')] == [(3, 'new'), (4, 'solo')]
+            indexes = {row['name']: row['unique'] for row in conn.execute('PRAGMA index_list(schemes)')}
+        assert indexes.get('idx_schemes_url_unique') == 1 and 'idx_schemes_url' not in indexes
+        assert db.get_scheme_by_url('u')['benefits'] == ['b2', 'b2 more']
+        assert db.get_scheme_by_url('u')['faqs'] == [{'question': 'q3', 'answer': 'a3'}]
+        assert db.get_scheme_by_url('v')['benefits'] == ['b4']
+
+        # Upserts by URL work straight away
+        totals = db.save_schemes_bulk([scheme('u', ['b2', 'b2 more']), scheme('w', ['new'])])
+        assert totals['failed'] == 0 and totals['rows_inserted'] == 1
+    finally:
+        db.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def test_indexes_follow_new_tables():
+    # An API-only database gets the indexes for the tables it has ...
+    directory = tempfile.mkdtemp(prefix='test_database_')
+    path = os.path.join(directory, 'yojnabuddy.db')
+    try:
+        Database(path, pool_size=1).close()
+        with sqlite3.connect(path) as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+            assert 'idx_schemes_category_created' in indexes and 'idx_benefits_scheme' not in indexes
+            # ... and a scraper table added afterwards is indexed on the next start
+            conn.execute('CREATE TABLE benefits (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, benefit TEXT NOT NULL)')
+        Database(path, pool_size=1).close()
+        with sqlite3.connect(path) as conn:
+            indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert 'idx_benefits_scheme' in indexes
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_bulk_upsert_diffs_child_rows()
+    test_duplicate_urls_are_merged()
+    test_indexes_follow_new_tables()
+    print("OK")
@@ -10,6 +10,8 @@ from typing import Dict, List, Optional
 from data_management.database import Database
 import re
 from my_blueprint import my_blueprint  # Replace with the actual module and blueprint name
+from response_cache import ResponseCache
+from conditional import init_conditional_responses, no_store
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
@@ -20,6 +22,12 @@ app.register_blueprint(my_blueprint)
 # Initialize database
 db = Database()
 
+# Cache for the read-mostly routes, dropped whenever the data version changes
+response_cache = ResponseCache(db.get_data_version)
+
+# ETag/Last-Modified revalidation and gzip/brotli compression for JSON routes
+init_conditional_responses(app, db.get_data_last_modified)
+
 def sanitize_input(text: str) -> str:
     """Sanitize user input to prevent SQL injection."""
     # Remove any SQL keywords
@@ -51,11 +59,26 @@ def root():
             "/categories": "Get all categories with scheme counts",
             "/schemes/category/:categoryId": "Get schemes by category",
             "/schemes/:id": "Get scheme details",
-            "/schemes/category/:categoryId/:type": "Get schemes by type (state/central)"
+            "/schemes/category/:categoryId/:type": "Get schemes by type (state/central)",
+            "/stats/pool": "Get database connection pool metrics",
+            "/stats/cache": "Get response cache hit/miss counters"
         }
     })
 
+@app.route('/stats/pool')
+@no_store
+def pool_stats():
+    """Get database connection pool metrics."""
+    return jsonify(db.pool_stats())
+
+@app.route('/stats/cache')
+@no_store
+def cache_stats():
+    """Get response cache hit/miss counters."""
+    return jsonify(response_cache.stats())
+
 @app.route('/categories')
+@response_cache.cached()
 def list_categories():
     """Get all categories with scheme counts."""
     try:
@@ -83,6 +106,25 @@ def get_schemes_by_category(category_id):
             limit = 10
         if sort_by not in ['relevance', 'newest', 'alphabetical']:
             sort_by = 'relevance'
+        
+        # Cursor (keyset) pagination: pass cursor= for the first page and
+        # the returned nextCursor for the following ones
+        if 'cursor' in request.args:
+            try:
+                schemes, next_cursor = db.get_schemes_page_by_category(
+                    category_id=category_id,
+                    limit=limit,
+                    cursor=request.args.get('cursor'),
+                    sort_by=sort_by
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify({
+                "data": schemes,
+                "total": db.get_scheme_count_by_category(category_id),
+                "nextCursor": next_cursor
+            })
             
         # Calculate offset
         offset = (page - 1) * limit
@@ -106,6 +148,7 @@ def get_schemes_by_category(category_id):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/schemes/<scheme_id>')
+@response_cache.cached()
 def get_scheme_details(scheme_id):
     """Get detailed information about a specific scheme."""
     try:
@@ -133,6 +176,28 @@ def get_schemes_by_type(category_id, type):
             page = 1
         if limit < 1 or limit > 100:
             limit = 10
+        
+        # Cursor (keyset) pagination, see get_schemes_by_category
+        if 'cursor' in request.args:
+            sort_by = request.args.get('sortBy', 'newest')
+            if sort_by not in ['relevance', 'newest', 'alphabetical']:
+                sort_by = 'newest'
+            try:
+                schemes, next_cursor = db.get_schemes_page_by_category(
+                    category_id=category_id,
+                    limit=limit,
+                    cursor=request.args.get('cursor'),
+                    sort_by=sort_by,
+                    scheme_type=type
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+            
+            return jsonify({
+                "data": schemes,
+                "total": db.get_scheme_count_by_category_and_type(category_id, type),
+                "nextCursor": next_cursor
+            })
             
         # Calculate offset
         offset = (page - 1) * limit
@@ -1,10 +1,20 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import sqlite3
 from typing import List, Dict, Any, Optional
-import os
+from data_management.database import (
+    Database, KEYSET_SORTS, build_fts_query, decode_cursor, encode_cursor,
+    fts_rank_expression, fts_snippet_expression, keyset_sql
+)
 # from api.my_blueprint import my_blueprint # Old import
 from my_blueprint import my_blueprint # Corrected import for sibling modules
+from response_cache import ResponseCache
+from conditional import init_conditional_responses, no_store
+from scheme_loader import load_scheme_children
 
 app = Flask(__name__)
 CORS(app)
@@ -12,6 +22,15 @@ CORS(app)
 
 print(app.url_map)  # <-- Add this line
 
+# Shared database (creates the schema and keeps the search index in sync)
+db = Database('yojnabuddy.db')
+
+# Cache for the read-mostly routes, dropped whenever the data version changes
+response_cache = ResponseCache(db.get_data_version)
+
+# ETag/Last-Modified revalidation and gzip/brotli compression for JSON routes
+init_conditional_responses(app, db.get_data_last_modified)
+
 # Database connection helper
 def get_db_connection():
     conn = sqlite3.connect('yojnabuddy.db')
@@ -22,6 +41,32 @@ def get_db_connection():
 def row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
     return {key: row[key] for key in row.keys()}
 
+def keyset_source(filters: List[str], params: List[Any], sort_by: str, cursor: str, limit: int):
+    """Build a `schemes s` source that holds just one keyset page.
+
+    The page is picked from schemes alone (a seek on the covering index)
+    before any child table is joined. Returns the FROM source, its
+    parameters and the ORDER BY. Raises ValueError for a bad cursor.
+    """
+    seek, seek_params, order_by = keyset_sql(sort_by, decode_cursor(cursor, sort_by))
+    if seek:
+        filters = filters + [seek]
+    source = f"""(
+            SELECT * FROM schemes s
+            WHERE {' AND '.join(filters)}
+            ORDER BY {order_by}
+            LIMIT ?
+        ) s"""
+    # One extra row tells us whether there is a next page
+    return source, params + seek_params + [limit + 1], order_by
+
+def next_page_cursor(schemes: List[Dict[str, Any]], sort_by: str, limit: int) -> Optional[str]:
+    """Trim the look-ahead row and return the cursor for the next page."""
+    if len(schemes) <= limit:
+        return None
+    del schemes[limit:]
+    return encode_cursor(sort_by, [schemes[-1][column] for column, _ in KEYSET_SORTS[sort_by]])
+
 @app.route('/api/schemes', methods=['GET'])
 def get_schemes():
     try:
@@ -36,68 +81,61 @@ def get_schemes():
         limit = int(request.args.get('limit', 10))
         offset = (page - 1) * limit
 
-        # Base query
+        # Base query (lists every scheme unless filtered); child rows are
+        # loaded per page afterwards
         query = """
-            SELECT s.*, 
-                   GROUP_CONCAT(DISTINCT c.name) as categories,
-                   GROUP_CONCAT(DISTINCT rd.document) as required_documents,
-                   GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs
+            /* advisor: full-scan-ok */
+            SELECT s.*
             FROM schemes s
-            LEFT JOIN categories c ON s.category_id = c.id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
         """
         
         # Build WHERE clause
         conditions = []
         params = []
+        order_by = ""
+        
+        if search:
+            fts_query = build_fts_query(search)
+            if not fts_query:
+                conn.close()
+                return jsonify([])
+            if db.fts_enabled:
+                # Only the matches, best BM25 match first
+                query = f"""
+                    SELECT s.*
+                    FROM (
+                        SELECT rowid, {fts_rank_expression()} as rank
+                        FROM schemes_fts
+                        WHERE schemes_fts MATCH ?
+                    ) fts
+                    JOIN schemes s ON s.id = fts.rowid
+                """
+                params.append(fts_query)
+                order_by = " ORDER BY fts.rank"
+            else:
+                # Schema without the indexed columns, fall back to a scan
+                conditions.append("(s.name LIKE ? OR s.description LIKE ?)")
+                search_term = f"%{search}%"
+                params.extend([search_term, search_term])
         
         if category:
-            conditions.append("c.name = ?")
+            conditions.append("s.category_id IN (SELECT id FROM categories WHERE name = ?)")
             params.append(category)
         
         if state:
             conditions.append("s.state = ?")
             params.append(state)
         
-        if search:
-            conditions.append("(s.name LIKE ? OR s.description LIKE ?)")
-            search_term = f"%{search}%"
-            params.extend([search_term, search_term])
-        
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
         
-        query += " GROUP BY s.id"
+        query += order_by
         query += " LIMIT ? OFFSET ?"
         params.extend([limit, offset])
 
         # Execute query
         cursor.execute(query, params)
-        rows = cursor.fetchall()
-
-        # Process results
-        schemes = []
-        for row in rows:
-            scheme = row_to_dict(row)
-            
-            # Process categories
-            scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-            
-            # Process required documents
-            scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
-            
-            # Process FAQs
-            faqs_processed = []
-            if scheme['faqs']:
-                for faq_item in scheme['faqs'].split(','):
-                    if '|' in faq_item:
-                        question, answer = faq_item.split('|', 1)
-                        faqs_processed.append({'question': question, 'answer': answer})
-                    # else: you could log a warning here if needed
-            scheme['faqs'] = faqs_processed
-            
-            schemes.append(scheme)
+        schemes = load_scheme_children(conn, [row_to_dict(row) for row in cursor.fetchall()])
 
         conn.close()
         return jsonify(schemes)
@@ -106,49 +144,21 @@ def get_schemes():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/schemes/<int:scheme_id>', methods=['GET'])
+@response_cache.cached()
 def get_scheme(scheme_id: int):
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
 
         # Get scheme details
-        cursor.execute("""
-            SELECT s.*, 
-                   GROUP_CONCAT(DISTINCT c.name) as categories,
-                   GROUP_CONCAT(DISTINCT rd.document) as required_documents,
-                   GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs,
-                   GROUP_CONCAT(DISTINCT t.name) as tags
-            FROM schemes s
-            LEFT JOIN categories c ON s.category_id = c.id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
-            LEFT JOIN scheme_tags st ON s.id = st.scheme_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.id = ?
-            GROUP BY s.id
-        """, (scheme_id,))
+        cursor.execute("SELECT s.* FROM schemes s WHERE s.id = ?", (scheme_id,))
         
         row = cursor.fetchone()
         if not row:
+            conn.close()
             return jsonify({'error': 'Scheme not found'}), 404
 
-        scheme = row_to_dict(row)
-        
-        # Process categories
-        scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-        
-        # Process required documents
-        scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
-        
-        # Process FAQs
-        faqs_processed = []
-        if scheme['faqs']:
-            for faq_item in scheme['faqs'].split(','):
-                if '|' in faq_item:
-                    question, answer = faq_item.split('|', 1)
-                    faqs_processed.append({'question': question, 'answer': answer})
-        scheme['faqs'] = faqs_processed
-        scheme['tags'] = scheme['tags'].split(',') if scheme['tags'] else []
+        scheme = load_scheme_children(conn, [row_to_dict(row)], with_tags=True)[0]
 
         conn.close()
         return jsonify(scheme)
@@ -157,6 +167,7 @@ def get_scheme(scheme_id: int):
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/categories', methods=['GET'])
+@response_cache.cached()
 def get_categories():
     try:
         conn = get_db_connection()
@@ -176,6 +187,7 @@ def get_categories():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/states', methods=['GET'])
+@response_cache.cached()
 def get_states():
     try:
         conn = get_db_connection()
@@ -199,48 +211,46 @@ def get_states():
 def search_schemes():
     try:
         query = request.args.get('q', '')
-        if not query:
+        fts_query = build_fts_query(query)
+        if not fts_query:
             return jsonify([])
+        
+        limit = int(request.args.get('limit', 50))
+        if limit < 1 or limit > 100:
+            limit = 50
 
         conn = get_db_connection()
         cursor = conn.cursor()
 
-        cursor.execute("""
-            SELECT s.*, 
-                   GROUP_CONCAT(DISTINCT c.name) as categories,
-                   GROUP_CONCAT(DISTINCT rd.document) as required_documents,
-                   GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs
-            FROM schemes s
-            LEFT JOIN categories c ON s.category_id = c.id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
-            WHERE s.name LIKE ? OR s.description LIKE ?
-            GROUP BY s.id
-        """, (f'%{query}%', f'%{query}%'))
-        
-        rows = cursor.fetchall()
-        schemes = []
+        if db.fts_enabled:
+            # Rank and snippet the matches in the FTS index first, then join
+            # only the top hits back to the scheme data
+            cursor.execute(f"""
+                SELECT s.*, fts.snippet, fts.rank
+                FROM (
+                    SELECT rowid,
+                           {fts_snippet_expression()} as snippet,
+                           {fts_rank_expression()} as rank
+                    FROM schemes_fts
+                    WHERE schemes_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                ) fts
+                JOIN schemes s ON s.id = fts.rowid
+                ORDER BY fts.rank
+            """, (fts_query, limit))
+        else:
+            # Schema without the indexed columns, fall back to a scan
+            search_term = f"%{query}%"
+            cursor.execute("""
+                /* advisor: full-scan-ok */
+                SELECT s.*
+                FROM schemes s
+                WHERE s.name LIKE ? OR s.description LIKE ?
+                LIMIT ?
+            """, (search_term, search_term, limit))
         
-        for row in rows:
-            scheme = row_to_dict(row)
-            
-            # Process categories
-            scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-            
-            # Process required documents
-            scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
-            
-            # Process FAQs
-            faqs_processed = []
-            if scheme['faqs']:
-                for faq_item in scheme['faqs'].split(','):
-                    if '|' in faq_item:
-                        question, answer = faq_item.split('|', 1)
-                        faqs_processed.append({'question': question, 'answer': answer})
-                    # else: you could log a warning here if needed
-            scheme['faqs'] = faqs_processed
-            
-            schemes.append(scheme)
+        schemes = load_scheme_children(conn, [row_to_dict(row) for row in cursor.fetchall()])
 
         conn.close()
         return jsonify(schemes)
@@ -270,59 +280,59 @@ def get_schemes_by_category_id(category_id: int):
             sort_by = 'relevance'
             
         offset = (page - 1) * limit
-
-        # Base query
-        query_select = """
-            SELECT s.*, 
-                   GROUP_CONCAT(DISTINCT c.name) as categories,
-                   GROUP_CONCAT(DISTINCT rd.document) as required_documents,
-                   GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs,
-                   GROUP_CONCAT(DISTINCT t.name) as tags
-            FROM schemes s
-            LEFT JOIN categories c ON s.category_id = c.id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
-            LEFT JOIN scheme_tags st ON s.id = st.scheme_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.category_id = ?
-            GROUP BY s.id
+        
+        # Cursor (keyset) pagination: cursor= for the first page, then the
+        # returned nextCursor
+        use_cursor = 'cursor' in request.args
+        if use_cursor:
+            try:
+                source, params, order_by = keyset_source(
+                    ["s.category_id = ?"], [category_id], sort_by, request.args.get('cursor'), limit
+                )
+            except ValueError as e:
+                conn.close()
+                return jsonify({'error': str(e)}), 400
+            where = ""
+        else:
+            source, params, where = "schemes s", [category_id], "WHERE s.category_id = ?"
+
+        # Base query (child rows are loaded for the page afterwards)
+        query_select = f"""
+            SELECT s.*
+            FROM {source}
+            {where}
         """
         
         # Sorting logic
-        if sort_by == 'newest':
+        if use_cursor:
+            query_select += f" ORDER BY {order_by}"
+        elif sort_by == 'newest':
             query_select += " ORDER BY s.id DESC" # Assuming higher ID is newer
         elif sort_by == 'alphabetical':
             query_select += " ORDER BY s.name ASC"
         # For 'relevance', no specific order is applied here, or you might define a default.
             
-        query_select += " LIMIT ? OFFSET ?"
-        
-        params = [category_id, limit, offset]
+        if not use_cursor:
+            query_select += " LIMIT ? OFFSET ?"
+            params.extend([limit, offset])
 
         cursor.execute(query_select, params)
-        rows = cursor.fetchall()
-
-        schemes = []
-        for row in rows:
-            scheme = row_to_dict(row)
-            scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-            scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
-            faqs_processed = []
-            if scheme['faqs']:
-                for faq_item in scheme['faqs'].split(','):
-                    if '|' in faq_item:
-                        question, answer = faq_item.split('|', 1)
-                        faqs_processed.append({'question': question, 'answer': answer})
-                    # else: you could log a warning here if needed
-            scheme['faqs'] = faqs_processed
-            scheme['tags'] = scheme['tags'].split(',') if scheme['tags'] else []
-            schemes.append(scheme)
-
-        # Get total count for pagination
-        cursor.execute("SELECT COUNT(id) FROM schemes WHERE category_id = ?", (category_id,))
-        total_schemes = cursor.fetchone()[0]
+        schemes = [row_to_dict(row) for row in cursor.fetchall()]
+        # Drop the look-ahead row before loading child rows for the page
+        next_cursor = next_page_cursor(schemes, sort_by, limit) if use_cursor else None
+        schemes = load_scheme_children(conn, schemes, with_tags=True)
+
+        # Total comes from the cached count, not a recount per page
+        total_schemes = db.get_scheme_count_by_category(category_id)
         
         conn.close()
+        if use_cursor:
+            return jsonify({
+                "data": schemes,
+                "total": total_schemes,
+                "limit": limit,
+                "nextCursor": next_cursor
+            })
         return jsonify({
             "data": schemes,
             "total": total_schemes,
@@ -347,62 +357,58 @@ def get_schemes_by_category_and_type(category_id: int, scheme_type: str):
 
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
-        # sort_by is not used by the frontend for this specific call, but good to be aware of
-        # sort_by = request.args.get('sortBy', 'relevance') 
+        # sort_by is not used by the frontend for this specific call; it only
+        # applies to cursor pagination
+        sort_by = request.args.get('sortBy', 'newest')
 
         if page < 1:
             page = 1
         if limit < 1 or limit > 100:
             limit = 10
+        if sort_by not in KEYSET_SORTS:
+            sort_by = 'newest'
         
         offset = (page - 1) * limit
-
-        query_select = """
-            SELECT s.*,
-                   GROUP_CONCAT(DISTINCT c.name) as categories,
-                   GROUP_CONCAT(DISTINCT rd.document) as required_documents,
-                   GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs,
-                   GROUP_CONCAT(DISTINCT t.name) as tags
-            FROM schemes s
-            LEFT JOIN categories c ON s.category_id = c.id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
-            LEFT JOIN scheme_tags st ON s.id = st.scheme_id
-            LEFT JOIN tags t ON st.tag_id = t.id
-            WHERE s.category_id = ? AND s.scheme_type = ?
-            GROUP BY s.id
-            LIMIT ? OFFSET ?
+        
+        # Cursor (keyset) pagination, see get_schemes_by_category_id
+        use_cursor = 'cursor' in request.args
+        if use_cursor:
+            try:
+                source, params, order_by = keyset_source(
+                    ["s.category_id = ?", "s.scheme_type = ?"], [category_id, scheme_type],
+                    sort_by, request.args.get('cursor'), limit
+                )
+            except ValueError as e:
+                conn.close()
+                return jsonify({'error': str(e)}), 400
+            where, tail = "", f"ORDER BY {order_by}"
+        else:
+            source, where, tail = "schemes s", "WHERE s.category_id = ? AND s.scheme_type = ?", "LIMIT ? OFFSET ?"
+            params = [category_id, scheme_type, limit, offset]
+
+        query_select = f"""
+            SELECT s.*
+            FROM {source}
+            {where}
+            {tail}
         """
-        # Add sorting if needed in the future, e.g.
-        # if sort_by == 'newest':
-        #     query_select += " ORDER BY s.id DESC" 
-        # elif sort_by == 'alphabetical':
-        #     query_select += " ORDER BY s.name ASC"
-
-        params = [category_id, scheme_type, limit, offset]
         cursor.execute(query_select, params)
-        rows = cursor.fetchall()
-
-        schemes = []
-        for row in rows:
-            scheme = row_to_dict(row)
-            scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-            scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
-            faqs_processed = []
-            if scheme['faqs']:
-                for faq_item in scheme['faqs'].split(','):
-                    if '|' in faq_item:
-                        question, answer = faq_item.split('|', 1)
-                        faqs_processed.append({'question': question, 'answer': answer})
-                    # else: you could log a warning here if needed
-            scheme['faqs'] = faqs_processed
-            scheme['tags'] = scheme['tags'].split(',') if scheme['tags'] else []
-            schemes.append(scheme)
-
-        cursor.execute("SELECT COUNT(id) FROM schemes WHERE category_id = ? AND scheme_type = ?", (category_id, scheme_type))
-        total_schemes = cursor.fetchone()[0]
+        schemes = [row_to_dict(row) for row in cursor.fetchall()]
+        # Drop the look-ahead row before loading child rows for the page
+        next_cursor = next_page_cursor(schemes, sort_by, limit) if use_cursor else None
+        schemes = load_scheme_children(conn, schemes, with_tags=True)
+
+        # Total comes from the cached count, not a recount per page
+        total_schemes = db.get_scheme_count_by_category_and_type(category_id, scheme_type)
         
         conn.close()
+        if use_cursor:
+            return jsonify({
+                "data": schemes,
+                "total": total_schemes,
+                "limit": limit,
+                "nextCursor": next_cursor
+            })
         return jsonify({
             "data": schemes,
             "total": total_schemes,
@@ -416,6 +422,11 @@ def get_schemes_by_category_and_type(category_id: int, scheme_type: str):
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/cache/stats', methods=['GET'])
+@no_store
+def get_cache_stats():
+    return jsonify(response_cache.stats())
+
 # Register routes from api.py
 app.register_blueprint(my_blueprint)
 
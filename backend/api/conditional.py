@@ -0,0 +1,96 @@
+import gzip
+import hashlib
+from datetime import datetime
+from functools import wraps
+from typing import Callable, Optional
+from flask import Flask, Response, make_response, request
+
+# Brotli is optional; without it responses are gzip-compressed only
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as-is (compression wouldn't pay off)
+MIN_COMPRESS_SIZE = 1024
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# ETag suffix per content coding, so each representation has its own strong tag
+ENCODING_SUFFIXES = {'br': '-br', 'gzip': '-gz'}
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag value for a response body (hash of its content)."""
+    return hashlib.sha256(body).hexdigest()[:32]
+
+def choose_encoding() -> Optional[str]:
+    """Pick 'br' or 'gzip' from the request's Accept-Encoding, or None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br'] > 0:
+        return 'br'
+    if accepted['gzip'] > 0:
+        return 'gzip'
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a body with the given content coding."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def no_store(view: Callable) -> Callable:
+    """Mark a route's responses as live (e.g. counters): Cache-Control: no-store, never a 304."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        response.cache_control.no_store = True
+        return response
+    return wrapper
+
+def init_conditional_responses(
+    app: Flask,
+    last_modified_source: Optional[Callable[[], Optional[datetime]]] = None,
+    min_size: int = MIN_COMPRESS_SIZE
+):
+    """Add ETag/Last-Modified validation and compression to JSON responses.
+
+    Every successful JSON response to a GET gets a strong ETag derived
+    from its body, so a scheme's ETag changes exactly when its content
+    does. A matching If-None-Match (or If-Modified-Since, checked against
+    ``last_modified_source``) is answered with an empty 304. Bodies of at
+    least ``min_size`` bytes are compressed with brotli or gzip when the
+    client accepts it. Routes marked ``@no_store`` are left alone.
+    """
+    @app.after_request
+    def conditional_response(response: Response) -> Response:
+        if (request.method not in ('GET', 'HEAD') or response.status_code != 200
+                or response.mimetype != 'application/json'
+                or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                # Live data (@no_store) is sent in full every time
+                or response.cache_control.no_store):
+            return response
+
+        body = response.get_data()
+        encoding = choose_encoding() if len(body) >= min_size else None
+        if len(body) >= min_size:
+            # The representation depends on Accept-Encoding; tell caches
+            response.vary.add('Accept-Encoding')
+
+        response.set_etag(content_etag(body) + ENCODING_SUFFIXES.get(encoding, ''))
+        if last_modified_source is not None:
+            last_modified = last_modified_source()
+            if last_modified is not None:
+                response.last_modified = last_modified
+        # Let browsers keep the body but revalidate it on every use
+        if not response.cache_control.no_store and response.cache_control.max_age is None:
+            response.cache_control.no_cache = True
+
+        response.make_conditional(request)
+        if response.status_code == 304 or encoding is None:
+            return response
+
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,173 @@
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+from flask import current_app, request, Response
+
+class ResponseCache:
+    """In-process TTL + LRU cache for JSON route responses.
+
+    Entries are keyed by route path and normalized query args, bounded by
+    the total size of the cached bodies, and dropped all at once when the
+    data version (bumped by every write to the database) changes. Each
+    entry records the version it was computed under, so a response that
+    was still being built when the version changed is never stored.
+    """
+
+    def __init__(
+        self,
+        version_source: Callable[[], int],
+        max_bytes: int = 32 * 1024 * 1024,
+        default_ttl: float = 300.0,
+        version_check_interval: float = 1.0
+    ):
+        self.version_source = version_source
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._version = None
+        self._version_checked_at = 0.0
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+            'stale_puts': 0,
+        }
+
+    @staticmethod
+    def make_key() -> Tuple:
+        """Key for the current request: path plus sorted query args."""
+        args = tuple(sorted(
+            (name, tuple(sorted(values)))
+            for name, values in request.args.lists()
+        ))
+        return (request.path, args)
+
+    def _current_version(self) -> int:
+        """Get the data version, re-reading it at most once per check interval."""
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= self.version_check_interval:
+            version = self.version_source()
+            with self._lock:
+                if self._version is not None and version != self._version:
+                    # The data changed underneath us: everything is stale
+                    self._entries.clear()
+                    self._bytes = 0
+                    self._stats['invalidations'] += 1
+                self._version = version
+                self._version_checked_at = now
+        return self._version
+
+    def get(self, key: Tuple) -> Optional[Tuple[bytes, int]]:
+        """Get a cached (body, status) or None."""
+        self._current_version()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            expires_at, body, status, version = entry
+            if version != self._version:
+                # Stored under an older version than the one just read
+                self._remove(key)
+                self._stats['misses'] += 1
+                return None
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return body, status
+
+    def put(
+        self,
+        key: Tuple,
+        body: bytes,
+        status: int = 200,
+        ttl: Optional[float] = None,
+        version: Optional[int] = None
+    ):
+        """Cache a response body, evicting least recently used entries to fit.
+
+        ``version`` is the data version the body was computed under
+        (default: the current one); a body from an older version is
+        dropped instead of being served as fresh.
+        """
+        current = self._current_version()
+        if version is None:
+            version = current
+        size = len(body)
+        if size > self.max_bytes // 4:
+            # Don't let one huge payload flush the whole cache
+            return
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if version != self._version:
+                # The data changed while the response was being built
+                self._stats['stale_puts'] += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, body, status, version)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def _remove(self, key: Tuple):
+        """Drop an entry; caller holds the lock."""
+        _, body, _, _ = self._entries.pop(key)
+        self._bytes -= len(body)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        """Get hit/miss counters and the current size."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            stats['max_bytes'] = self.max_bytes
+            stats['data_version'] = self._version
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def cached(self, ttl: Optional[float] = None):
+        """Decorator that serves a route from the cache when possible.
+
+        Only successful JSON responses are stored.
+        """
+        def decorator(view):
+            @functools.wraps(view)
+            def wrapper(*args, **kwargs):
+                key = self.make_key()
+                # The version the view's queries will (at least) see
+                version = self._current_version()
+                cached = self.get(key)
+                if cached is not None:
+                    body, status = cached
+                    response = Response(body, status=status, mimetype='application/json')
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code == 200 and response.mimetype == 'application/json':
+                    self.put(key, response.get_data(), response.status_code, ttl, version)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
@@ -0,0 +1,68 @@
+import sqlite3
+from typing import Any, Dict, List
+
+# Most ids bound in one `IN (...)` (stays under SQLite's variable limit)
+IN_CHUNK_SIZE = 500
+
+def fetch_by_scheme_ids(cursor: sqlite3.Cursor, query: str, ids: List[int]) -> List[sqlite3.Row]:
+    """Run a `... IN ({marks})` query over scheme ids, in chunks."""
+    rows = []
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        chunk = ids[start:start + IN_CHUNK_SIZE]
+        marks = ', '.join('?' for _ in chunk)
+        cursor.execute(query.format(marks=marks), chunk)
+        rows.extend(cursor.fetchall())
+    return rows
+
+def load_scheme_children(conn: sqlite3.Connection, schemes: List[Dict[str, Any]], with_tags: bool = False) -> List[Dict[str, Any]]:
+    """Attach categories, required documents, FAQs (and tags) to a page of schemes.
+
+    Each child table is read once for the whole page with
+    `WHERE scheme_id IN (...)` instead of being joined into the page
+    query, so the cost grows with the number of child rows rather than
+    their product, and values are never split on separators. The
+    connection must use `sqlite3.Row` as its row_factory.
+    """
+    if not schemes:
+        return schemes
+    cursor = conn.cursor()
+    ids = [scheme['id'] for scheme in schemes]
+    documents = {scheme_id: {} for scheme_id in ids}
+    faqs = {scheme_id: {} for scheme_id in ids}
+    tags = {scheme_id: {} for scheme_id in ids}
+
+    # Category names by id (a scheme belongs to one category)
+    category_ids = list({scheme['category_id'] for scheme in schemes if scheme.get('category_id') is not None})
+    category_names = {
+        row['id']: row['name']
+        for row in fetch_by_scheme_ids(cursor, "SELECT id, name FROM categories WHERE id IN ({marks})", category_ids)
+    }
+
+    # Dicts keep the first occurrence of each value, in row order
+    for row in fetch_by_scheme_ids(
+        cursor, "SELECT scheme_id, document FROM required_documents WHERE scheme_id IN ({marks}) ORDER BY scheme_id, id", ids
+    ):
+        documents[row['scheme_id']].setdefault(row['document'])
+    for row in fetch_by_scheme_ids(
+        cursor, "SELECT scheme_id, question, answer FROM faqs WHERE scheme_id IN ({marks}) ORDER BY scheme_id, id", ids
+    ):
+        faqs[row['scheme_id']].setdefault((row['question'], row['answer']))
+    if with_tags:
+        for row in fetch_by_scheme_ids(
+            cursor,
+            """SELECT st.scheme_id, t.name FROM scheme_tags st
+               JOIN tags t ON t.id = st.tag_id
+               WHERE st.scheme_id IN ({marks})""",
+            ids
+        ):
+            tags[row['scheme_id']].setdefault(row['name'])
+
+    for scheme in schemes:
+        scheme_id = scheme['id']
+        name = category_names.get(scheme.get('category_id'))
+        scheme['categories'] = [name] if name is not None else []
+        scheme['required_documents'] = list(documents[scheme_id])
+        scheme['faqs'] = [{'question': question, 'answer': answer} for question, answer in faqs[scheme_id]]
+        if with_tags:
+            scheme['tags'] = list(tags[scheme_id])
+    return schemes
@@ -0,0 +1,285 @@
+#async (ASGI) server for legal chatbot: uvicorn asgi_main:app --port 8000
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+import uvicorn
+
+# The QA chain, answer cache and response helpers are shared with the Flask server
+from main import canned_answer, format_sources, pipeline, sse_event, stream_stats
+from legal_chatbot_logic.llm_pool import LLMPool, PoolFull
+from legal_chatbot_logic.qa_logic import chunk_text, stuff_prompt
+
+# Gemini calls in flight at once, and how many may queue for a slot
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "8"))
+LLM_QUEUE = int(os.getenv("LLM_QUEUE", "32"))
+
+# Seconds a chat may take end to end (retrieval, queueing and the answer)
+CHAT_DEADLINE = float(os.getenv("CHAT_DEADLINE", "30"))
+
+# Threads for the blocking parts: question embedding, FAISS search, answer cache
+RETRIEVAL_THREADS = int(os.getenv("RETRIEVAL_THREADS", "4"))
+
+llm_pool = LLMPool(LLM_CONCURRENCY, LLM_QUEUE)
+retrieval_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_THREADS, thread_name_prefix="retrieval")
+
+async def in_thread(function, *args):
+    return await asyncio.get_running_loop().run_in_executor(retrieval_executor, function, *args)
+
+# Seconds a shed (429) or too-early (503) client should wait before retrying
+RETRY_AFTER = {429: "1", 503: "5"}
+
+def error_response(message, status_code):
+    headers = {"Retry-After": RETRY_AFTER[status_code]} if status_code in RETRY_AFTER else None
+    return JSONResponse({"error": message}, status_code=status_code, headers=headers)
+
+def unavailable_response():
+    """The error to answer with while the QA pipeline isn't ready, else None."""
+    unavailable = pipeline.unavailable()
+    return error_response(*unavailable) if unavailable else None
+
+async def read_message(request):
+    """The "message" of a chat request, or None if it has none."""
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or "message" not in data:
+        return None
+    return data["message"]
+
+async def retrieve(message):
+    """The cached answer for a question, or the documents to answer it from."""
+    answer_cache = pipeline.answer_cache
+    cached = await in_thread(answer_cache.lookup, message) if answer_cache else None
+    if cached:
+        return cached, None
+    return None, await in_thread(pipeline.chain.retriever.invoke, message)
+
+async def answer(message):
+    # Handle greetings and small talk
+    canned = canned_answer(message)
+    if canned:
+        return JSONResponse({"answer": canned, "sources": []})
+
+    cached, documents = await retrieve(message)
+    if cached:
+        return JSONResponse(cached, headers={"X-Cache": "HIT"})
+
+    llm, prompt = stuff_prompt(pipeline.chain, message, documents)
+    async with llm_pool.slot():
+        result = chunk_text(await llm.ainvoke(prompt))
+
+    sources = format_sources(documents)
+    if pipeline.answer_cache:
+        await in_thread(pipeline.answer_cache.store, message, result, sources)
+    return JSONResponse({"answer": result, "sources": sources}, headers={"X-Cache": "MISS"})
+
+async def chat(request):
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    message = await read_message(request)
+    if message is None:
+        return error_response("Message is required", 400)
+
+    try:
+        return await asyncio.wait_for(answer(message), CHAT_DEADLINE)
+    except PoolFull:
+        return error_response("Too many chats in progress, please retry shortly", 429)
+    except asyncio.TimeoutError:
+        return error_response(f"No answer within {CHAT_DEADLINE:g}s", 504)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def prepare_stream(message):
+    """The canned reply, cached answer or documents to stream an answer from."""
+    canned = canned_answer(message)
+    if canned:
+        return canned, None, None
+    cached, documents = await retrieve(message)
+    if cached:
+        return None, cached, None
+    return None, None, documents
+
+class SlotStreamingResponse(StreamingResponse):
+    """
+    A StreamingResponse that gives its LLM slot back when it ends, however
+    it ends. Starlette never starts the body of a response whose client
+    has already gone, so the body generator can't be the one to release it.
+    """
+
+    def __init__(self, content, holds_slot, **kwargs):
+        super().__init__(content, **kwargs)
+        self.holds_slot = holds_slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            try:
+                # Stop the generator (and its LLM stream) before the slot goes back
+                await self.body_iterator.aclose()
+            finally:
+                if self.holds_slot:
+                    self.holds_slot = False
+                    llm_pool.release()
+
+async def chat_stream(request):
+    """
+    /api/chat/stream without a thread per chat. Shedding (429) and
+    deadlines hit before the stream starts come back as plain errors;
+    afterwards they end the stream with an "error" event.
+    """
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    message = await read_message(request)
+    if message is None:
+        return error_response("Message is required", 400)
+    started = time.perf_counter()
+    deadline = started + CHAT_DEADLINE
+
+    try:
+        canned, cached, documents = await asyncio.wait_for(prepare_stream(message), CHAT_DEADLINE)
+        if documents is not None:
+            # Times out without a slot, even if one frees up just as the deadline passes
+            await llm_pool.acquire(timeout=deadline - time.perf_counter())
+    except PoolFull:
+        stream_stats.count("shed")
+        return error_response("Too many chats in progress, please retry shortly", 429)
+    except asyncio.TimeoutError:
+        stream_stats.count("timeouts")
+        return error_response(f"No answer within {CHAT_DEADLINE:g}s", 504)
+    except Exception as e:
+        stream_stats.count("errors")
+        return error_response(str(e), 500)
+    holds_slot = documents is not None
+
+    async def events():
+        timings = {}
+        answer = []
+        finished = False
+
+        def sent(name):
+            # The first event sent is the first byte
+            timings.setdefault("ttfb", time.perf_counter() - started)
+            if name == "token":
+                timings.setdefault("first_token", time.perf_counter() - started)
+
+        try:
+            if not holds_slot:
+                stream_stats.count("cached" if cached else "canned")
+                sent("sources")
+                yield sse_event("sources", {"sources": cached["sources"] if cached else []})
+                sent("token")
+                yield sse_event("token", {"text": cached["answer"] if cached else canned})
+            else:
+                sources = format_sources(documents)
+                sent("sources")
+                yield sse_event("sources", {"sources": sources})
+
+                llm, prompt = stuff_prompt(pipeline.chain, message, documents)
+                tokens = llm.astream(prompt)
+                try:
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(tokens.__anext__(), deadline - time.perf_counter())
+                        except StopAsyncIteration:
+                            break
+                        text = chunk_text(chunk)
+                        if text:
+                            answer.append(text)
+                            sent("token")
+                            yield sse_event("token", {"text": text})
+                finally:
+                    await tokens.aclose()
+                if pipeline.answer_cache:
+                    await in_thread(pipeline.answer_cache.store, message, "".join(answer), sources)
+            timings["total"] = time.perf_counter() - started
+            yield sse_event("done", {
+                "ttfb_ms": round(timings["ttfb"] * 1000, 1),
+                "total_ms": round(timings["total"] * 1000, 1)
+            })
+            finished = True
+        except (asyncio.CancelledError, GeneratorExit):
+            # The client went away: stop generating (and paying for) the answer
+            stream_stats.count("cancelled")
+            raise
+        except asyncio.TimeoutError:
+            stream_stats.count("timeouts")
+            yield sse_event("error", {"error": f"No answer within {CHAT_DEADLINE:g}s"})
+        except Exception as e:
+            stream_stats.count("errors")
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            if finished:
+                stream_stats.count("completed")
+                stream_stats.record(**timings)
+
+    return SlotStreamingResponse(events(), holds_slot, media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        # Don't let a reverse proxy buffer the stream
+        "X-Accel-Buffering": "no"
+    })
+
+async def llm_pool_stats(request):
+    return JSONResponse(llm_pool.stats())
+
+async def chat_stream_stats(request):
+    return JSONResponse(stream_stats.summary())
+
+async def embedding_cache_stats(request):
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    return JSONResponse(await in_thread(pipeline.chain.retriever.vectorstore.embeddings.cache.stats))
+
+async def answer_cache_stats(request):
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    if not pipeline.answer_cache:
+        return error_response("Answer cache is disabled", 404)
+    return JSONResponse(await in_thread(pipeline.answer_cache.stats))
+
+async def healthz(request):
+    # Liveness: the event loop is up, loaded or not
+    return JSONResponse({"status": "ok"})
+
+async def readyz(request):
+    # Readiness: 200 once chats can be answered, with per-stage load timings
+    return JSONResponse(pipeline.status(), status_code=200 if pipeline.ready else 503)
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    retrieval_executor.shutdown(wait=False, cancel_futures=True)
+
+app = Starlette(
+    routes=[
+        Route("/healthz", healthz, methods=["GET"]),
+        Route("/readyz", readyz, methods=["GET"]),
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/chat/stream", chat_stream, methods=["POST"]),
+        Route("/api/stats/llm-pool", llm_pool_stats, methods=["GET"]),
+        Route("/api/stats/chat-stream", chat_stream_stats, methods=["GET"]),
+        Route("/api/stats/embedding-cache", embedding_cache_stats, methods=["GET"]),
+        Route("/api/stats/answer-cache", answer_cache_stats, methods=["GET"]),
+    ],
+    middleware=[
+        # Same CORS policy as the Flask server
+        Middleware(CORSMiddleware, allow_origins=["http://localhost:8080", "http://localhost:5173"],
+                   allow_methods=["GET", "POST", "OPTIONS"], allow_headers=["Content-Type"])
+    ],
+    lifespan=lifespan,
+)
+
+if __name__ == "__main__":
+    uvicorn.run(app, host="0.0.0.0", port=8000)
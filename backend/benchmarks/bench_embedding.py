@@ -0,0 +1,63 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import numpy as np
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from legal_chatbot_logic.embedding_model import PRECISIONS, BatchedEmbeddings
+from legal_chatbot_logic.ingest import CHUNK_OVERLAP, CHUNK_SIZE, DATA_DIR, DEFAULT_EMBEDDING_MODEL
+from legal_chatbot_logic.pdf_extraction import PageExtractor
+
+def sample_chunks(data_dir: str, chunks: int, pages_per_file: int, seed: int = 1):
+    """Chunks from the first pages of every PDF in data_dir, shuffled, as ingest.py would split them."""
+    paths = sorted(os.path.join(data_dir, name) for name in os.listdir(data_dir) if name.lower().endswith('.pdf'))
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    texts = []
+    for _, documents, _, error in PageExtractor().iter_pages(paths, max_pages=pages_per_file):
+        if not error:
+            texts.extend(chunk.page_content for chunk in splitter.split_documents(documents))
+    random.Random(seed).shuffle(texts)
+    return texts[:chunks]
+
+def main():
+    parser = argparse.ArgumentParser(description="Embedding throughput (chunks/sec) by batch size and precision.")
+    parser.add_argument('--data-dir', default=os.path.join(BACKEND_DIR, DATA_DIR), help="PDFs to sample chunks from")
+    parser.add_argument('--chunks', type=int, default=512, help="Chunks embedded per measurement")
+    parser.add_argument('--pages-per-file', type=int, default=48, help="Pages sampled from each PDF")
+    parser.add_argument('--batch-sizes', default='8,16,32,64,128', help="Comma-separated batch sizes")
+    parser.add_argument('--precisions', default='float32,int8', help=f"Comma-separated, from {PRECISIONS}")
+    parser.add_argument('--threads', type=int, default=None, help="torch threads (default: torch's choice)")
+    parser.add_argument('--model', default=DEFAULT_EMBEDDING_MODEL)
+    args = parser.parse_args()
+
+    texts = sample_chunks(args.data_dir, args.chunks, args.pages_per_file)
+    if not texts:
+        sys.exit(f"No text found in the PDFs in {args.data_dir}")
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+    print(f"{len(texts)} chunks (avg {sum(map(len, texts)) / len(texts):.0f} chars) from {args.data_dir}, model {args.model}")
+
+    reference = None
+    print(f"\n{'precision':<10} {'threads':>7} {'batch':>6} {'chunks/sec':>11} {'ms/chunk':>9} {'cos vs fp32':>12}")
+    for precision in args.precisions.split(','):
+        embeddings = BatchedEmbeddings(args.model, threads=args.threads, precision=precision)
+        # Warm up: first calls pay for lazy initialization
+        embeddings.embed_documents(texts[:8])
+        for batch_size in batch_sizes:
+            embeddings.batch_size = batch_size
+            started = time.perf_counter()
+            vectors = np.array(embeddings.embed_documents(texts))
+            seconds = time.perf_counter() - started
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            if reference is None and precision == 'float32':
+                reference = vectors
+            agreement = f"{np.mean(np.sum(vectors * reference, axis=1)):.4f}" if reference is not None else '-'
+            print(f"{precision:<10} {embeddings.threads:>7} {batch_size:>6} {len(texts) / seconds:>11.1f} "
+                  f"{seconds * 1000 / len(texts):>9.2f} {agreement:>12}")
+
+if __name__ == '__main__':
+    main()
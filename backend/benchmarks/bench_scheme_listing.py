@@ -0,0 +1,210 @@
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, 'api'))
+
+from data_management.database import Database
+from scheme_loader import load_scheme_children
+
+# Child tables written by the scraper (not created by Database)
+SCRAPER_TABLES = '''
+    CREATE TABLE IF NOT EXISTS required_documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        document TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS faqs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL
+    );
+'''
+
+# The listing query api/app.py used before the batched loader
+GROUP_CONCAT_QUERY = '''
+    SELECT s.*,
+           GROUP_CONCAT(DISTINCT c.name) as categories,
+           GROUP_CONCAT(DISTINCT rd.document) as required_documents,
+           GROUP_CONCAT(DISTINCT f.question || '|' || f.answer) as faqs,
+           GROUP_CONCAT(DISTINCT t.name) as tags
+    FROM schemes s
+    LEFT JOIN categories c ON s.category_id = c.id
+    LEFT JOIN required_documents rd ON s.id = rd.scheme_id
+    LEFT JOIN faqs f ON s.id = f.scheme_id
+    LEFT JOIN scheme_tags st ON s.id = st.scheme_id
+    LEFT JOIN tags t ON st.tag_id = t.id
+    WHERE s.category_id = ?
+    GROUP BY s.id
+    ORDER BY s.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+# Rows the joins above produce before GROUP BY collapses them
+FAN_OUT_QUERY = '''
+    SELECT COUNT(*)
+    FROM (SELECT id FROM schemes WHERE category_id = ? ORDER BY id DESC LIMIT ? OFFSET ?) s
+    LEFT JOIN required_documents rd ON s.id = rd.scheme_id
+    LEFT JOIN faqs f ON s.id = f.scheme_id
+    LEFT JOIN scheme_tags st ON s.id = st.scheme_id
+'''
+
+PAGE_QUERY = '''
+    SELECT s.*
+    FROM schemes s
+    WHERE s.category_id = ?
+    ORDER BY s.id DESC
+    LIMIT ? OFFSET ?
+'''
+
+def build_database(path: str, schemes: int, documents: int, faqs: int, tags: int, categories: int):
+    """Create a synthetic database with the API schema and scraper child tables."""
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCRAPER_TABLES)
+    Database(path, pool_size=1).close()
+
+    random.seed(42)
+    words = ['farmer', 'student', 'pension', 'loan', 'housing', 'health', 'women', 'skill', 'subsidy', 'insurance']
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            'INSERT INTO categories (id, name) VALUES (?, ?)',
+            [(i, f'Category {i}') for i in range(1, categories + 1)]
+        )
+        conn.executemany(
+            'INSERT INTO tags (id, name) VALUES (?, ?)',
+            [(i, f'tag-{i}') for i in range(1, 51)]
+        )
+        conn.executemany(
+            '''INSERT INTO schemes (id, title, description, ministry, category_id, scheme_type,
+                                    eligibility, benefits, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+            (
+                (i, f'Scheme {i} for {random.choice(words)}',
+                 ' '.join(random.choices(words, k=40)), 'Ministry of Testing',
+                 random.randint(1, categories), random.choice(['state', 'central']),
+                 ' '.join(random.choices(words, k=30)), ' '.join(random.choices(words, k=30)),
+                 f'2024-{random.randint(1, 12):02d}-{random.randint(1, 28):02d}')
+                for i in range(1, schemes + 1)
+            )
+        )
+        conn.executemany(
+            'INSERT INTO required_documents (scheme_id, document) VALUES (?, ?)',
+            ((i, f'Document {j}, self-attested') for i in range(1, schemes + 1) for j in range(documents))
+        )
+        conn.executemany(
+            'INSERT INTO faqs (scheme_id, question, answer) VALUES (?, ?, ?)',
+            ((i, f'Question {j}?', f'Yes, answer {j} | see the guidelines')
+             for i in range(1, schemes + 1) for j in range(faqs))
+        )
+        conn.executemany(
+            'INSERT INTO scheme_tags (scheme_id, tag_id) VALUES (?, ?)',
+            ((i, tag) for i in range(1, schemes + 1) for tag in random.sample(range(1, 51), tags))
+        )
+    conn.execute('ANALYZE')
+    conn.close()
+
+def group_concat_page(conn: sqlite3.Connection, category_id: int, limit: int, offset: int) -> List[Dict]:
+    """One page the old way: fan-out joins, GROUP_CONCAT, split in Python."""
+    schemes = []
+    for row in conn.execute(GROUP_CONCAT_QUERY, (category_id, limit, offset)):
+        scheme = dict(row)
+        scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
+        scheme['required_documents'] = scheme['required_documents'].split(',') if scheme['required_documents'] else []
+        faqs = []
+        if scheme['faqs']:
+            for item in scheme['faqs'].split(','):
+                if '|' in item:
+                    question, answer = item.split('|', 1)
+                    faqs.append({'question': question, 'answer': answer})
+        scheme['faqs'] = faqs
+        scheme['tags'] = scheme['tags'].split(',') if scheme['tags'] else []
+        schemes.append(scheme)
+    return schemes
+
+def batched_page(conn: sqlite3.Connection, category_id: int, limit: int, offset: int) -> List[Dict]:
+    """One page the new way: page of ids first, then one query per child table."""
+    schemes = [dict(row) for row in conn.execute(PAGE_QUERY, (category_id, limit, offset))]
+    return load_scheme_children(conn, schemes, with_tags=True)
+
+def time_pages(conn: sqlite3.Connection, load_page: Callable, pages: List[tuple], limit: int) -> float:
+    """Load every page once and return the mean time per page in ms."""
+    start = time.perf_counter()
+    for category_id, offset in pages:
+        load_page(conn, category_id, limit, offset)
+    return (time.perf_counter() - start) * 1000 / len(pages)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare GROUP_CONCAT fan-out joins with the batched child loader on a synthetic database."
+    )
+    parser.add_argument('--schemes', type=int, default=50000, help="Number of schemes (default: 50000)")
+    parser.add_argument('--documents', type=int, default=6, help="Required documents per scheme")
+    parser.add_argument('--faqs', type=int, default=5, help="FAQs per scheme")
+    parser.add_argument('--tags', type=int, default=3, help="Tags per scheme")
+    parser.add_argument('--categories', type=int, default=15, help="Number of categories")
+    parser.add_argument('--limit', type=int, default=20, help="Page size")
+    parser.add_argument('--pages', type=int, default=200, help="Pages to load per run")
+    parser.add_argument('--db', help="Reuse (or create) the database at this path instead of a temporary one")
+    args = parser.parse_args()
+
+    scratch_dir = None
+    db_path = args.db
+    if db_path is None:
+        scratch_dir = tempfile.mkdtemp(prefix='bench_listing_')
+        db_path = os.path.join(scratch_dir, 'bench.db')
+
+    try:
+        if not os.path.exists(db_path):
+            print(f"Building {args.schemes} schemes in {db_path} ...")
+            start = time.perf_counter()
+            build_database(db_path, args.schemes, args.documents, args.faqs, args.tags, args.categories)
+            print(f"Built in {time.perf_counter() - start:.1f}s")
+
+        conn = sqlite3.connect(db_path)
+        conn.row_factory = sqlite3.Row
+
+        # Spread the pages over every category and the first ~20 pages of each
+        random.seed(7)
+        pages = [(random.randint(1, args.categories), random.randint(0, 20) * args.limit) for _ in range(args.pages)]
+
+        # Both approaches must return the same page (apart from values
+        # the old splitting corrupted)
+        category_id, offset = pages[0]
+        old = group_concat_page(conn, category_id, args.limit, offset)
+        new = batched_page(conn, category_id, args.limit, offset)
+        assert [s['id'] for s in old] == [s['id'] for s in new], "Approaches returned different pages"
+        corrupted = sum(1 for a, b in zip(old, new) if a['faqs'] != b['faqs'] or a['required_documents'] != b['required_documents'])
+
+        joined_rows = sum(conn.execute(FAN_OUT_QUERY, (c, args.limit, o)).fetchone()[0] for c, o in pages) / len(pages)
+        child_rows = args.limit * (args.documents + args.faqs + args.tags + 1)
+
+        # Warm the page cache, then measure
+        time_pages(conn, group_concat_page, pages, args.limit)
+        time_pages(conn, batched_page, pages, args.limit)
+        old_ms = time_pages(conn, group_concat_page, pages, args.limit)
+        new_ms = time_pages(conn, batched_page, pages, args.limit)
+        conn.close()
+
+        print(f"\nPage size {args.limit}, {args.pages} pages, "
+              f"{args.documents} documents / {args.faqs} FAQs / {args.tags} tags per scheme")
+        print(f"{'':<22}{'ms/page':>10}{'rows/page':>12}")
+        print(f"{'GROUP_CONCAT joins':<22}{old_ms:>10.2f}{joined_rows:>12.0f}")
+        print(f"{'Batched loader':<22}{new_ms:>10.2f}{child_rows:>12.0f}")
+        print(f"Speed-up: {old_ms / new_ms:.1f}x")
+        print(f"Schemes with comma-corrupted documents/FAQs under GROUP_CONCAT: {corrupted}/{len(old)}")
+    finally:
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
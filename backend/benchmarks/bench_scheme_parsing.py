@@ -0,0 +1,137 @@
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from web_scraping_components.html_parsing import PARSER_BACKENDS, index_sections, make_soup
+from web_scraping_components.scraper import SchemeScraper
+
+# The scraper logs every field it extracts; keep the table readable
+logging.disable(logging.INFO)
+
+SECTIONS = ['Details', 'Benefits', 'Eligibility', 'Exclusions', 'Application Process', 'Documents Required']
+EXTRACTED_SECTIONS = ['Eligibility', 'Benefits', 'Application Process', 'Documents Required']
+
+def synthetic_page(number: int, faqs: int = 12, links: int = 400) -> str:
+    """A page shaped like a myscheme.gov.in scheme page (nav, sections, FAQs, footer)."""
+    random.seed(number)
+    words = ['farmer', 'student', 'pension', 'loan', 'housing', 'health', 'women', 'skill', 'subsidy', 'insurance']
+
+    def sentence(length: int = 14) -> str:
+        return ' '.join(random.choices(words, k=length)).capitalize() + '.'
+
+    nav = ''.join(f'<li><a class="nav-link px-2" href="/search/{i}">Link {i}</a></li>' for i in range(links // 2))
+    footer = ''.join(f'<div class="footer-col"><a href="/page/{i}">Footer {i}</a></div>' for i in range(links // 2))
+    sections = []
+    for title in SECTIONS:
+        items = ''.join(f'<li><span>{sentence()}</span></li>' for _ in range(random.randint(4, 10)))
+        table = ''
+        if title == 'Benefits':
+            rows = ''.join(f'<tr><td>Class {i}</td><td>₹{i * 1000}/-</td></tr>' for i in range(1, 8))
+            table = f'<table><tr><th>Class</th><th>Assistance</th></tr>{rows}</table>'
+        sections.append(
+            f'<div class="section"><h3>{title}</h3>'
+            f'<div class="wrapper"><div class="markdown-options"><p>{sentence()}</p><ul>{items}</ul>{table}</div></div></div>'
+        )
+    faq_items = ''.join(
+        f'<div class="faq"><div class="cursor-pointer flex">Question {i} about scheme {number}?</div>'
+        f'<div class="rounded-b p-4"><div class="markdown-options"><p>{sentence(30)}</p></div></div></div>'
+        for i in range(faqs)
+    )
+    return (
+        f'<html><head><title>Scheme {number}</title></head><body>'
+        f'<header><ul>{nav}</ul></header><main>'
+        f'<h1 class="font-bold text-xl sm:text-2xl text-[#24262B] dark:text-white mt-1">Scheme {number}</h1>'
+        f'<h3 class="text-raven">Kerala</h3>'
+        f'<div class="grid"><div class="bg-transparent">Education</div><div class="bg-transparent">Women</div></div>'
+        f'<div class="markdown-options">{sentence(40)}</div>'
+        f'{"".join(sections)}'
+        f'<div class="section"><h3>Frequently Asked Questions</h3>{faq_items}</div>'
+        f'<div class="section"><h3>Sources And References</h3><a href="/ref">Guidelines</a></div>'
+        f'</main><footer>{footer}</footer></body></html>'
+    )
+
+def load_pages(pages_dir: str) -> List[str]:
+    """Read saved scheme pages (*.html) from a directory."""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(pages_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages.append(f.read())
+    return pages
+
+def legacy_sections(scraper: SchemeScraper, soup) -> Dict:
+    """Section extraction with one find_next() walk per section."""
+    result = {title: scraper.extract_section_content(soup, title) for title in EXTRACTED_SECTIONS}
+    result['faqs'] = scraper.extract_faqs(soup)
+    return result
+
+def indexed_sections(scraper: SchemeScraper, soup) -> Dict:
+    """Section extraction from a single index_sections() pass."""
+    sections = index_sections(soup)
+    result = {title: scraper.extract_section_content(soup, title, sections) for title in EXTRACTED_SECTIONS}
+    result['faqs'] = scraper.extract_faqs(soup, sections)
+    return result
+
+def cpu_ms(work: Callable, pages: List, repeat: int) -> float:
+    """Mean CPU milliseconds per page for ``work(page)``."""
+    started = time.process_time()
+    for _ in range(repeat):
+        for page in pages:
+            work(page)
+    return (time.process_time() - started) * 1000 / (repeat * len(pages))
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure per-page CPU cost of parsing scheme pages.")
+    parser.add_argument('--pages-dir', help="Directory of saved scheme pages (*.html); default: synthetic pages")
+    parser.add_argument('--synthetic', type=int, default=30, help="Number of synthetic pages when no directory is given")
+    parser.add_argument('--repeat', type=int, default=3, help="Times to parse every page")
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir) if args.pages_dir else [synthetic_page(i) for i in range(args.synthetic)]
+    if not pages:
+        sys.exit(f"No .html pages found in {args.pages_dir}")
+    print(f"{len(pages)} pages, {sum(len(page) for page in pages) / len(pages) / 1024:.0f} KB on average, "
+          f"{args.repeat} runs each\n")
+
+    scraper = SchemeScraper()
+    backends = []
+    for backend in PARSER_BACKENDS:
+        try:
+            make_soup('', backend)
+            backends.append(backend)
+        except Exception:
+            print(f"(skipping {backend}: not installed)")
+
+    print(f"{'Stage':<48}{'CPU ms/page':>12}")
+    soups = {}
+    for backend in backends:
+        print(f"{'Tree build (' + backend + ')':<48}{cpu_ms(lambda page: make_soup(page, backend), pages, args.repeat):>12.2f}")
+        soups[backend] = [make_soup(page, backend) for page in pages]
+
+    for backend in backends:
+        legacy = cpu_ms(lambda soup: legacy_sections(scraper, soup), soups[backend], args.repeat)
+        indexed = cpu_ms(lambda soup: indexed_sections(scraper, soup), soups[backend], args.repeat)
+        print(f"{'Sections, find_next per section (' + backend + ')':<48}{legacy:>12.2f}")
+        print(f"{'Sections, single-pass index (' + backend + ')':<48}{indexed:>12.2f}")
+        mismatches = sum(
+            1 for soup in soups[backend] if legacy_sections(scraper, soup) != indexed_sections(scraper, soup)
+        )
+        if mismatches:
+            print(f"  WARNING: {mismatches} pages extracted differently")
+
+    for backend in backends:
+        full = cpu_ms(
+            lambda page: scraper.parse_scheme_details(make_soup(page, backend), 'https://www.myscheme.gov.in/schemes/x'),
+            pages, args.repeat
+        )
+        print(f"{'Full parse_scheme_details (' + backend + ')':<48}{full:>12.2f}")
+
+if __name__ == '__main__':
+    main()
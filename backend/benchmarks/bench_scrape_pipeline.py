@@ -0,0 +1,113 @@
+import argparse
+import hashlib
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from bench_scheme_parsing import synthetic_page
+from data_management.database import Database
+from web_scraping_components.async_fetcher import BASE_URL_ENV
+from web_scraping_components.crawl_queue import CrawlQueue
+from web_scraping_components.http_replay import HttpCorpus, ReplayServer
+from web_scraping_components.pipeline import ScrapePipeline
+
+# Per-page, per-batch and retry logs would drown the results
+logging.disable(logging.WARNING)
+
+# The tables the scraper writes (save_schemes_bulk), as reset_and_scrape
+# lays them out plus the columns the scraper has since gained
+SCRAPER_SCHEMA = '''
+CREATE TABLE schemes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    description TEXT,
+    state TEXT,
+    url TEXT UNIQUE NOT NULL,
+    updated_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, category TEXT NOT NULL);
+CREATE TABLE benefits (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, benefit TEXT NOT NULL);
+CREATE TABLE eligibility_criteria (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, criterion TEXT NOT NULL);
+CREATE TABLE application_process (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, step TEXT NOT NULL);
+CREATE TABLE required_documents (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, document TEXT NOT NULL);
+CREATE TABLE faqs (id INTEGER PRIMARY KEY AUTOINCREMENT, scheme_id INTEGER, question TEXT NOT NULL, answer TEXT NOT NULL);
+'''
+
+def synthetic_corpus(pages: int) -> HttpCorpus:
+    """A corpus of synthetic scheme pages, each with an ETag."""
+    corpus = HttpCorpus()
+    for number in range(pages):
+        html = synthetic_page(number)
+        etag = '"' + hashlib.sha256(html.encode('utf-8')).hexdigest()[:16] + '"'
+        corpus.record(f'https://www.myscheme.gov.in/schemes/bench-{number}', 200,
+                      {'content-type': 'text/html; charset=utf-8', 'etag': etag}, html)
+    return corpus
+
+def print_pass(number: int, stats: dict, replay: dict):
+    wall = stats['seconds'] or 1e-9
+    fetch, parse, write = stats['fetch'], stats['parse'], stats['write']
+    print(f"\nPass {number}: {wall:.2f}s wall")
+    print(f"  pages/sec       {fetch['items'] / wall:10.1f}   ({fetch['items']} pages, {fetch['failed']} failed, "
+          f"{fetch['unchanged']} unchanged before parsing)")
+    if parse['items']:
+        print(f"  parse ms/page   {parse['cpu_seconds'] * 1000 / parse['items']:10.2f}   CPU, "
+              f"{parse['seconds'] * 1000 / parse['items']:.2f} ms wall incl. hand-off to workers")
+    if write['seconds']:
+        print(f"  DB writes/sec   {write['items'] / write['seconds']:10.1f}   ({write['items']} schemes "
+              f"in {write['batches']} batches, {write['seconds']:.2f}s)")
+    else:
+        print(f"  DB writes/sec   {'-':>10}   (nothing changed, nothing written)")
+    print(f"  replay server   {replay['requests']} requests, {replay['not_modified']} answered 304, "
+          f"{replay['errors_injected']} errors injected")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fetch -> parse -> write against a replayed corpus.")
+    parser.add_argument('--corpus', help="Recorded corpus (.jsonl.gz, see http_replay.py); default: synthetic pages")
+    parser.add_argument('--pages', type=int, default=300, help="Synthetic pages when no corpus is given")
+    parser.add_argument('--latency', type=float, default=0.02, help="Replay server latency per response (s)")
+    parser.add_argument('--jitter', type=float, default=0.01, help="Random ± variation of the latency (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of responses answered with 503")
+    parser.add_argument('--concurrency', type=int, default=16, help="Requests in flight at once")
+    parser.add_argument('--rate', type=float, default=1000.0, help="Requests per second to the replay server")
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 1, help="Parse worker processes")
+    parser.add_argument('--passes', type=int, default=2,
+                        help="Crawls of the same corpus; later passes measure incremental re-crawls")
+    args = parser.parse_args()
+
+    corpus = HttpCorpus(args.corpus) if args.corpus else synthetic_corpus(args.pages)
+    urls = [record['url'] for record in corpus.responses.values() if '/schemes/' in record['url']]
+    if not urls:
+        sys.exit("The corpus has no scheme pages")
+    url_categories = {url: ['Benchmark'] for url in urls}
+    print(f"{len(urls)} scheme pages, latency {args.latency * 1000:.0f}±{args.jitter * 1000:.0f} ms, "
+          f"error rate {args.error_rate:.0%}, concurrency {args.concurrency}, {args.parse_workers} parse workers")
+
+    with tempfile.TemporaryDirectory() as workdir, \
+            ReplayServer(corpus, latency=args.latency, jitter=args.jitter,
+                         error_rate=args.error_rate, seed=1) as server:
+        os.environ[BASE_URL_ENV] = server.url
+        db_path = os.path.join(workdir, 'bench.db')
+        with sqlite3.connect(db_path) as conn:
+            conn.executescript(SCRAPER_SCHEMA)
+        db = Database(db_path)
+        crawl_queue = CrawlQueue(os.path.join(workdir, 'crawl_queue.db'))
+        crawl_queue.add(urls)
+
+        for number in range(1, args.passes + 1):
+            crawl_queue.reset()
+            before = dict(server.stats)
+            pipeline = ScrapePipeline(db, args.concurrency, args.rate, args.parse_workers, crawl_queue=crawl_queue)
+            stats = pipeline.run(crawl_queue.claim(), url_categories)
+            print_pass(number, stats, {name: server.stats[name] - before[name] for name in server.stats})
+
+        crawl_queue.close()
+        db.close()
+
+if __name__ == '__main__':
+    main()
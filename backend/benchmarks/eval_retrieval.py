@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from legal_chatbot_logic.bm25_index import load_bm25_index, reference_tokens
+from legal_chatbot_logic.embedding_model import BatchedEmbeddings, split_cache_name
+from legal_chatbot_logic.hybrid_retriever import HybridRetriever
+from legal_chatbot_logic.qa_logic import DEFAULT_EMBEDDING_MODEL, DENSE_K, REFERENCE_WEIGHT, RRF_K, SPARSE_K, VECTORSTORE_PATH
+from legal_chatbot_logic.vector_index import (
+    SERVING_INDEX_PATH, indexed_embedding_model, load_serving_vectorstore, serving_index_is_current
+)
+
+QUESTIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'retrieval_questions.json')
+
+def squeeze(text: str):
+    """Lower-cased text without whitespace, so labels survive PDF line breaks and spacing."""
+    return re.sub(r'\s+', '', text).lower()
+
+def is_relevant(document, question: dict):
+    """A chunk is relevant if it comes from the labeled PDF and contains the labeled passage."""
+    source = os.path.basename(document.metadata.get('source', ''))
+    return source == question['source'] and squeeze(question['contains']) in squeeze(document.page_content)
+
+def first_hit(retriever, question: dict):
+    """Rank (from 1) of the first relevant chunk, None if none was retrieved, and the seconds it took."""
+    started = time.perf_counter()
+    documents = retriever.invoke(question['question'])
+    seconds = time.perf_counter() - started
+    rank = next((rank for rank, document in enumerate(documents, start=1) if is_relevant(document, question)), None)
+    return rank, seconds
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k and latency of dense, BM25 and hybrid retrieval over labeled questions.")
+    parser.add_argument('--questions', default=QUESTIONS_PATH,
+                        help="JSON list of {question, source (PDF file name), contains (passage of a relevant chunk)}")
+    parser.add_argument('--vectorstore', default=os.path.join(BACKEND_DIR, VECTORSTORE_PATH))
+    parser.add_argument('--serving', action='store_true', help=f"Search the serving index ({SERVING_INDEX_PATH}) instead")
+    parser.add_argument('--k', default='1,2,5,10', help="Comma-separated cut-offs for recall@k")
+    parser.add_argument('--dense-k', type=int, default=DENSE_K, help="FAISS candidates fused by the hybrid retriever")
+    parser.add_argument('--sparse-k', type=int, default=SPARSE_K, help="BM25 candidates fused by the hybrid retriever")
+    parser.add_argument('--rrf-k', type=int, default=RRF_K, help="Reciprocal rank fusion constant")
+    parser.add_argument('--reference-weight', type=float, default=REFERENCE_WEIGHT,
+                        help="BM25 weight in the fusion for questions citing a section/article")
+    parser.add_argument('--model', default=None,
+                        help="Embedding model and precision, e.g. NAME@int8 (default: the ones the index was built with)")
+    parser.add_argument('--show-misses', action='store_true', help="List the questions each retriever misses at the largest k")
+    args = parser.parse_args()
+
+    with open(args.questions, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+    cutoffs = [int(k) for k in args.k.split(',')]
+    max_k = max(cutoffs)
+
+    # No embedding cache: every query pays for its embedding, as a new question would
+    model_name, precision = split_cache_name(args.model or indexed_embedding_model(args.vectorstore)
+                                             or DEFAULT_EMBEDDING_MODEL)
+    embeddings = BatchedEmbeddings(model_name, precision=precision)
+    if args.serving:
+        serving_path = os.path.join(BACKEND_DIR, SERVING_INDEX_PATH)
+        if not serving_index_is_current(serving_path, args.vectorstore):
+            sys.exit(f"{serving_path} is out of date with {args.vectorstore}; re-run legal_chatbot_logic/ingest.py.")
+        db = load_serving_vectorstore(embeddings, serving_path)
+    else:
+        db = FAISS.load_local(args.vectorstore, embeddings, allow_dangerous_deserialization=True)
+    bm25 = load_bm25_index(args.vectorstore)
+    if bm25 is None:
+        sys.exit(f"No BM25 index in {args.vectorstore}; re-run legal_chatbot_logic/ingest.py.")
+
+    retrievers = {
+        'dense': db.as_retriever(search_kwargs={'k': max_k}),
+        'bm25': HybridRetriever(vectorstore=db, bm25=bm25, k=max_k, dense_k=0, sparse_k=max_k),
+        'hybrid': HybridRetriever(vectorstore=db, bm25=bm25, k=max_k, dense_k=args.dense_k,
+                                  sparse_k=args.sparse_k, rrf_k=args.rrf_k, reference_weight=args.reference_weight),
+    }
+    # Warm up: first calls pay for lazy initialization
+    for retriever in retrievers.values():
+        retriever.invoke(questions[0]['question'])
+
+    citing = [bool(reference_tokens(question['question'])) for question in questions]
+    print(f"{len(questions)} questions ({sum(citing)} citing a section/article), {db.index.ntotal} chunks, "
+          f"{'serving' if args.serving else 'exact'} index; hybrid dense_k={args.dense_k} "
+          f"sparse_k={args.sparse_k} rrf_k={args.rrf_k} reference_weight={args.reference_weight:g}\n")
+    header = ' '.join(f"{'R@' + str(k):>6}" for k in cutoffs)
+    print(f"{'retriever':<10} {'questions':<10} {header} {'p50 ms':>8} {'p95 ms':>8}")
+    for name, retriever in retrievers.items():
+        ranks, latencies = [], []
+        for question in questions:
+            rank, seconds = first_hit(retriever, question)
+            ranks.append(rank)
+            latencies.append(seconds * 1000)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        for label, subset in (('all', [True] * len(questions)), ('citing', citing), ('other', [not c for c in citing])):
+            selected = [rank for rank, keep in zip(ranks, subset) if keep]
+            if not selected:
+                continue
+            recalls = ' '.join(f"{sum(rank is not None and rank <= k for rank in selected) / len(selected):>6.2f}"
+                               for k in cutoffs)
+            timing = f"{p50:>8.1f} {p95:>8.1f}" if label == 'all' else ''
+            print(f"{name if label == 'all' else '':<10} {label:<10} {recalls} {timing}")
+        if args.show_misses:
+            for rank, question in zip(ranks, questions):
+                if rank is None:
+                    print(f"    missed: {question['question']}")
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,15 @@
 import sqlite3
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 import os
+import base64
+import json
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
 
 # Configure logging
 logging.basicConfig(
@@ -11,15 +18,386 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Columns of `schemes` mirrored into the full-text index, with their BM25 weights
+FTS_COLUMNS = ['title', 'description', 'eligibility', 'benefits', 'documents_required']
+FTS_WEIGHTS = [10.0, 5.0, 2.0, 2.0, 1.0]
+
+# Longest query we turn into an FTS expression; extra words are ignored
+FTS_MAX_TERMS = 8
+
+def build_fts_query(text: str) -> Optional[str]:
+    """Turn free text from the search box into a safe FTS5 prefix query.
+
+    Every word is quoted (so FTS5 operators in user input are inert) and
+    matched as a prefix, e.g. ``pm kisan yoj`` -> ``"pm"* "kisan"* "yoj"*``.
+    Returns None when the text has no searchable words.
+    """
+    terms = re.findall(r'\w+', text or '')[:FTS_MAX_TERMS]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def fts_rank_expression(table: str = 'schemes_fts') -> str:
+    """SQL expression for the weighted BM25 rank (lower is better)."""
+    weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+    return f'bm25({table}, {weights})'
+
+def fts_snippet_expression(table: str = 'schemes_fts') -> str:
+    """SQL expression for a highlighted snippet around the best match."""
+    return f"snippet({table}, -1, '<mark>', '</mark>', '…', 16)"
+
+# Keyset pagination orderings, each ending in the unique id as a tie-breaker
+KEYSET_SORTS = {
+    'relevance': [('id', 'DESC')],
+    'newest': [('created_at', 'DESC'), ('id', 'DESC')],
+    'alphabetical': [('title', 'ASC'), ('id', 'ASC')],
+}
+
+# How long cached listing totals are trusted before recounting (seconds)
+COUNT_CACHE_TTL = 300
+
+def encode_cursor(sort_by: str, values: List) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = json.dumps([sort_by, values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: Optional[str], sort_by: str) -> Optional[List]:
+    """Decode a cursor from ``encode_cursor``.
+
+    Returns None for an empty cursor (first page) and raises ValueError
+    for a malformed cursor or one issued for a different sort order.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        cursor_sort, values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if cursor_sort != sort_by or not isinstance(values, list) or len(values) != len(KEYSET_SORTS[sort_by]):
+        raise ValueError("Cursor does not match the requested sort order")
+    return values
+
+def keyset_sql(sort_by: str, cursor_values: Optional[List], alias: str = 's') -> Tuple[str, List, str]:
+    """Build the seek condition, its parameters and the ORDER BY for a keyset page.
+
+    The condition is empty for the first page. All columns of a sort run
+    in the same direction, so a single row-value comparison is enough.
+    """
+    columns = KEYSET_SORTS[sort_by]
+    order_by = ', '.join(f'{alias}.{column} {direction}' for column, direction in columns)
+    if cursor_values is None:
+        return '', [], order_by
+    
+    operator = '<' if columns[0][1] == 'DESC' else '>'
+    names = ', '.join(f'{alias}.{column}' for column, _ in columns)
+    placeholders = ', '.join('?' for _ in columns)
+    return f'({names}) {operator} ({placeholders})', list(cursor_values), order_by
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> set:
+    """Get the column names of a table (empty if the table doesn't exist)."""
+    return {row[1] for row in conn.execute(f'PRAGMA table_info({table})')}
+
+# Indexes created on every start, for whichever of their tables and
+# columns the database has: (name, table, columns). The scraper
+# (reset_and_scrape) and the API (Database) create different tables, and
+# a table may only appear after the first start, so these aren't
+# versioned migrations.
+INDEXES = [
+    # Keyset pagination of category listings: one index per (filter, sort key, id)
+    ('idx_schemes_category_id', 'schemes', ['category_id', 'id']),
+    ('idx_schemes_category_created', 'schemes', ['category_id', 'created_at', 'id']),
+    ('idx_schemes_category_title', 'schemes', ['category_id', 'title', 'id']),
+    ('idx_schemes_category_type_id', 'schemes', ['category_id', 'scheme_type', 'id']),
+    ('idx_schemes_category_type_created', 'schemes', ['category_id', 'scheme_type', 'created_at', 'id']),
+    ('idx_schemes_category_type_title', 'schemes', ['category_id', 'scheme_type', 'title', 'id']),
+    # Filters on schemes outside the category listings (url lookups use
+    # the unique index from _ensure_unique_scheme_url)
+    ('idx_schemes_type_created', 'schemes', ['scheme_type', 'created_at']),
+    ('idx_schemes_state_created', 'schemes', ['state', 'created_at']),
+    ('idx_schemes_created', 'schemes', ['created_at']),
+    # Reverse lookup of the tag link table (its primary key leads with scheme_id)
+    ('idx_scheme_tags_tag', 'scheme_tags', ['tag_id', 'scheme_id']),
+] + [
+    # Child tables written by the scraper, all read by scheme_id
+    (f'idx_{table}_scheme', table, ['scheme_id'])
+    for table in ['required_documents', 'faqs', 'benefits', 'eligibility_criteria',
+                  'application_process', 'categories']
+]
+
+def _ensure_indexes(conn: sqlite3.Connection) -> bool:
+    """Create the missing INDEXES whose table has all of their columns.
+
+    Returns whether any index was created.
+    """
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    created = False
+    for name, table, columns in INDEXES:
+        if name in existing or not set(columns) <= _table_columns(conn, table):
+            continue
+        conn.execute(f'CREATE INDEX {name} ON {table}({", ".join(columns)})')
+        logger.info(f"Created index {name} on {table}({', '.join(columns)})")
+        created = True
+    return created
+
+def _migration_data_version(conn: sqlite3.Connection):
+    """Single-row stamp bumped on every write, used to invalidate caches."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS data_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO data_version (id, version) VALUES (1, 0)')
+
+def _has_unique_index(conn: sqlite3.Connection, table: str, columns: List[str]) -> bool:
+    """Whether a unique index (or constraint) covers exactly these columns."""
+    for index in conn.execute(f'PRAGMA index_list({table})').fetchall():
+        if index[2] and [row[2] for row in conn.execute(f'PRAGMA index_info({index[1]})')] == columns:
+            return True
+    return False
+
+def _ensure_unique_scheme_url(conn: sqlite3.Connection) -> bool:
+    """Make schemes.url unique so scraped schemes can be upserted by URL.
+
+    Rows that share a URL are merged first: the newest row (highest id)
+    is kept and, table by table, takes the child rows of the newest copy
+    that has any. Runs on every start, so a database stamped before this
+    existed still gets the index; once it exists this is a no-op.
+    Returns whether the index was built.
+    """
+    if 'url' not in _table_columns(conn, 'schemes') or _has_unique_index(conn, 'schemes', ['url']):
+        return False
+
+    copies = {}
+    for row in conn.execute('''
+        /* advisor: full-scan-ok */
+        SELECT id, url FROM schemes
+        WHERE url IN (SELECT url FROM schemes GROUP BY url HAVING COUNT(*) > 1)
+        ORDER BY url, id DESC
+    '''):
+        copies.setdefault(row[1], []).append(row[0])
+
+    child_tables = [
+        table for table in list(SCHEME_CHILD_TABLES) + ['scheme_tags']
+        if 'scheme_id' in _table_columns(conn, table)
+    ]
+    for ids in copies.values():
+        keep, others = ids[0], ids[1:]
+        for table in child_tables:
+            source = next(
+                (scheme_id for scheme_id in ids
+                 if conn.execute(f'SELECT 1 FROM {table} WHERE scheme_id = ? LIMIT 1', (scheme_id,)).fetchone()),
+                None
+            )
+            if source is None:
+                continue
+            stale = [scheme_id for scheme_id in ids if scheme_id != source]
+            marks = ', '.join('?' for _ in stale)
+            conn.execute(f'DELETE FROM {table} WHERE scheme_id IN ({marks})', stale)
+            if source != keep:
+                conn.execute(f'UPDATE {table} SET scheme_id = ? WHERE scheme_id = ?', (keep, source))
+        marks = ', '.join('?' for _ in others)
+        conn.execute(f'DELETE FROM schemes WHERE id IN ({marks})', others)
+    if copies:
+        logger.warning(f"Merged {sum(len(ids) - 1 for ids in copies.values())} duplicate scheme rows "
+                       f"({len(copies)} URLs) before making schemes.url unique")
+
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_schemes_url_unique ON schemes(url)')
+    # The plain url index older databases have is now redundant
+    conn.execute('DROP INDEX IF EXISTS idx_schemes_url')
+    return True
+
+# Schema migrations: (user_version, description, function), applied in order
+MIGRATIONS = [
+    # 1 and 2 (indexes) are INDEXES and 4 (unique scheme URLs) is
+    # _ensure_unique_scheme_url, both applied on every start
+    (3, 'Data version stamp for cache invalidation', _migration_data_version),
+]
+
+# Child tables of a scraped scheme: table -> value columns. The scheme
+# dict holds each under the table's name, as strings or (for several
+# columns) dicts keyed by column.
+SCHEME_CHILD_TABLES = {
+    'categories': ['category'],
+    'benefits': ['benefit'],
+    'eligibility_criteria': ['criterion'],
+    'application_process': ['step'],
+    'required_documents': ['document'],
+    'faqs': ['question', 'answer'],
+}
+
+# Schemes written per transaction by save_schemes_bulk
+BULK_BATCH_SIZE = 100
+
+# Most ids bound in one `IN (...)` (stays under SQLite's variable limit)
+IN_CHUNK_SIZE = 500
+
+class ConnectionPool:
+    """Bounded, thread-safe pool of SQLite connections.
+
+    Connections are created lazily up to ``max_size`` and handed out
+    last-in-first-out so the most recently used (warmest) connection is
+    reused first. Tuning pragmas are applied once, when a connection is
+    opened, instead of on every request.
+    """
+
+    # Applied to every new connection, in order
+    PRAGMAS = [
+        ('journal_mode', 'WAL'),        # Readers don't block the writer
+        ('synchronous', 'NORMAL'),      # Safe with WAL, far fewer fsyncs
+        ('cache_size', -32000),         # ~32 MB page cache per connection
+        ('mmap_size', 268435456),       # Map up to 256 MB of the file
+        ('temp_store', 'MEMORY'),
+        ('busy_timeout', 5000),
+        ('recursive_triggers', 'ON'),   # Fire delete triggers on REPLACE
+    ]
+
+    def __init__(self, db_path: str, max_size: int = 8, timeout: float = 30.0):
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+            'created': 0,
+            'high_water': 0,
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a new connection and apply the tuning pragmas."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.PRAGMAS:
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Check a connection out of the pool, waiting if all are busy."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool is closed")
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._size < self.max_size
+                if can_create:
+                    # Reserve the slot, then connect outside the lock
+                    self._size += 1
+            if can_create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                    raise
+                with self._lock:
+                    self._stats['created'] += 1
+            else:
+                start = time.perf_counter()
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    with self._lock:
+                        self._stats['waits'] += 1
+                        self._stats['timeouts'] += 1
+                    raise sqlite3.OperationalError(
+                        f"Timed out after {self.timeout}s waiting for a database connection"
+                    )
+                with self._lock:
+                    self._stats['waits'] += 1
+                    self._stats['wait_time'] += time.perf_counter() - start
+
+        with self._lock:
+            self._stats['checkouts'] += 1
+            self._in_use += 1
+            self._stats['high_water'] = max(self._stats['high_water'], self._in_use)
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        """Return a connection to the pool."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._in_use -= 1
+            closed = self._closed
+        if closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commit on success, roll back on error."""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self.release(conn)
+
+    def stats(self) -> Dict:
+        """Get a snapshot of the pool metrics."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = self._size
+            stats['in_use'] = self._in_use
+            stats['max_size'] = self.max_size
+        return stats
+
+    def close(self):
+        """Close idle connections; busy ones are closed when released."""
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
 class Database:
-    def __init__(self, db_path: str = "yojnabuddy.db"):
-        """Initialize database connection."""
+    def __init__(
+        self,
+        db_path: str = "yojnabuddy.db",
+        pool_size: int = 8,
+        pool_timeout: float = 30.0
+    ):
+        """Initialize the database connection pool."""
         self.db_path = db_path
+        self.pool = ConnectionPool(db_path, max_size=pool_size, timeout=pool_timeout)
+        self.fts_enabled = False
+        self._count_cache = {}
+        self._count_cache_lock = threading.Lock()
         self._create_tables()
 
+    def connection(self):
+        """Borrow a pooled connection for the duration of a ``with`` block."""
+        return self.pool.connection()
+
+    def pool_stats(self) -> Dict:
+        """Get connection pool metrics (checkouts, waits, high-water mark)."""
+        return self.pool.stats()
+
+    def close(self):
+        """Close all pooled connections."""
+        self.pool.close()
+
     def _create_tables(self):
         """Create necessary tables if they don't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             
             # Create categories table
@@ -73,10 +451,135 @@ class Database:
             ''')
             
             conn.commit()
+            
+            self._apply_migrations(conn)
+            self.fts_enabled = self._create_search_index(conn)
+
+    def _apply_migrations(self, conn: sqlite3.Connection):
+        """Apply pending schema migrations, tracked in PRAGMA user_version,
+        then create any missing indexes."""
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        applied = False
+        for version, description, migrate in MIGRATIONS:
+            if version <= current:
+                continue
+            logger.info(f"Applying database migration {version}: {description}")
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+            applied = True
+        
+        # Retried on every start: tables they need may have been added since
+        url_index = _ensure_unique_scheme_url(conn)
+        indexes = _ensure_indexes(conn)
+        if url_index or indexes:
+            conn.commit()
+            applied = True
+        
+        if applied:
+            # Refresh planner statistics so the new indexes get used
+            conn.execute('ANALYZE')
+            conn.commit()
+
+    def _create_search_index(self, conn: sqlite3.Connection) -> bool:
+        """Create the FTS5 index over schemes and the triggers that sync it."""
+        scheme_columns = {row['name'] for row in conn.execute('PRAGMA table_info(schemes)')}
+        missing = [column for column in FTS_COLUMNS if column not in scheme_columns]
+        if missing:
+            logger.warning(f"Full-text search disabled, schemes table lacks: {', '.join(missing)}")
+            return False
+        
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'schemes_fts'")
+        exists = cursor.fetchone() is not None
+        
+        columns = ', '.join(FTS_COLUMNS)
+        new_values = ', '.join(f'new.{column}' for column in FTS_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in FTS_COLUMNS)
+        
+        # External-content table: the text lives in schemes, FTS only keeps the index
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS schemes_fts USING fts5(
+                {columns},
+                content='schemes',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            )
+        ''')
+        
+        # Keep the index in sync with every write to schemes
+        cursor.executescript(f'''
+            CREATE TRIGGER IF NOT EXISTS schemes_fts_ai AFTER INSERT ON schemes BEGIN
+                INSERT INTO schemes_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS schemes_fts_ad AFTER DELETE ON schemes BEGIN
+                INSERT INTO schemes_fts(schemes_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS schemes_fts_au AFTER UPDATE ON schemes BEGIN
+                INSERT INTO schemes_fts(schemes_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO schemes_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+        ''')
+        
+        if not exists:
+            # Index rows that were written before the index existed
+            cursor.execute("INSERT INTO schemes_fts(schemes_fts) VALUES ('rebuild')")
+            logger.info("Built full-text search index for schemes")
+        
+        conn.commit()
+        return True
+
+    def rebuild_search_index(self):
+        """Rebuild the full-text index from the schemes table."""
+        if not self.fts_enabled:
+            return
+        with self.connection() as conn:
+            conn.execute("INSERT INTO schemes_fts(schemes_fts) VALUES ('rebuild')")
+            conn.execute("INSERT INTO schemes_fts(schemes_fts) VALUES ('optimize')")
+        logger.info("Rebuilt full-text search index")
+
+    def search_schemes_fts(self, text: str, limit: int = 20, offset: int = 0) -> List[Dict]:
+        """Full-text search over schemes, best BM25 match first."""
+        if not self.fts_enabled:
+            logger.warning("Full-text search requested but the search index is not available")
+            return []
+        fts_query = build_fts_query(text)
+        if not fts_query:
+            return []
+        
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'''
+                SELECT s.id, s.title, s.description, s.ministry, s.scheme_type,
+                       c.name as category_name,
+                       {fts_snippet_expression()} as snippet,
+                       {fts_rank_expression()} as rank
+                FROM schemes_fts
+                JOIN schemes s ON s.id = schemes_fts.rowid
+                LEFT JOIN categories c ON s.category_id = c.id
+                WHERE schemes_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+            ''', (fts_query, limit, offset))
+            
+            return [
+                {
+                    "id": row[0],
+                    "title": row[1],
+                    "description": row[2],
+                    "ministry": row[3],
+                    "type": row[4],
+                    "category": row[5],
+                    "snippet": row[6],
+                    "rank": row[7]
+                }
+                for row in cursor.fetchall()
+            ]
 
     def get_all_categories_with_counts(self) -> List[Dict]:
         """Get all categories with their scheme counts."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT c.id, c.name, c.description, c.icon, c.color,
@@ -107,7 +610,7 @@ class Database:
         sort_by: str = 'relevance'
     ) -> List[Dict]:
         """Get schemes by category with pagination and sorting."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             
             # Base query
@@ -149,7 +652,7 @@ class Database:
 
     def get_scheme_details(self, scheme_id: int) -> Optional[Dict]:
         """Get detailed information about a specific scheme."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT s.id, s.title, s.description, s.ministry, s.scheme_type,
@@ -193,7 +696,7 @@ class Database:
         offset: int = 0
     ) -> List[Dict]:
         """Get schemes by category and type (state/central) with pagination."""
-        with sqlite3.connect(self.db_path) as conn:
+        with self.connection() as conn:
             cursor = conn.cursor()
             cursor.execute('''
                 SELECT s.id, s.title, s.description, s.ministry, s.scheme_type,
@@ -220,14 +723,138 @@ class Database:
                 for row in rows
             ]
 
+    def get_schemes_page_by_category(
+        self,
+        category_id: int,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        sort_by: str = 'relevance',
+        scheme_type: Optional[str] = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Get one keyset-paginated page of schemes in a category.
+        
+        Returns the page and the cursor for the next page (None on the
+        last page). Raises ValueError for an invalid cursor.
+        """
+        if sort_by not in KEYSET_SORTS:
+            sort_by = 'relevance'
+        cursor_values = decode_cursor(cursor, sort_by)
+        seek, seek_params, order_by = keyset_sql(sort_by, cursor_values)
+        
+        conditions = ['s.category_id = ?']
+        params = [category_id]
+        if scheme_type:
+            conditions.append('s.scheme_type = ?')
+            params.append(scheme_type)
+        if seek:
+            conditions.append(seek)
+            params.extend(seek_params)
+        
+        sort_columns = [column for column, _ in KEYSET_SORTS[sort_by]]
+        
+        with self.connection() as conn:
+            db_cursor = conn.cursor()
+            # Fetch one extra row to know whether there is a next page; tags
+            # are looked up only for the rows on the page
+            db_cursor.execute(f'''
+                SELECT s.id, s.title, s.description, s.ministry, s.scheme_type,
+                       (SELECT GROUP_CONCAT(t.name)
+                        FROM scheme_tags st
+                        JOIN tags t ON st.tag_id = t.id
+                        WHERE st.scheme_id = s.id) as tags,
+                       {', '.join(f's.{column}' for column in sort_columns)}
+                FROM schemes s
+                WHERE {' AND '.join(conditions)}
+                ORDER BY {order_by}
+                LIMIT ?
+            ''', params + [limit + 1])
+            rows = db_cursor.fetchall()
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(sort_by, list(rows[-1])[6:])
+        
+        schemes = [
+            {
+                "id": row[0],
+                "title": row[1],
+                "description": row[2],
+                "ministry": row[3],
+                "type": row[4],
+                "tags": row[5].split(',') if row[5] else []
+            }
+            for row in rows
+        ]
+        return schemes, next_cursor
+
+    def _cached_count(self, key: Tuple, query: str, params: Tuple) -> int:
+        """Run a COUNT query, reusing the result until the data version
+        changes or COUNT_CACHE_TTL seconds pass."""
+        now = time.monotonic()
+        version = self.get_data_version()
+        with self._count_cache_lock:
+            cached = self._count_cache.get(key)
+        if cached and cached[0] > now and cached[1] == version:
+            return cached[2]
+        
+        with self.connection() as conn:
+            count = conn.execute(query, params).fetchone()[0]
+        with self._count_cache_lock:
+            self._count_cache[key] = (now + COUNT_CACHE_TTL, version, count)
+        return count
+
+    def invalidate_counts(self):
+        """Drop cached listing totals after a write."""
+        with self._count_cache_lock:
+            self._count_cache.clear()
+
+    def get_data_version(self) -> int:
+        """Get the data version stamp (changes whenever scheme data is written)."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()
+                return row[0] if row else 0
+        except sqlite3.Error as e:
+            logger.error(f"Error reading data version: {str(e)}")
+            return 0
+
+    def get_data_last_modified(self) -> Optional[datetime]:
+        """Get when scheme data was last written (UTC), or None if unknown."""
+        try:
+            with self.connection() as conn:
+                row = conn.execute('SELECT updated_at FROM data_version WHERE id = 1').fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading data version: {str(e)}")
+            return None
+        if not row or not row[0]:
+            return None
+        # CURRENT_TIMESTAMP is stored as UTC 'YYYY-MM-DD HH:MM:SS'
+        return datetime.strptime(row[0], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+
+    def _bump_data_version(self, conn: sqlite3.Connection):
+        """Bump the data version inside the caller's transaction."""
+        conn.execute('''
+            UPDATE data_version
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+        ''')
+
+    def bump_data_version(self) -> int:
+        """Mark the data as changed so response and count caches refresh."""
+        with self.connection() as conn:
+            self._bump_data_version(conn)
+            version = conn.execute('SELECT version FROM data_version WHERE id = 1').fetchone()[0]
+        self.invalidate_counts()
+        return version
+
     def get_scheme_count_by_category(self, category_id: int) -> int:
         """Get total count of schemes in a category."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) FROM schemes WHERE category_id = ?
-            ''', (category_id,))
-            return cursor.fetchone()[0]
+        return self._cached_count(
+            ('category', str(category_id)),
+            'SELECT COUNT(*) FROM schemes WHERE category_id = ?',
+            (category_id,)
+        )
 
     def get_scheme_count_by_category_and_type(
         self,
@@ -235,137 +862,268 @@ class Database:
         scheme_type: str
     ) -> int:
         """Get total count of schemes in a category by type."""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT COUNT(*) FROM schemes 
-                WHERE category_id = ? AND scheme_type = ?
-            ''', (category_id, scheme_type))
-            return cursor.fetchone()[0]
+        return self._cached_count(
+            ('category_type', str(category_id), scheme_type),
+            'SELECT COUNT(*) FROM schemes WHERE category_id = ? AND scheme_type = ?',
+            (category_id, scheme_type)
+        )
 
     def save_scheme(self, scheme_data: Dict) -> Optional[int]:
         """Save a scheme and its related data to the database."""
         try:
-            cursor = self.conn.cursor()
-            
-            # Check if scheme already exists
-            cursor.execute('SELECT id FROM schemes WHERE url = ?', (scheme_data['url'],))
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing scheme
-                scheme_id = existing['id']
-                cursor.execute('''
-                UPDATE schemes 
-                SET name = ?, description = ?, state = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE id = ?
-                ''', (scheme_data['name'], scheme_data['description'], 
-                      scheme_data['state'], scheme_id))
+            with self.connection() as conn:
+                cursor = conn.cursor()
+            
+                # Check if scheme already exists
+                cursor.execute('SELECT id FROM schemes WHERE url = ?', (scheme_data['url'],))
+                existing = cursor.fetchone()
+            
+                if existing:
+                    # Update existing scheme
+                    scheme_id = existing['id']
+                    cursor.execute('''
+                    UPDATE schemes 
+                    SET name = ?, description = ?, state = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                    ''', (scheme_data['name'], scheme_data['description'], 
+                          scheme_data['state'], scheme_id))
                 
-                # Delete existing related data
-                for table in ['categories', 'benefits', 'eligibility_criteria', 
-                            'application_process', 'required_documents', 'faqs']:
-                    cursor.execute(f'DELETE FROM {table} WHERE scheme_id = ?', (scheme_id,))
-            else:
-                # Insert new scheme
-                cursor.execute('''
-                INSERT INTO schemes (name, description, state, url)
-                VALUES (?, ?, ?, ?)
-                ''', (scheme_data['name'], scheme_data['description'], 
-                      scheme_data['state'], scheme_data['url']))
-                scheme_id = cursor.lastrowid
-            
-            # Insert categories
-            for category in scheme_data.get('categories', []):
-                cursor.execute('''
-                INSERT INTO categories (scheme_id, category)
-                VALUES (?, ?)
-                ''', (scheme_id, category))
-            
-            # Insert benefits
-            for benefit in scheme_data.get('benefits', []):
-                cursor.execute('''
-                INSERT INTO benefits (scheme_id, benefit)
-                VALUES (?, ?)
-                ''', (scheme_id, benefit))
-            
-            # Insert eligibility criteria
-            for criterion in scheme_data.get('eligibility_criteria', []):
-                cursor.execute('''
-                INSERT INTO eligibility_criteria (scheme_id, criterion)
-                VALUES (?, ?)
-                ''', (scheme_id, criterion))
-            
-            # Insert application process steps
-            for step in scheme_data.get('application_process', []):
-                cursor.execute('''
-                INSERT INTO application_process (scheme_id, step)
-                VALUES (?, ?)
-                ''', (scheme_id, step))
-            
-            # Insert required documents
-            for doc in scheme_data.get('required_documents', []):
-                cursor.execute('''
-                INSERT INTO required_documents (scheme_id, document)
-                VALUES (?, ?)
-                ''', (scheme_id, doc))
-            
-            # Insert FAQs
-            for faq in scheme_data.get('faqs', []):
-                cursor.execute('''
-                INSERT INTO faqs (scheme_id, question, answer)
-                VALUES (?, ?, ?)
-                ''', (scheme_id, faq['question'], faq['answer']))
-            
-            self.conn.commit()
-            logger.info(f"Scheme saved successfully: {scheme_data['name']}")
+                    # Delete existing related data
+                    for table in ['categories', 'benefits', 'eligibility_criteria', 
+                                'application_process', 'required_documents', 'faqs']:
+                        cursor.execute(f'DELETE FROM {table} WHERE scheme_id = ?', (scheme_id,))
+                else:
+                    # Insert new scheme
+                    cursor.execute('''
+                    INSERT INTO schemes (name, description, state, url)
+                    VALUES (?, ?, ?, ?)
+                    ''', (scheme_data['name'], scheme_data['description'], 
+                          scheme_data['state'], scheme_data['url']))
+                    scheme_id = cursor.lastrowid
+            
+                # Insert categories
+                for category in scheme_data.get('categories', []):
+                    cursor.execute('''
+                    INSERT INTO categories (scheme_id, category)
+                    VALUES (?, ?)
+                    ''', (scheme_id, category))
+            
+                # Insert benefits
+                for benefit in scheme_data.get('benefits', []):
+                    cursor.execute('''
+                    INSERT INTO benefits (scheme_id, benefit)
+                    VALUES (?, ?)
+                    ''', (scheme_id, benefit))
+            
+                # Insert eligibility criteria
+                for criterion in scheme_data.get('eligibility_criteria', []):
+                    cursor.execute('''
+                    INSERT INTO eligibility_criteria (scheme_id, criterion)
+                    VALUES (?, ?)
+                    ''', (scheme_id, criterion))
+            
+                # Insert application process steps
+                for step in scheme_data.get('application_process', []):
+                    cursor.execute('''
+                    INSERT INTO application_process (scheme_id, step)
+                    VALUES (?, ?)
+                    ''', (scheme_id, step))
+            
+                # Insert required documents
+                for doc in scheme_data.get('required_documents', []):
+                    cursor.execute('''
+                    INSERT INTO required_documents (scheme_id, document)
+                    VALUES (?, ?)
+                    ''', (scheme_id, doc))
+            
+                # Insert FAQs
+                for faq in scheme_data.get('faqs', []):
+                    cursor.execute('''
+                    INSERT INTO faqs (scheme_id, question, answer)
+                    VALUES (?, ?, ?)
+                    ''', (scheme_id, faq['question'], faq['answer']))
+            
+                self._bump_data_version(conn)
+                logger.info(f"Scheme saved successfully: {scheme_data['name']}")
+            
+            self.invalidate_counts()
             return scheme_id
             
         except Exception as e:
-            self.conn.rollback()
             logger.error(f"Error saving scheme: {str(e)}")
             return None
 
+    def save_schemes_bulk(self, schemes: Iterable[Dict], batch_size: int = BULK_BATCH_SIZE) -> Dict:
+        """Upsert scraped schemes, ``batch_size`` per transaction.
+
+        Schemes are matched by URL (``ON CONFLICT(url)``), rows that
+        didn't change are left alone and child rows are diffed against
+        what is stored instead of being deleted and re-inserted. The
+        iterable is consumed lazily, so a generator of freshly scraped
+        schemes is written as it is produced. Returns totals for the run.
+        """
+        totals = {'schemes': 0, 'failed': 0, 'batches': 0, 'rows_inserted': 0, 'rows_deleted': 0, 'seconds': 0.0}
+        batch = []
+        for scheme_data in schemes:
+            batch.append(scheme_data)
+            if len(batch) >= batch_size:
+                self._save_bulk_batch(batch, totals)
+                batch = []
+        if batch:
+            self._save_bulk_batch(batch, totals)
+
+        rate = totals['schemes'] / totals['seconds'] if totals['seconds'] else 0.0
+        logger.info(f"Bulk save finished: {totals['schemes']} schemes in {totals['batches']} batches "
+                    f"({rate:.1f} schemes/s), {totals['rows_inserted']} child rows inserted, "
+                    f"{totals['rows_deleted']} deleted, {totals['failed']} failed")
+        return totals
+
+    def _save_bulk_batch(self, batch: List[Dict], totals: Dict):
+        """Write one batch in a single transaction and log its throughput."""
+        # The last copy of a URL within a batch wins
+        by_url = {scheme_data['url']: scheme_data for scheme_data in batch}
+        start = time.perf_counter()
+        try:
+            with self.connection() as conn:
+                changes_before = conn.total_changes
+                conn.executemany('''
+                INSERT INTO schemes (name, description, state, url)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    name = excluded.name,
+                    description = excluded.description,
+                    state = excluded.state,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE name IS NOT excluded.name
+                   OR description IS NOT excluded.description
+                   OR state IS NOT excluded.state
+                ''', [
+                    (scheme_data['name'], scheme_data['description'], scheme_data['state'], url)
+                    for url, scheme_data in by_url.items()
+                ])
+
+                scheme_ids = {}
+                urls = list(by_url)
+                for offset in range(0, len(urls), IN_CHUNK_SIZE):
+                    chunk = urls[offset:offset + IN_CHUNK_SIZE]
+                    marks = ', '.join('?' for _ in chunk)
+                    for row in conn.execute(f'SELECT id, url FROM schemes WHERE url IN ({marks})', chunk):
+                        scheme_ids[row['url']] = row['id']
+
+                inserted, deleted = self._sync_child_rows(
+                    conn, {scheme_ids[url]: scheme_data for url, scheme_data in by_url.items()}
+                )
+                # Leave the version (and every cache keyed on it) alone
+                # when the batch matched what was stored
+                changed = conn.total_changes != changes_before
+                if changed:
+                    self._bump_data_version(conn)
+        except Exception as e:
+            logger.error(f"Error saving batch of {len(by_url)} schemes: {str(e)}")
+            totals['failed'] += len(by_url)
+            return
+
+        if changed:
+            self.invalidate_counts()
+        elapsed = time.perf_counter() - start
+        totals['schemes'] += len(by_url)
+        totals['batches'] += 1
+        totals['rows_inserted'] += inserted
+        totals['rows_deleted'] += deleted
+        totals['seconds'] += elapsed
+        logger.info(f"Saved batch {totals['batches']}: {len(by_url)} schemes in {elapsed:.3f}s "
+                    f"({len(by_url) / elapsed if elapsed else 0.0:.1f} schemes/s, "
+                    f"+{inserted}/-{deleted} child rows)")
+
+    def _sync_child_rows(self, conn: sqlite3.Connection, schemes_by_id: Dict[int, Dict]) -> Tuple[int, int]:
+        """Bring the child tables of these schemes in line with the scraped data.
+
+        Rows are compared in order: the common prefix of stored and
+        scraped rows is kept, the rest of the stored rows are deleted and
+        the rest of the scraped rows appended, so an unchanged scheme
+        costs no writes and row order (e.g. application steps) is kept.
+        Returns (rows inserted, rows deleted).
+        """
+        ids = list(schemes_by_id)
+        inserted = deleted = 0
+        for table, columns in SCHEME_CHILD_TABLES.items():
+            stored = {scheme_id: [] for scheme_id in ids}
+            column_list = ', '.join(columns)
+            for offset in range(0, len(ids), IN_CHUNK_SIZE):
+                chunk = ids[offset:offset + IN_CHUNK_SIZE]
+                marks = ', '.join('?' for _ in chunk)
+                for row in conn.execute(
+                    f'SELECT id, scheme_id, {column_list} FROM {table} WHERE scheme_id IN ({marks}) ORDER BY scheme_id, id',
+                    chunk
+                ):
+                    stored[row['scheme_id']].append((row['id'], tuple(row[column] for column in columns)))
+
+            to_delete = []
+            to_insert = []
+            for scheme_id, scheme_data in schemes_by_id.items():
+                wanted = [
+                    tuple(value[column] for column in columns) if isinstance(value, dict) else (value,)
+                    for value in scheme_data.get(table, [])
+                ]
+                current = stored[scheme_id]
+                keep = 0
+                while keep < len(current) and keep < len(wanted) and current[keep][1] == wanted[keep]:
+                    keep += 1
+                to_delete.extend((row_id,) for row_id, _ in current[keep:])
+                to_insert.extend((scheme_id,) + values for values in wanted[keep:])
+
+            if to_delete:
+                conn.executemany(f'DELETE FROM {table} WHERE id = ?', to_delete)
+            if to_insert:
+                placeholders = ', '.join('?' for _ in range(len(columns) + 1))
+                conn.executemany(
+                    f'INSERT INTO {table} (scheme_id, {column_list}) VALUES ({placeholders})', to_insert
+                )
+            inserted += len(to_insert)
+            deleted += len(to_delete)
+        return inserted, deleted
+
     def get_scheme_by_url(self, url: str) -> Optional[Dict]:
         """Get a scheme and all its related data by URL."""
         try:
-            cursor = self.conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Get scheme details
-            cursor.execute('SELECT * FROM schemes WHERE url = ?', (url,))
-            scheme = cursor.fetchone()
+                # Get scheme details
+                cursor.execute('SELECT * FROM schemes WHERE url = ?', (url,))
+                scheme = cursor.fetchone()
             
-            if not scheme:
-                return None
+                if not scheme:
+                    return None
             
-            # Get all related data
-            scheme_data = dict(scheme)
+                # Get all related data
+                scheme_data = dict(scheme)
             
-            # Get categories
-            cursor.execute('SELECT category FROM categories WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['categories'] = [row['category'] for row in cursor.fetchall()]
+                # Get categories
+                cursor.execute('SELECT category FROM categories WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['categories'] = [row['category'] for row in cursor.fetchall()]
             
-            # Get benefits
-            cursor.execute('SELECT benefit FROM benefits WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['benefits'] = [row['benefit'] for row in cursor.fetchall()]
+                # Get benefits
+                cursor.execute('SELECT benefit FROM benefits WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['benefits'] = [row['benefit'] for row in cursor.fetchall()]
             
-            # Get eligibility criteria
-            cursor.execute('SELECT criterion FROM eligibility_criteria WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['eligibility_criteria'] = [row['criterion'] for row in cursor.fetchall()]
+                # Get eligibility criteria
+                cursor.execute('SELECT criterion FROM eligibility_criteria WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['eligibility_criteria'] = [row['criterion'] for row in cursor.fetchall()]
             
-            # Get application process
-            cursor.execute('SELECT step FROM application_process WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['application_process'] = [row['step'] for row in cursor.fetchall()]
+                # Get application process
+                cursor.execute('SELECT step FROM application_process WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['application_process'] = [row['step'] for row in cursor.fetchall()]
             
-            # Get required documents
-            cursor.execute('SELECT document FROM required_documents WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['required_documents'] = [row['document'] for row in cursor.fetchall()]
+                # Get required documents
+                cursor.execute('SELECT document FROM required_documents WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['required_documents'] = [row['document'] for row in cursor.fetchall()]
             
-            # Get FAQs
-            cursor.execute('SELECT question, answer FROM faqs WHERE scheme_id = ?', (scheme['id'],))
-            scheme_data['faqs'] = [dict(row) for row in cursor.fetchall()]
+                # Get FAQs
+                cursor.execute('SELECT question, answer FROM faqs WHERE scheme_id = ?', (scheme['id'],))
+                scheme_data['faqs'] = [dict(row) for row in cursor.fetchall()]
             
-            return scheme_data
+                return scheme_data
             
         except Exception as e:
             logger.error(f"Error getting scheme: {str(e)}")
@@ -374,47 +1132,40 @@ class Database:
     def get_all_schemes(self) -> List[Dict]:
         """Get all schemes with their basic information."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM schemes ORDER BY created_at DESC')
-            return [dict(row) for row in cursor.fetchall()]
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT * FROM schemes ORDER BY created_at DESC')
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting all schemes: {str(e)}")
             return []
 
     def search_schemes(self, query: str, params: List = None) -> List[Dict]:
-        """Search schemes by name, description, or state.
+        """Search schemes by keyword, or run a custom search query.
         
         Args:
             query: Either a search term or a custom SQL query
             params: Optional list of parameters for the custom query
         """
+        if params is None:
+            # Simple keyword search
+            return self.search_schemes_by_keyword(query)
+        
         try:
-            cursor = self.conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            if params is None:
-                # Simple keyword search
-                search_term = f"%{query}%"
-                cursor.execute('''
-                SELECT DISTINCT s.*, 
-                       GROUP_CONCAT(DISTINCT c.category) as categories
-                FROM schemes s
-                LEFT JOIN categories c ON s.id = c.scheme_id
-                WHERE s.name LIKE ? OR s.description LIKE ? OR s.state LIKE ?
-                GROUP BY s.id
-                ORDER BY s.name
-                ''', (search_term, search_term, search_term))
-            else:
                 # Custom query with parameters
                 cursor.execute(query, params)
             
-            schemes = []
-            for row in cursor.fetchall():
-                scheme = dict(row)
-                if 'categories' in scheme:
-                    scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-                schemes.append(scheme)
+                schemes = []
+                for row in cursor.fetchall():
+                    scheme = dict(row)
+                    if 'categories' in scheme:
+                        scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
+                    schemes.append(scheme)
             
-            return schemes
+                return schemes
         except Exception as e:
             logger.error(f"Error searching schemes: {str(e)}")
             return []
@@ -422,9 +1173,10 @@ class Database:
     def get_schemes_by_state(self, state: str) -> List[Dict]:
         """Get all schemes for a specific state."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute('SELECT * FROM schemes WHERE state = ? ORDER BY created_at DESC', (state,))
-            return [dict(row) for row in cursor.fetchall()]
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('SELECT * FROM schemes WHERE state = ? ORDER BY created_at DESC', (state,))
+                return [dict(row) for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting schemes by state: {str(e)}")
             return []
@@ -432,43 +1184,44 @@ class Database:
     def get_scheme_by_id(self, scheme_id: int) -> Optional[Dict]:
         """Get a scheme and all its related data by ID."""
         try:
-            cursor = self.conn.cursor()
+            with self.connection() as conn:
+                cursor = conn.cursor()
             
-            # Get scheme details
-            cursor.execute('SELECT * FROM schemes WHERE id = ?', (scheme_id,))
-            scheme = cursor.fetchone()
+                # Get scheme details
+                cursor.execute('SELECT * FROM schemes WHERE id = ?', (scheme_id,))
+                scheme = cursor.fetchone()
             
-            if not scheme:
-                return None
+                if not scheme:
+                    return None
             
-            # Get all related data
-            scheme_data = dict(scheme)
+                # Get all related data
+                scheme_data = dict(scheme)
             
-            # Get categories
-            cursor.execute('SELECT category FROM categories WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['categories'] = [row['category'] for row in cursor.fetchall()]
+                # Get categories
+                cursor.execute('SELECT category FROM categories WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['categories'] = [row['category'] for row in cursor.fetchall()]
             
-            # Get benefits
-            cursor.execute('SELECT benefit FROM benefits WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['benefits'] = [row['benefit'] for row in cursor.fetchall()]
+                # Get benefits
+                cursor.execute('SELECT benefit FROM benefits WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['benefits'] = [row['benefit'] for row in cursor.fetchall()]
             
-            # Get eligibility criteria
-            cursor.execute('SELECT criterion FROM eligibility_criteria WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['eligibility_criteria'] = [row['criterion'] for row in cursor.fetchall()]
+                # Get eligibility criteria
+                cursor.execute('SELECT criterion FROM eligibility_criteria WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['eligibility_criteria'] = [row['criterion'] for row in cursor.fetchall()]
             
-            # Get application process
-            cursor.execute('SELECT step FROM application_process WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['application_process'] = [row['step'] for row in cursor.fetchall()]
+                # Get application process
+                cursor.execute('SELECT step FROM application_process WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['application_process'] = [row['step'] for row in cursor.fetchall()]
             
-            # Get required documents
-            cursor.execute('SELECT document FROM required_documents WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['required_documents'] = [row['document'] for row in cursor.fetchall()]
+                # Get required documents
+                cursor.execute('SELECT document FROM required_documents WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['required_documents'] = [row['document'] for row in cursor.fetchall()]
             
-            # Get FAQs
-            cursor.execute('SELECT question, answer FROM faqs WHERE scheme_id = ?', (scheme_id,))
-            scheme_data['faqs'] = [dict(row) for row in cursor.fetchall()]
+                # Get FAQs
+                cursor.execute('SELECT question, answer FROM faqs WHERE scheme_id = ?', (scheme_id,))
+                scheme_data['faqs'] = [dict(row) for row in cursor.fetchall()]
             
-            return scheme_data
+                return scheme_data
             
         except Exception as e:
             logger.error(f"Error getting scheme by ID: {str(e)}")
@@ -477,9 +1230,10 @@ class Database:
     def get_all_categories(self) -> List[str]:
         """Get all unique categories."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT category FROM categories ORDER BY category")
-            return [row['category'] for row in cursor.fetchall()]
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT DISTINCT category FROM categories ORDER BY category")
+                return [row['category'] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting categories: {str(e)}")
             return []
@@ -487,64 +1241,83 @@ class Database:
     def get_all_states(self) -> List[str]:
         """Get all unique states."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT DISTINCT state FROM schemes ORDER BY state")
-            return [row['state'] for row in cursor.fetchall()]
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT DISTINCT state FROM schemes ORDER BY state")
+                return [row['state'] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting states: {str(e)}")
             return []
 
-    def search_schemes_by_keyword(self, keyword: str) -> List[Dict]:
-        """Search schemes by keyword in name, description, or state."""
+    def search_schemes_by_keyword(self, keyword: str, limit: int = 50) -> List[Dict]:
+        """Search schemes by keyword using the full-text index, best match first."""
         try:
-            cursor = self.conn.cursor()
-            search_term = f"%{keyword}%"
-            
-            cursor.execute("""
-            SELECT DISTINCT s.*, 
-                   GROUP_CONCAT(DISTINCT c.category) as categories
-            FROM schemes s
-            LEFT JOIN categories c ON s.id = c.scheme_id
-            WHERE s.name LIKE ? 
-               OR s.description LIKE ? 
-               OR s.state LIKE ?
-            GROUP BY s.id
-            ORDER BY s.name
-            """, (search_term, search_term, search_term))
-            
-            schemes = []
-            for row in cursor.fetchall():
-                scheme = dict(row)
-                scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-                schemes.append(scheme)
-            
-            return schemes
+            fts_query = build_fts_query(keyword)
+            if not fts_query:
+                return []
+            
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                
+                if self.fts_enabled:
+                    cursor.execute(f"""
+                    SELECT s.*, c.name as categories,
+                           {fts_snippet_expression()} as snippet,
+                           {fts_rank_expression()} as rank
+                    FROM schemes_fts
+                    JOIN schemes s ON s.id = schemes_fts.rowid
+                    LEFT JOIN categories c ON s.category_id = c.id
+                    WHERE schemes_fts MATCH ?
+                    ORDER BY rank
+                    LIMIT ?
+                    """, (fts_query, limit))
+                else:
+                    # Schema without the indexed columns, fall back to a scan
+                    search_term = f"%{keyword}%"
+                    cursor.execute("""
+                    /* advisor: full-scan-ok */
+                    SELECT s.*, c.name as categories
+                    FROM schemes s
+                    LEFT JOIN categories c ON s.category_id = c.id
+                    WHERE s.title LIKE ? OR s.description LIKE ?
+                    ORDER BY s.title
+                    LIMIT ?
+                    """, (search_term, search_term, limit))
+            
+                schemes = []
+                for row in cursor.fetchall():
+                    scheme = dict(row)
+                    scheme['categories'] = [scheme['categories']] if scheme['categories'] else []
+                    schemes.append(scheme)
+            
+                return schemes
         except Exception as e:
             logger.error(f"Error searching schemes: {str(e)}")
             return []
 
-    def get_schemes_by_category(self, category: str) -> List[Dict]:
-        """Get all schemes for a specific category."""
+    def get_schemes_by_category_name(self, category: str) -> List[Dict]:
+        """Get all schemes for a specific category name."""
         try:
-            cursor = self.conn.cursor()
-            
-            cursor.execute("""
-            SELECT DISTINCT s.*, 
-                   GROUP_CONCAT(DISTINCT c.category) as categories
-            FROM schemes s
-            JOIN categories c ON s.id = c.scheme_id
-            WHERE c.category = ?
-            GROUP BY s.id
-            ORDER BY s.name
-            """, (category,))
-            
-            schemes = []
-            for row in cursor.fetchall():
-                scheme = dict(row)
-                scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
-                schemes.append(scheme)
-            
-            return schemes
+            with self.connection() as conn:
+                cursor = conn.cursor()
+            
+                cursor.execute("""
+                SELECT DISTINCT s.*, 
+                       GROUP_CONCAT(DISTINCT c.category) as categories
+                FROM schemes s
+                JOIN categories c ON s.id = c.scheme_id
+                WHERE c.category = ?
+                GROUP BY s.id
+                ORDER BY s.name
+                """, (category,))
+            
+                schemes = []
+                for row in cursor.fetchall():
+                    scheme = dict(row)
+                    scheme['categories'] = scheme['categories'].split(',') if scheme['categories'] else []
+                    schemes.append(scheme)
+            
+                return schemes
         except Exception as e:
             logger.error(f"Error getting schemes by category: {str(e)}")
             return []
@@ -552,14 +1325,15 @@ class Database:
     def get_count(self, query: str, params: List) -> int:
         """Get count from a query."""
         try:
-            cursor = self.conn.cursor()
-            cursor.execute(query, params)
-            return cursor.fetchone()['total']
+            with self.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, params)
+                return cursor.fetchone()['total']
         except Exception as e:
             logger.error(f"Error getting count: {str(e)}")
             return 0
 
     def __del__(self):
-        """Close database connection when object is destroyed."""
-        if hasattr(self, 'conn'):
-            self.conn.close() 
\ No newline at end of file
+        """Close database connections when object is destroyed."""
+        if hasattr(self, 'pool'):
+            self.pool.close()
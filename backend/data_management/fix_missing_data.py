@@ -1,12 +1,15 @@
 import logging
+import sqlite3
+import sys
 from database import Database
 import json
 import os
 from datetime import datetime
 from typing import Dict, List, Set
 import requests
-from bs4 import BeautifulSoup
 import time
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from web_scraping_components.html_parsing import make_soup
 
 # Configure logging
 logging.basicConfig(
@@ -26,29 +29,30 @@ class DataFixer:
     def get_schemes_with_missing_data(self) -> Dict[str, List[Dict]]:
         """Get schemes with missing documents or FAQs."""
         try:
-            cursor = self.db.conn.cursor()
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
             
-            # Get schemes with missing documents
-            cursor.execute("""
-            SELECT s.*, GROUP_CONCAT(DISTINCT c.category) as categories
-            FROM schemes s
-            LEFT JOIN categories c ON s.id = c.scheme_id
-            LEFT JOIN required_documents rd ON s.id = rd.scheme_id
-            WHERE rd.id IS NULL
-            GROUP BY s.id
-            """)
-            missing_docs = [dict(row) for row in cursor.fetchall()]
+                # Get schemes with missing documents
+                cursor.execute("""
+                SELECT s.*, GROUP_CONCAT(DISTINCT c.category) as categories
+                FROM schemes s
+                LEFT JOIN categories c ON s.id = c.scheme_id
+                LEFT JOIN required_documents rd ON s.id = rd.scheme_id
+                WHERE rd.id IS NULL
+                GROUP BY s.id
+                """)
+                missing_docs = [dict(row) for row in cursor.fetchall()]
             
-            # Get schemes with missing FAQs
-            cursor.execute("""
-            SELECT s.*, GROUP_CONCAT(DISTINCT c.category) as categories
-            FROM schemes s
-            LEFT JOIN categories c ON s.id = c.scheme_id
-            LEFT JOIN faqs f ON s.id = f.scheme_id
-            WHERE f.id IS NULL
-            GROUP BY s.id
-            """)
-            missing_faqs = [dict(row) for row in cursor.fetchall()]
+                # Get schemes with missing FAQs
+                cursor.execute("""
+                SELECT s.*, GROUP_CONCAT(DISTINCT c.category) as categories
+                FROM schemes s
+                LEFT JOIN categories c ON s.id = c.scheme_id
+                LEFT JOIN faqs f ON s.id = f.scheme_id
+                WHERE f.id IS NULL
+                GROUP BY s.id
+                """)
+                missing_faqs = [dict(row) for row in cursor.fetchall()]
             
             return {
                 'missing_documents': missing_docs,
@@ -62,9 +66,10 @@ class DataFixer:
         """Get URLs that are in the database but not in JSON files."""
         try:
             # Get URLs from database
-            cursor = self.db.conn.cursor()
-            cursor.execute("SELECT url FROM schemes")
-            db_urls = {row['url'] for row in cursor.fetchall()}
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT url FROM schemes")
+                db_urls = {row['url'] for row in cursor.fetchall()}
             print(f"\nTotal URLs in database: {len(db_urls)}")
             
             # Get URLs from JSON files
@@ -118,7 +123,7 @@ class DataFixer:
         try:
             response = self.session.get(url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = make_soup(response.text)
             
             print(f"\nAnalyzing page: {url}")
             
@@ -253,26 +258,26 @@ class DataFixer:
     def update_scheme_data(self, scheme_id: int, data: Dict) -> bool:
         """Update a scheme with missing documents and FAQs."""
         try:
-            cursor = self.db.conn.cursor()
-            
-            # Update documents
-            for doc in data['documents']:
-                cursor.execute('''
-                INSERT INTO required_documents (scheme_id, document)
-                VALUES (?, ?)
-                ''', (scheme_id, doc))
-            
-            # Update FAQs
-            for faq in data['faqs']:
-                cursor.execute('''
-                INSERT INTO faqs (scheme_id, question, answer)
-                VALUES (?, ?, ?)
-                ''', (scheme_id, faq['question'], faq['answer']))
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                
+                # Update documents
+                for doc in data['documents']:
+                    cursor.execute('''
+                    INSERT INTO required_documents (scheme_id, document)
+                    VALUES (?, ?)
+                    ''', (scheme_id, doc))
+                
+                # Update FAQs
+                for faq in data['faqs']:
+                    cursor.execute('''
+                    INSERT INTO faqs (scheme_id, question, answer)
+                    VALUES (?, ?, ?)
+                    ''', (scheme_id, faq['question'], faq['answer']))
             
-            self.db.conn.commit()
+            self.db.bump_data_version()
             return True
         except Exception as e:
-            self.db.conn.rollback()
             logger.error(f"Error updating scheme {scheme_id}: {str(e)}")
             return False
 
@@ -313,24 +318,28 @@ class DataFixer:
             # Create a backup of the database
             backup_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 
                                      f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db")
-            self.db.conn.backup(backup_path)
+            with self.db.connection() as conn:
+                backup_conn = sqlite3.connect(backup_path)
+                conn.backup(backup_conn)
+                backup_conn.close()
             logger.info(f"Created database backup at: {backup_path}")
             
             # Remove extra URLs from database
-            cursor = self.db.conn.cursor()
-            for url in extra_urls:
-                try:
-                    # First remove related data
-                    cursor.execute("DELETE FROM categories WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
-                    cursor.execute("DELETE FROM required_documents WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
-                    cursor.execute("DELETE FROM faqs WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
-                    # Then remove the scheme
-                    cursor.execute("DELETE FROM schemes WHERE url = ?", (url,))
-                except Exception as e:
-                    logger.error(f"Error removing URL {url}: {str(e)}")
-                    continue
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                for url in extra_urls:
+                    try:
+                        # First remove related data
+                        cursor.execute("DELETE FROM categories WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
+                        cursor.execute("DELETE FROM required_documents WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
+                        cursor.execute("DELETE FROM faqs WHERE scheme_id IN (SELECT id FROM schemes WHERE url = ?)", (url,))
+                        # Then remove the scheme
+                        cursor.execute("DELETE FROM schemes WHERE url = ?", (url,))
+                    except Exception as e:
+                        logger.error(f"Error removing URL {url}: {str(e)}")
+                        continue
             
-            self.db.conn.commit()
+            self.db.bump_data_version()
             logger.info(f"Removed {len(extra_urls)} extra URLs from database")
             
             # Verify the fix
@@ -344,7 +353,7 @@ class DataFixer:
             logger.error(f"Error fixing URL synchronization: {str(e)}")
             if os.path.exists(backup_path):
                 logger.info("Restoring from backup...")
-                self.db.conn.close()
+                self.db.close()
                 os.remove(self.db.db_path)
                 os.rename(backup_path, self.db.db_path)
                 self.db = Database()  # Reinitialize database connection
@@ -0,0 +1,290 @@
+import argparse
+import ast
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from database import (
+    Database, fts_rank_expression, fts_snippet_expression, keyset_sql
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Files whose SQL statements are checked
+SOURCE_FILES = [
+    os.path.join(BACKEND_DIR, 'api', 'app.py'),
+    os.path.join(BACKEND_DIR, 'api', 'scheme_loader.py'),
+    os.path.join(BACKEND_DIR, 'data_management', 'database.py'),
+]
+
+# Lookup tables that are small enough to scan
+ALLOWED_SCANS = {'categories', 'tags', 'sqlite_master'}
+
+# Statements carrying this marker are expected to read the whole table
+FULL_SCAN_MARKER = 'advisor: full-scan-ok'
+
+# The scraper's tables, as reset_and_scrape creates them plus the columns
+# save_scheme and save_schemes_bulk write. The scraper and the API
+# (Database) both create schemes and categories, with different columns;
+# the scratch database gives those two the columns of both so every
+# statement can be planned, and Database then adds the API's other tables
+SCRAPER_TABLES = '''
+    CREATE TABLE IF NOT EXISTS schemes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        title TEXT,
+        description TEXT,
+        ministry TEXT,
+        category_id INTEGER,
+        scheme_type TEXT CHECK(scheme_type IN ('state', 'central')),
+        eligibility TEXT,
+        benefits TEXT,
+        documents_required TEXT,
+        application_process TEXT,
+        website TEXT,
+        helpline TEXT,
+        name TEXT,
+        state TEXT,
+        url TEXT UNIQUE NOT NULL,
+        last_updated TEXT,
+        updated_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        description TEXT,
+        icon TEXT,
+        color TEXT,
+        scheme_id INTEGER,
+        category TEXT
+    );
+    CREATE TABLE IF NOT EXISTS benefits (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        benefit TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS eligibility_criteria (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        criterion TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS application_process (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        step TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS required_documents (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        document TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS faqs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        scheme_id INTEGER,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL
+    );
+'''
+
+def placeholder_values() -> Dict[str, str]:
+    """Representative SQL for the f-string fields used in the checked files.
+
+    Keys are the source text of the expression inside the braces. A
+    statement with a field that is not listed here is reported as
+    skipped rather than guessed at.
+    """
+    seek, _, order_by = keyset_sql('newest', ['', 0])
+    return {
+        'fts_rank_expression()': fts_rank_expression(),
+        'fts_snippet_expression()': fts_snippet_expression(),
+        'source': f'(SELECT * FROM schemes s WHERE s.category_id = ? AND {seek} ORDER BY {order_by} LIMIT ?) s',
+        'where': '',
+        'tail': f'ORDER BY {order_by}',
+        'order_by': order_by,
+        "' AND '.join(conditions)": f's.category_id = ? AND {seek}',
+        "', '.join(f's.{column}' for column in sort_columns)": 's.created_at, s.id',
+        "' AND '.join(filters)": f's.category_id = ? AND {seek}',
+        # Child-table statements in database.py, shown for one child table
+        'table': 'benefits',
+        'column_list': 'benefit',
+        'placeholders': '?, ?',
+        # str.format templates (api/scheme_loader.py), also IN lists in database.py
+        'marks': '?, ?, ?',
+    }
+
+def _render(node: ast.AST, source: str, values: Dict[str, str]) -> Optional[str]:
+    """Get the SQL text of a string or f-string node, or None if unknown."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        # Fill in known str.format fields, leave anything else untouched
+        return re.sub(
+            r'\{(\w+)\}',
+            lambda match: values.get(match.group(1), match.group(0)),
+            node.value
+        )
+    if isinstance(node, ast.JoinedStr):
+        parts = []
+        for value in node.values:
+            if isinstance(value, ast.Constant):
+                parts.append(value.value)
+                continue
+            expression = ast.get_source_segment(source, value.value)
+            if expression not in values:
+                return None
+            parts.append(values[expression])
+        return ''.join(parts)
+    return None
+
+def _is_statement(text: str) -> bool:
+    """Whether a string literal looks like a complete DML statement."""
+    words = re.sub(r'^\s*/\*.*?\*/', '', text, flags=re.DOTALL).split(None, 1)
+    return bool(words) and words[0].upper() in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+
+def collect_statements(paths: List[str]) -> List[Tuple[str, Optional[str]]]:
+    """Find the SQL statements in the given files.
+
+    Returns (location, sql) pairs; sql is None for statements built from
+    f-string fields the advisor can't fill in.
+    """
+    values = placeholder_values()
+    statements = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        tree = ast.parse(source, filename=path)
+        # Fragments inside f-strings are visited on their own; skip them
+        nested = {
+            id(part)
+            for node in ast.walk(tree) if isinstance(node, ast.JoinedStr)
+            for part in node.values
+        }
+        for node in ast.walk(tree):
+            if id(node) in nested or not isinstance(node, (ast.Constant, ast.JoinedStr)):
+                continue
+            text = _render(node, source, values)
+            raw = text if text is not None else ast.get_source_segment(source, node) or ''
+            stripped = raw.strip().lstrip('f').strip('"\'').strip()
+            if not _is_statement(stripped):
+                continue
+            location = f"{os.path.relpath(path, BACKEND_DIR)}:{node.lineno}"
+            statements.append((location, text.strip() if text is not None else None))
+    return statements
+
+def explain(conn: sqlite3.Connection, sql: str) -> List[str]:
+    """Get the EXPLAIN QUERY PLAN lines for a statement."""
+    params = [None] * sql.count('?')
+    return [row[3] for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params)]
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Map the aliases in FROM/JOIN clauses to their table names."""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        aliases[table] = table
+        if alias and alias.upper() not in ('ON', 'WHERE', 'LEFT', 'JOIN', 'GROUP', 'ORDER', 'LIMIT', 'INNER'):
+            aliases[alias] = table
+    return aliases
+
+def find_full_scans(sql: str, plan: List[str], allowed: set) -> List[str]:
+    """Get the plan lines that scan a whole table without an index."""
+    aliases = table_aliases(sql)
+    # Subqueries show up as CO-ROUTINE/MATERIALIZE and are scanned by alias
+    derived = {
+        line.split()[1] for line in plan
+        if line.startswith(('CO-ROUTINE', 'MATERIALIZE')) and len(line.split()) > 1
+    }
+    scans = []
+    for line in plan:
+        words = line.split()
+        if len(words) < 2 or words[0] != 'SCAN':
+            continue
+        if 'INDEX' in words or 'VIRTUAL' in words:
+            continue
+        if words[1] in derived or aliases.get(words[1], words[1]) in allowed:
+            continue
+        scans.append(line)
+    return scans
+
+def build_scratch_db(path: str):
+    """Create an empty database with the scraper and API schemas."""
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SCRAPER_TABLES)
+    # Database adds its own tables, migrations and search index
+    Database(path, pool_size=1).close()
+
+def run_advisor(db_path: Optional[str] = None, allowed: Optional[set] = None, verbose: bool = False) -> int:
+    """Plan every statement and report full scans.
+
+    Returns the number of problems: statements with full scans, that
+    fail to plan or that can't be rendered (an unchecked statement
+    could hide a regression).
+    """
+    allowed = ALLOWED_SCANS if allowed is None else allowed
+    scratch_dir = None
+    if db_path is None:
+        scratch_dir = tempfile.mkdtemp(prefix='index_advisor_')
+        db_path = os.path.join(scratch_dir, 'advisor.db')
+        build_scratch_db(db_path)
+
+    try:
+        # Read-only: the advisor never changes the database it checks
+        conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        statements = collect_statements(SOURCE_FILES)
+        full_scans = 0
+        skipped = 0
+        errors = 0
+
+        for location, sql in statements:
+            if sql is None:
+                skipped += 1
+                print(f"SKIP  {location}: dynamic SQL the advisor can't render")
+                continue
+            try:
+                plan = explain(conn, sql)
+            except sqlite3.Error as e:
+                errors += 1
+                print(f"ERROR {location}: {e}")
+                continue
+
+            scans = [] if FULL_SCAN_MARKER in sql else find_full_scans(sql, plan, allowed)
+            if scans:
+                full_scans += 1
+                print(f"SCAN  {location}: {'; '.join(scans)}")
+            elif verbose:
+                print(f"OK    {location}")
+            if verbose or scans:
+                for line in plan:
+                    print(f"        {line}")
+
+        conn.close()
+        print(f"\nChecked {len(statements)} statements: {full_scans} with full scans, "
+              f"{errors} errors, {skipped} skipped")
+        return full_scans + errors + skipped
+    finally:
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run EXPLAIN QUERY PLAN over the SQL in the API and database.py and flag full table scans."
+    )
+    parser.add_argument('--db', help="Database to plan against (default: a fresh scratch database)")
+    parser.add_argument('--allow-scan', action='append', default=[], metavar='TABLE',
+                        help="Extra table that may be scanned (repeatable)")
+    parser.add_argument('--verbose', action='store_true', help="Print the plan of every statement")
+    args = parser.parse_args()
+
+    problems = run_advisor(args.db, ALLOWED_SCANS | set(args.allow_scan), args.verbose)
+    sys.exit(1 if problems else 0)
+
+if __name__ == '__main__':
+    main()
@@ -252,6 +252,13 @@ def migrate_data():
             
             conn.commit()
             logger.info(f"Completed processing {filename}")
+    
+    # Re-sync the full-text index after the bulk load
+    db.rebuild_search_index()
+    
+    # Let running API servers know their cached responses are stale
+    version = db.bump_data_version()
+    logger.info(f"Data version is now {version}")
 
 if __name__ == '__main__':
     logger.info("Starting data migration...")
@@ -0,0 +1,33 @@
+#gunicorn settings for the legal chatbot: pre-warmed forked workers
+#
+#   gunicorn -c gunicorn.conf.py main:app
+#   gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi_main:app
+#
+# The QA pipeline (embedding model, FAISS index, docstore) is loaded once in
+# the master process before forking, so every worker starts warm and shares
+# those pages copy-on-write instead of loading its own copy.
+import gc
+import os
+
+# main.py loads the pipeline up front instead of on a background thread
+# (a thread wouldn't survive the fork)
+os.environ.setdefault("PRELOAD_PIPELINE", "1")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("THREADS", "4"))
+preload_app = True
+timeout = 120
+
+# No collections while loading: they'd only shuffle objects around
+gc.disable()
+
+def when_ready(server):
+    # Move everything loaded so far into the permanent generation, so the
+    # workers' collections never write to (and un-share) those pages
+    gc.freeze()
+
+def post_fork(server, worker):
+    gc.enable()
+    from main import pipeline
+    pipeline.after_fork()
@@ -0,0 +1,174 @@
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import faiss
+import numpy as np
+
+ANSWER_CACHE_PATH = "vectorstore/answer_cache.json"
+
+# Cosine similarity above which two questions count as the same question
+DEFAULT_THRESHOLD = 0.9
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_TTL = 24 * 60 * 60  # seconds
+
+# Persist the warm set after this many new answers (and at exit)
+SAVE_EVERY = 20
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+NUMBER_PATTERN = re.compile(r"\d+[a-z]?", re.IGNORECASE)
+
+def normalize_question(question):
+    """Lower-case, collapse whitespace and drop trailing punctuation."""
+    return WHITESPACE_PATTERN.sub(" ", question).strip().lower().rstrip("?.! ")
+
+def question_numbers(question):
+    """
+    Section/article numbers mentioned in a question (e.g. {'420'}).
+
+    "Section 420" and "Section 302" embed almost identically, so a
+    cached answer is only reused for a question citing the same numbers.
+    """
+    return sorted(set(match.lower() for match in NUMBER_PATTERN.findall(question)))
+
+class SemanticAnswerCache:
+    """
+    Answers to past questions, looked up by question embedding.
+
+    Questions are normalized and embedded, and the nearest past question
+    is found in an in-memory inner-product index over unit vectors. A hit
+    needs a cosine of at least ``threshold``, the same cited numbers and
+    an entry younger than ``ttl`` seconds. Least recently used entries
+    are evicted beyond ``max_entries``; the warm set is saved to ``path``
+    and reloaded on start, unless ``index_digest`` (the chunks_digest()
+    of the vector index the answers come from) has changed since, i.e.
+    ingest.py added, changed or removed chunks. Thread-safe.
+    """
+
+    def __init__(self, embeddings, path=ANSWER_CACHE_PATH, threshold=DEFAULT_THRESHOLD,
+                 max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL, index_digest=None):
+        self.embeddings = embeddings
+        self.path = path
+        self.index_digest = index_digest
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()  # id -> entry, least recently used first
+        self.index = None
+        self._next_id = 0
+        self._unsaved = 0
+        self._lock = threading.Lock()
+        self.counts = {"lookups": 0, "hits": 0, "misses": 0, "expired": 0, "evicted": 0, "stored": 0}
+        if path and os.path.exists(path):
+            self.load()
+        if path:
+            atexit.register(self.save)
+
+    def _embed(self, normalized):
+        vector = np.array([self.embeddings.embed_query(normalized)], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        return vector
+
+    def _add(self, entry, vector):
+        if self.index is None:
+            self.index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+        entry_id = self._next_id
+        self._next_id += 1
+        self.index.add_with_ids(vector, np.array([entry_id], dtype=np.int64))
+        self.entries[entry_id] = entry
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.counts["evicted"] += 1
+
+    def _remove(self, entry_id):
+        self.index.remove_ids(np.array([entry_id], dtype=np.int64))
+        del self.entries[entry_id]
+
+    def lookup(self, question):
+        """The cached {"answer", "sources"} for a question, or None."""
+        normalized = normalize_question(question)
+        vector = self._embed(normalized)
+        numbers = question_numbers(normalized)
+        with self._lock:
+            self.counts["lookups"] += 1
+            if self.index is not None and self.index.ntotal:
+                similarities, ids = self.index.search(vector, min(4, self.index.ntotal))
+                for similarity, entry_id in zip(similarities[0], ids[0]):
+                    if similarity < self.threshold:
+                        break
+                    entry = self.entries.get(int(entry_id))
+                    if entry is None or entry["numbers"] != numbers:
+                        continue
+                    if time.time() - entry["created"] > self.ttl:
+                        self._remove(int(entry_id))
+                        self.counts["expired"] += 1
+                        continue
+                    self.entries.move_to_end(int(entry_id))
+                    entry["hits"] += 1
+                    self.counts["hits"] += 1
+                    return {"answer": entry["answer"], "sources": entry["sources"]}
+            self.counts["misses"] += 1
+        return None
+
+    def store(self, question, answer, sources):
+        """Remember the answer to a question."""
+        normalized = normalize_question(question)
+        vector = self._embed(normalized)
+        entry = {
+            "question": normalized,
+            "numbers": question_numbers(normalized),
+            "answer": answer,
+            "sources": sources,
+            "created": time.time(),
+            "hits": 0,
+            "vector": vector[0].tolist(),
+        }
+        with self._lock:
+            self._add(entry, vector)
+            self.counts["stored"] += 1
+            self._unsaved += 1
+            save = self.path and self._unsaved >= SAVE_EVERY
+        if save:
+            self.save()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.index = None
+
+    def load(self):
+        """Reload the warm set saved by save(), dropping expired answers."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+        # Older files are a bare list, saved without the digest
+        if not isinstance(saved, dict) or saved.get("index_digest") != self.index_digest:
+            print(f"Discarding cached answers in {self.path}: the vector index has changed since they were saved.")
+            return
+        now = time.time()
+        with self._lock:
+            for entry in saved["entries"]:
+                if now - entry["created"] <= self.ttl:
+                    self._add(entry, np.array([entry["vector"]], dtype=np.float32))
+        print(f"Loaded {len(self.entries)} cached answers from {self.path}.")
+
+    def save(self):
+        """Write the warm set (least recently used first) atomically."""
+        with self._lock:
+            entries = list(self.entries.values())
+            self._unsaved = 0
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"index_digest": self.index_digest, "entries": entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counts, size=len(self.entries), max_entries=self.max_entries,
+                         threshold=self.threshold, ttl=self.ttl)
+        stats["hit_rate"] = stats["hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
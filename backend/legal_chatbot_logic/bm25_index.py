@@ -0,0 +1,166 @@
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+
+# Saved inside the FAISS index directory by ingest.py, so it always
+# describes the same chunks as the vectors next to it
+BM25_FILE = "bm25.npz"
+
+# Term frequency saturation and document length normalization
+DEFAULT_K1 = 1.2
+DEFAULT_B = 0.75
+
+# Statute references ("Section 302", "s. 302", "u/s 302", "§ 302",
+# "Art. 21", ...) become a "§302" token and a "section§302" token for
+# their kind, so exact references outrank loose matches and "Section 302"
+# outranks "Article 302"
+REFERENCE_PREFIX = "§"
+REFERENCE_KINDS = {
+    "u/s": "section", "s": "section", "ss": "section", "sec": "section", "secs": "section",
+    "section": "section", "sections": "section", "§": "section",
+    "art": "article", "arts": "article", "article": "article", "articles": "article",
+    "rule": "rule", "rules": "rule", "clause": "clause", "clauses": "clause",
+}
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+REFERENCE_NUMBER = r"\d+(?:-?[a-z]{1,2}\b)?"
+REFERENCE_PATTERN = re.compile(
+    r"(?:\b(u/s|sections?|secs?|ss?|articles?|arts?|rules?|clauses?)\b\.?|(§)§*)\s*"
+    rf"({REFERENCE_NUMBER}(?:\s*(?:,|&|/|and|or|to)\s*{REFERENCE_NUMBER})*)",
+    re.IGNORECASE,
+)
+# Bare acts head each section or article as "302. Punishment for murder.—"
+HEADING_PATTERN = re.compile(r"^([ \t]*)(?=\d{1,4}[A-Z]{0,2}\.\s*[A-Z][^\n—]{0,150}(?:\n[^\n—]{0,150})?—)", re.MULTILINE)
+
+# Abbreviated act names, expanded to the words of their titles (which
+# every chunk of the act is indexed with, see document_text())
+ACT_ALIASES = {
+    "ipc": ["indian", "penal", "code"],
+    "crpc": ["code", "criminal", "procedure"],
+    "cpc": ["code", "civil", "procedure"],
+}
+
+STOPWORDS = set("""
+a an the of and or to in on for by with from at as is are was were be been it its this that these those
+which who whom whose what when where how shall may any such other said under into than then there
+his her their he she they him them i you we our your do does not no if
+""".split())
+
+def reference_tokens(text):
+    """The "§<number>" and "<kind>§<number>" tokens of the statute references in a text."""
+    tokens = []
+    for match in REFERENCE_PATTERN.finditer(text):
+        kind = REFERENCE_KINDS[(match.group(1) or match.group(2)).lower()]
+        for number in re.findall(REFERENCE_NUMBER, match.group(3).lower()):
+            number = number.replace("-", "")
+            tokens.extend([REFERENCE_PREFIX + number, kind + REFERENCE_PREFIX + number])
+    return tokens
+
+def tokenize(text):
+    """Lower-cased words without stopwords (act abbreviations expanded), plus the statute reference tokens."""
+    words = []
+    for word in WORD_PATTERN.findall(text.lower()):
+        if word not in STOPWORDS:
+            words.extend(ACT_ALIASES.get(word, [word]))
+    return words + reference_tokens(text)
+
+def document_text(document):
+    """
+    A chunk's text as indexed: prefixed by the title of the PDF it comes
+    from, and with its "302. Punishment for murder.—" headings spelled
+    out as "Section 302. ..." ("Article 302. ..." in the Constitution),
+    so "Section 302 of the IPC" finds the Penal Code's section rather
+    than the Constitution's Article 302.
+    """
+    title = os.path.splitext(os.path.basename(document.metadata.get("source", "")))[0]
+    kind = "Article" if "constitution" in title.lower() else "Section"
+    return f"{title}\n{HEADING_PATTERN.sub(lambda match: f'{match.group(1)}{kind} ', document.page_content)}"
+
+class BM25Index:
+    """
+    Okapi BM25 over the ingested chunks, keyed by the same int64 chunk ids
+    as the FAISS index.
+
+    Postings are kept as flat numpy arrays (a CSR matrix of term
+    frequencies by term), so searching is a few vectorized adds per query
+    term and the whole index is saved as one .npz file.
+    """
+
+    def __init__(self, ids, doc_lengths, vocabulary, indptr, postings, term_frequencies,
+                 k1=DEFAULT_K1, b=DEFAULT_B):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.doc_lengths = np.asarray(doc_lengths, dtype=np.float32)
+        self.vocabulary = list(vocabulary)
+        self.terms = {term: row for row, term in enumerate(self.vocabulary)}
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.postings = np.asarray(postings, dtype=np.int32)
+        self.term_frequencies = np.asarray(term_frequencies, dtype=np.float32)
+        self.k1 = k1
+        self.b = b
+        average_length = float(self.doc_lengths.mean()) if len(self.doc_lengths) else 1.0
+        self.length_norms = k1 * (1 - b + b * self.doc_lengths / max(average_length, 1e-9))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def build(cls, ids, texts, k1=DEFAULT_K1, b=DEFAULT_B):
+        """Index texts (one per chunk id)."""
+        terms = {}
+        term_rows, doc_rows, frequencies, doc_lengths = [], [], [], []
+        for doc_row, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            for term, frequency in Counter(tokens).items():
+                term_rows.append(terms.setdefault(term, len(terms)))
+                doc_rows.append(doc_row)
+                frequencies.append(frequency)
+
+        term_rows = np.array(term_rows, dtype=np.int64)
+        order = np.argsort(term_rows, kind="stable")
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_rows, minlength=len(terms)), out=indptr[1:])
+        return cls(ids, doc_lengths, list(terms), indptr, np.array(doc_rows, dtype=np.int32)[order],
+                   np.array(frequencies, dtype=np.float32)[order], k1, b)
+
+    def search(self, query, k):
+        """The (chunk id, score) of the k best matching chunks, best first."""
+        if k <= 0 or not len(self.ids):
+            return []
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            row = self.terms.get(term)
+            if row is None:
+                continue
+            start, end = self.indptr[row], self.indptr[row + 1]
+            docs = self.postings[start:end]
+            frequencies = self.term_frequencies[start:end]
+            idf = math.log(1 + (len(self.ids) - (end - start) + 0.5) / ((end - start) + 0.5))
+            scores[docs] += idf * frequencies * (self.k1 + 1) / (frequencies + self.length_norms[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[row]), float(scores[row])) for row in candidates]
+
+    def save(self, path):
+        np.savez(path, ids=self.ids, doc_lengths=self.doc_lengths, vocabulary=np.array(self.vocabulary, dtype=str),
+                 indptr=self.indptr, postings=self.postings, term_frequencies=self.term_frequencies,
+                 params=np.array([self.k1, self.b]))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as saved:
+            k1, b = saved["params"]
+            return cls(saved["ids"], saved["doc_lengths"], saved["vocabulary"].tolist(), saved["indptr"],
+                       saved["postings"], saved["term_frequencies"], float(k1), float(b))
+
+def load_bm25_index(index_path):
+    """The BM25 index saved next to a FAISS index, or None if there is none."""
+    path = os.path.join(index_path, BM25_FILE)
+    if not os.path.exists(path):
+        return None
+    return BM25Index.load(path)
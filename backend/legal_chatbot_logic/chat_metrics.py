@@ -0,0 +1,42 @@
+import threading
+from collections import deque
+
+# Latencies kept per metric for percentiles
+DEFAULT_WINDOW = 1000
+
+class LatencyStats:
+    """
+    Rolling latency percentiles and event counters for the chat endpoints.
+
+    ``record(ttfb=0.4, total=6.2)`` adds one sample per named latency
+    (seconds); ``count("cancelled")`` bumps a counter. Thread-safe.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def record(self, **latencies):
+        with self._lock:
+            for name, seconds in latencies.items():
+                self.samples.setdefault(name, deque(maxlen=self.window)).append(seconds)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary(self):
+        """Counters plus count/p50/p95/max (ms) of each latency over the window."""
+        with self._lock:
+            samples = {name: sorted(values) for name, values in self.samples.items()}
+            summary = dict(self.counters)
+        for name, values in samples.items():
+            summary[name] = {
+                "count": len(values),
+                "p50_ms": round(values[len(values) // 2] * 1000, 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            }
+        return summary
@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+EMBEDDING_CACHE_DIR = "vectorstore/embedding_cache"
+
+# float16 halves the cache on disk; vectors are handed back as float32 either way
+DEFAULT_CACHE_DTYPE = "float32"
+CACHE_DTYPES = ["float32", "float16"]
+
+# Rows the vector file grows by when it is full
+GROW_ROWS = 4096
+
+KEY_BYTES = 32  # a sha256 digest per cached text
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def text_key(text):
+    """SHA-256 of a text with whitespace runs collapsed."""
+    normalized = WHITESPACE_PATTERN.sub(" ", text).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).digest()
+
+def model_dir_name(model_name):
+    """A directory name for a model, e.g. sentence-transformers--all-mpnet-base-v2."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "--", model_name)
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive lock on a lock file, across processes (flock, or msvcrt on Windows)."""
+    with open(path, "a") as f:
+        if fcntl:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+            return
+        # msvcrt locks the byte at the file position, and gives up after 10s
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                break
+            except OSError:
+                continue
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class EmbeddingCache:
+    """
+    Disk-backed vectors for one embedding model, keyed by normalized text hash.
+
+    Vectors live in a memory-mapped array (vectors.bin) and their keys in
+    an append-only file (keys.bin) whose n-th digest belongs to the n-th
+    row. A vector is written before its key, so a crash never leaves a
+    key pointing at a missing vector. Several processes can share a
+    cache: appends take a file lock and new keys are picked up on a miss.
+    """
+
+    def __init__(self, model_name, cache_dir=EMBEDDING_CACHE_DIR, dtype=DEFAULT_CACHE_DTYPE):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, model_dir_name(model_name))
+        self.meta_path = os.path.join(self.path, "meta.json")
+        self.keys_path = os.path.join(self.path, "keys.bin")
+        self.vectors_path = os.path.join(self.path, "vectors.bin")
+        self.lock_path = os.path.join(self.path, ".lock")
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dimension = None
+        self.dtype = np.dtype(dtype)
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            # An existing cache keeps the dtype it was created with
+            self.dimension, self.dtype = meta["dimension"], np.dtype(meta["dtype"])
+
+        self.rows = {}
+        self._keys_read = 0
+        self._vectors = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        with self._lock:
+            self._refresh()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _refresh(self):
+        """Pick up keys appended since the last read (by this or another process)."""
+        if not os.path.exists(self.keys_path):
+            return
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_read * KEY_BYTES)
+            data = f.read()
+        count = len(data) // KEY_BYTES
+        for i in range(count):
+            self.rows[data[i * KEY_BYTES:(i + 1) * KEY_BYTES]] = self._keys_read + i
+        self._keys_read += count
+
+    def _map_vectors(self, min_rows=0):
+        """Memory-map the vector file, growing it to hold at least min_rows rows."""
+        row_bytes = self.dimension * self.dtype.itemsize
+        size = os.path.getsize(self.vectors_path) if os.path.exists(self.vectors_path) else 0
+        if min_rows * row_bytes > size:
+            rows = max(min_rows, size // row_bytes + GROW_ROWS)
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(rows * row_bytes)
+            size = rows * row_bytes
+        if self._vectors is None or self._vectors.shape[0] * row_bytes != size:
+            self._vectors = np.memmap(self.vectors_path, dtype=self.dtype, mode="r+",
+                                      shape=(size // row_bytes, self.dimension))
+        return self._vectors
+
+    def get(self, keys):
+        """Cached vectors for the keys (float32 arrays), None where there is none."""
+        with self._lock:
+            if any(key not in self.rows for key in keys):
+                self._refresh()
+            found = [self.rows.get(key) for key in keys]
+            vectors = self._map_vectors(max((row for row in found if row is not None), default=-1) + 1) \
+                if self.dimension and any(row is not None for row in found) else None
+            results = [np.array(vectors[row], dtype=np.float32) if row is not None else None for row in found]
+        hits = sum(result is not None for result in results)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return results
+
+    def put(self, keys, vectors):
+        """Store vectors under the keys (keys already cached are skipped)."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with self._lock, file_lock(self.lock_path):
+            self._refresh()
+            if self.dimension is None:
+                self.dimension = vectors.shape[1]
+                with open(self.meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"model_name": self.model_name, "dimension": self.dimension,
+                               "dtype": self.dtype.name}, f)
+            new = {}
+            for key, vector in zip(keys, vectors):
+                if key not in self.rows and key not in new:
+                    new[key] = vector
+            if not new:
+                return
+            start = self._keys_read
+            array = self._map_vectors(start + len(new))
+            array[start:start + len(new)] = np.array(list(new.values()), dtype=self.dtype)
+            array.flush()
+            with open(self.keys_path, "ab") as f:
+                f.write(b"".join(new))
+                f.flush()
+                os.fsync(f.fileno())
+            self._refresh()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "entries": len(self.rows),
+            "dtype": self.dtype.name,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def print_stats(self, label="Embedding cache"):
+        stats = self.stats()
+        print(f"{label}: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.1%} hit rate), "
+              f"{stats['entries']} vectors cached ({stats['dtype']}) for {stats['model']}")
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that look every text up in an EmbeddingCache first.
+
+    Only texts missing from the cache reach the wrapped model, in one
+    batch per call. Queries and documents share the cache, which suits
+    models such as all-mpnet-base-v2 that embed both the same way.
+    """
+
+    def __init__(self, embeddings, model_name, cache_dir=EMBEDDING_CACHE_DIR, dtype=DEFAULT_CACHE_DTYPE):
+        self.embeddings = embeddings
+        self.cache = EmbeddingCache(model_name, cache_dir, dtype)
+
+    def embed_documents(self, texts):
+        keys = [text_key(text) for text in texts]
+        vectors = self.cache.get(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.cache.put([keys[i] for i in missing], computed)
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+        return [list(map(float, vector)) for vector in vectors]
+
+    def embed_query(self, text):
+        key = text_key(text)
+        vector = self.cache.get([key])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put([key], [vector])
+        return list(map(float, vector))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show what the embedding cache holds")
+    parser.add_argument("--cache-dir", default=EMBEDDING_CACHE_DIR)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.cache_dir):
+        print(f"No embedding cache at {args.cache_dir}.")
+    for name in sorted(os.listdir(args.cache_dir)) if os.path.exists(args.cache_dir) else []:
+        meta_path = os.path.join(args.cache_dir, name, "meta.json")
+        if not os.path.exists(meta_path):
+            continue
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        cache = EmbeddingCache(meta["model_name"], args.cache_dir)
+        size = sum(os.path.getsize(os.path.join(cache.path, f)) for f in os.listdir(cache.path))
+        print(f"{meta['model_name']}: {len(cache)} vectors, {meta['dimension']} dims, {meta['dtype']}, {size / 1e6:.1f} MB")
@@ -0,0 +1,75 @@
+import time
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Texts per forward pass of the model; see benchmarks/bench_embedding.py
+DEFAULT_BATCH_SIZE = 32
+
+# float16 halves the weights (mainly useful on GPUs); int8 dynamically
+# quantizes the Linear layers, which is usually the fastest on CPU
+PRECISIONS = ["float32", "float16", "int8"]
+DEFAULT_PRECISION = "float32"
+
+def embedding_cache_name(model_name, precision=DEFAULT_PRECISION):
+    """The name vectors are cached and indexed under: quantized models get their own."""
+    return model_name if precision == DEFAULT_PRECISION else f"{model_name}@{precision}"
+
+def split_cache_name(name):
+    """The (model name, precision) an embedding_cache_name() stands for."""
+    model_name, _, precision = name.partition("@")
+    return model_name, precision or DEFAULT_PRECISION
+
+class BatchedEmbeddings(Embeddings):
+    """
+    Sentence-transformer embeddings with explicit batch size, threads and precision.
+
+    Stands in for HuggingFaceEmbeddings where those need controlling:
+    ``threads`` pins torch's intra-op thread pool (default: torch's own
+    choice), and ``precision`` loads the model as float32, float16 or
+    with int8 dynamically quantized Linear layers. Vectors are always
+    returned as float32. Throughput is counted in ``stats``.
+    """
+
+    def __init__(self, model_name, batch_size=DEFAULT_BATCH_SIZE, threads=None,
+                 precision=DEFAULT_PRECISION, device="cpu"):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(model_name, device=device)
+        if precision == "float16":
+            model = model.half()
+        elif precision == "int8":
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        model.eval()
+
+        self.model = model
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = torch.get_num_threads()
+        self.precision = precision
+        self.stats = {"texts": 0, "seconds": 0.0}
+
+    def _encode(self, texts):
+        started = time.perf_counter()
+        vectors = self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True, show_progress_bar=False)
+        self.stats["seconds"] += time.perf_counter() - started
+        self.stats["texts"] += len(texts)
+        return np.asarray(vectors, dtype=np.float32)
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+        return self._encode(list(texts)).tolist()
+
+    def embed_query(self, text):
+        return self._encode([text])[0].tolist()
+
+    def print_stats(self):
+        seconds = self.stats["seconds"] or 1e-9
+        print(f"Embedded {self.stats['texts']} texts in {self.stats['seconds']:.1f}s "
+              f"({self.stats['texts'] / seconds:.1f} chunks/sec, batch size {self.batch_size}, "
+              f"{self.threads} threads, {self.precision})")
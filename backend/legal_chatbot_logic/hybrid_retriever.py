@@ -0,0 +1,76 @@
+from typing import Any, List
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from legal_chatbot_logic.bm25_index import reference_tokens
+
+# Chunks handed to the LLM, and candidates taken from each leg before fusing
+DEFAULT_K = 2
+DEFAULT_DENSE_K = 10
+DEFAULT_SPARSE_K = 10
+
+# Reciprocal rank fusion constant: larger values flatten the rank bonus
+DEFAULT_RRF_K = 60
+
+# Weight of the BM25 leg for questions citing a section or article: its
+# exact "§302" match should beat whatever the embedding ranks first
+DEFAULT_REFERENCE_WEIGHT = 2.0
+
+def reciprocal_rank_fusion(rankings, rrf_k=DEFAULT_RRF_K, weights=None):
+    """
+    Fuse ranked id lists: each id scores sum(weight / (rrf_k + rank)) over
+    the lists it appears in (rank from 1). Returns ids, best first.
+    """
+    scores = {}
+    for ranking, weight in zip(rankings, weights or [1.0] * len(rankings)):
+        for rank, chunk_id in enumerate(ranking, start=1):
+            scores[chunk_id] = scores.get(chunk_id, 0.0) + weight / (rrf_k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+class HybridRetriever(BaseRetriever):
+    """
+    FAISS (dense) and BM25 (sparse) retrieval fused by reciprocal rank.
+
+    The vector store's nearest ``dense_k`` chunks and BM25's best
+    ``sparse_k`` chunks are fused and the top ``k`` returned, so a
+    question citing "Section 302" finds the section itself even when its
+    embedding lands elsewhere; for such questions the BM25 leg counts
+    ``reference_weight`` times. Both legs use the same chunk ids, so it
+    works with the exact store and the memory-mapped serving index alike.
+    ``sparse_k=0`` gives plain dense retrieval, ``dense_k=0`` plain BM25.
+    """
+
+    vectorstore: Any
+    bm25: Any
+    k: int = DEFAULT_K
+    dense_k: int = DEFAULT_DENSE_K
+    sparse_k: int = DEFAULT_SPARSE_K
+    rrf_k: int = DEFAULT_RRF_K
+    reference_weight: float = DEFAULT_REFERENCE_WEIGHT
+
+    def dense_ids(self, query):
+        """Chunk ids of the dense leg, nearest first."""
+        if self.dense_k <= 0:
+            return []
+        vector = np.array([self.vectorstore.embeddings.embed_query(query)], dtype=np.float32)
+        if getattr(self.vectorstore, "_normalize_L2", False):
+            faiss.normalize_L2(vector)
+        _, ids = self.vectorstore.index.search(vector, self.dense_k)
+        return [int(chunk_id) for chunk_id in ids[0] if chunk_id != -1]
+
+    def sparse_ids(self, query):
+        """Chunk ids of the BM25 leg, best first."""
+        return [chunk_id for chunk_id, _ in self.bm25.search(query, self.sparse_k)]
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        documents = []
+        sparse_weight = self.reference_weight if reference_tokens(query) else 1.0
+        fused = reciprocal_rank_fusion([self.dense_ids(query), self.sparse_ids(query)], self.rrf_k, [1.0, sparse_weight])
+        for chunk_id in fused:
+            document = self.vectorstore.docstore.search(self.vectorstore.index_to_docstore_id[chunk_id])
+            if isinstance(document, Document):
+                documents.append(document)
+            if len(documents) == self.k:
+                break
+        return documents
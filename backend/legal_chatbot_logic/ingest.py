@@ -1,19 +1,185 @@
+import argparse
+import hashlib
+import json
 import os
-from langchain_community.document_loaders import DirectoryLoader, PyPDFLoader
+import shutil
+import sys
+import time
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.vectorstores import FAISS
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from legal_chatbot_logic.embedding_cache import CachedEmbeddings
+from legal_chatbot_logic.embedding_model import (
+    DEFAULT_BATCH_SIZE, DEFAULT_PRECISION, PRECISIONS, BatchedEmbeddings, embedding_cache_name
+)
+from legal_chatbot_logic.pdf_extraction import DEFAULT_WINDOW, PageExtractor
+from legal_chatbot_logic.bm25_index import BM25_FILE, BM25Index, document_text
+from legal_chatbot_logic.vector_index import (
+    INDEX_TYPES, SERVING_INDEX_PATH, export_serving_index, recover_directory, serving_index_is_current,
+    swap_directory
+)
+
 DATA_DIR = "legal_data"
 VECTORSTORE_DIR = "vectorstore"
+FAISS_INDEX_PATH = os.path.join(VECTORSTORE_DIR, "faiss_index")
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 200
 DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 
-def embed_all():
+# New chunks are embedded this many at a time, as their pages stream in
+EMBED_BATCH_SIZE = 256
+
+# Saved inside the index directory, so the index and the manifest
+# describing it are always replaced together
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+def file_sha256(path):
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def chunk_ids(file_name, chunks):
+    """
+    Stable int64 vector ids and content hashes for a file's chunks.
+
+    An id depends on the file, the page, the chunk text and how many
+    identical chunks came before it on that page, so editing one part
+    of a PDF leaves the ids of the other chunks unchanged.
+    """
+    ids, hashes, seen = [], [], {}
+    for chunk in chunks:
+        text_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()
+        key = (chunk.metadata.get("page"), text_hash)
+        seen[key] = seen.get(key, 0) + 1
+        id_source = f"{file_name}\0{key[0]}\0{seen[key]}\0{text_hash}".encode("utf-8")
+        # Positive int64, as faiss ids are signed
+        ids.append(int.from_bytes(hashlib.sha256(id_source).digest()[:8], "big") >> 1)
+        hashes.append(text_hash)
+    return ids, hashes
+
+def empty_manifest(embedding_model=DEFAULT_EMBEDDING_MODEL):
+    return {
+        "version": MANIFEST_VERSION,
+        "embedding_model": embedding_model,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "files": {},
+    }
+
+def load_manifest(index_path=FAISS_INDEX_PATH, embedding_model=DEFAULT_EMBEDDING_MODEL):
+    """The manifest of the saved index, or None if it is missing or was built with other settings."""
+    path = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    expected = empty_manifest(embedding_model)
+    if any(manifest.get(key) != expected[key] for key in ("version", "embedding_model", "chunk_size", "chunk_overlap")):
+        print("The saved index was built with a different model or chunking settings; rebuilding it.")
+        return None
+    return manifest
+
+def serving_index_type(path=SERVING_INDEX_PATH):
+    """Type of the saved serving index, if there is one."""
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)["index_type"]
+
+def load_vectorstore(embeddings, index_path=FAISS_INDEX_PATH):
+    """The saved vector store, or None if there is none or it is not ID-mapped (built before manifests)."""
+    if not os.path.exists(os.path.join(index_path, "index.faiss")):
+        return None
+    db = FAISS.load_local(index_path, embeddings, allow_dangerous_deserialization=True)
+    if not isinstance(db.index, faiss.IndexIDMap):
+        print("The saved index has no vector ids; rebuilding it.")
+        return None
+    return db
+
+def new_vectorstore(embeddings):
+    """An empty store over an ID-mapped flat index, so vectors can be removed by id."""
+    dimension = len(embeddings.embed_query("dimension probe"))
+    index = faiss.IndexIDMap(faiss.IndexFlatL2(dimension))
+    return FAISS(embeddings, index, InMemoryDocstore(), {})
+
+def remove_chunks(db, ids):
+    """Remove vectors and their documents from the store."""
+    if not ids:
+        return
+    db.index.remove_ids(np.array(ids, dtype=np.int64))
+    db.docstore.delete([str(chunk_id) for chunk_id in ids])
+    for chunk_id in ids:
+        del db.index_to_docstore_id[chunk_id]
+
+def add_chunks(db, chunks, ids, embeddings):
+    """Embed chunks and add them to the store under the given ids."""
+    if not chunks:
+        return
+    vectors = np.array(embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
+    db.index.add_with_ids(vectors, np.array(ids, dtype=np.int64))
+    db.docstore.add({str(chunk_id): chunk for chunk_id, chunk in zip(ids, chunks)})
+    for chunk_id in ids:
+        db.index_to_docstore_id[chunk_id] = str(chunk_id)
+
+def build_bm25_index(db):
+    """A BM25 index over every chunk in the store, keyed by chunk id."""
+    started = time.perf_counter()
+    ids = list(db.index_to_docstore_id)
+    texts = [document_text(db.docstore.search(db.index_to_docstore_id[chunk_id])) for chunk_id in ids]
+    bm25 = BM25Index.build(ids, texts)
+    print(f"BM25 index: {len(bm25)} chunks, {len(bm25.vocabulary)} terms, built in {time.perf_counter() - started:.1f}s.")
+    return bm25
+
+def save_vectorstore(db, manifest, index_path=FAISS_INDEX_PATH):
+    """
+    Save the store, its BM25 index and its manifest without ever leaving a
+    half-written index.
+
+    Everything is written to a temporary directory first, which then
+    takes the place of the old index; recover_directory() undoes a crash
+    between the two renames.
+    """
+    tmp_path = f"{index_path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    db.save_local(tmp_path)
+    build_bm25_index(db).save(os.path.join(tmp_path, BM25_FILE))
+    manifest_path = os.path.join(tmp_path, MANIFEST_FILE)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+
+    swap_directory(tmp_path, index_path)
+
+def embed_all(rebuild=False, workers=None, window=DEFAULT_WINDOW,
+              batch_size=DEFAULT_BATCH_SIZE, threads=None, precision=DEFAULT_PRECISION, index_type=None):
     """
     Loads PDF documents, splits them into chunks, generates embeddings,
-    creates a FAISS vector store, and saves it to disk.
+    and saves them to a FAISS vector store on disk.
+
+    Only new or changed PDFs are loaded, and only chunks that are not
+    already in the store are embedded; vectors of deleted PDFs and
+    changed chunks are removed. rebuild=True re-embeds everything.
+
+    Pages are extracted by ``workers`` processes (default: one per core)
+    with at most ``window`` pages in memory at a time. Chunks are embedded
+    ``batch_size`` at a time on ``threads`` torch threads, by a model
+    loaded at ``precision`` (float32, float16 or int8); changing the
+    precision rebuilds the index. ``index_type`` (e.g. ivf_sq8) also
+    writes a compressed, memory-mappable serving index for qa_logic; an
+    existing serving index is rebuilt whenever the store changes.
+    A BM25 index of all chunks is saved next to the vectors for
+    qa_logic's hybrid retrieval.
     """
     # Create vectorstore directory if it doesn't exist
     if not os.path.exists(VECTORSTORE_DIR):
@@ -43,74 +209,179 @@ def embed_all():
 
     pdf_files = []
     if os.path.exists(DATA_DIR):
-        pdf_files = [f for f in os.listdir(DATA_DIR) if f.lower().endswith(".pdf")]
-    
+        pdf_files = sorted(f for f in os.listdir(DATA_DIR) if f.lower().endswith(".pdf"))
+
     if not pdf_files:
         print(f"No PDF documents found in {DATA_DIR}. Please add some PDF files to this directory. Exiting.")
         return
 
+    # Generate embeddings
+    print(f"Generating embeddings (Model: {DEFAULT_EMBEDDING_MODEL}, {precision}). This may take a while...\nMake sure you have 'pip install sentence-transformers' and internet access for model download.")
     try:
-        loader = DirectoryLoader(
-            DATA_DIR,
-            glob="*.pdf",
-            loader_cls=PyPDFLoader,
-            show_progress=True,
-            use_multithreading=True,
-            silent_errors=True
-        )
-        documents = loader.load()
-        if not documents:
-            print(f"No PDF documents were successfully loaded from {DATA_DIR}. Please check file integrity and permissions. Exiting.")
-            return
-        print(f"Loaded {len(documents)} document(s)/pages (PyPDFLoader loads each page as a document).")
+        # Chunks embedded by an earlier run (or a --rebuild) come from the cache
+        model_name = embedding_cache_name(DEFAULT_EMBEDDING_MODEL, precision)
+        model = BatchedEmbeddings(DEFAULT_EMBEDDING_MODEL, batch_size, threads, precision)
+        embeddings = CachedEmbeddings(model, model_name)
     except Exception as e:
-        print(f"Error loading documents: {e}")
+        print(f"Error initializing the embedding model: {e}")
+        print("Please ensure you have the 'sentence-transformers' library installed and internet connectivity.")
         return
 
-    # Split documents into chunks
-    print("Splitting documents into chunks...")
-    try:
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=CHUNK_SIZE,
-            chunk_overlap=CHUNK_OVERLAP
-        )
-        texts = text_splitter.split_documents(documents)
-        if not texts:
-            print("No text chunks were generated. This might happen if documents are empty or unparseable. Exiting.")
+    # Load the existing FAISS vector store, if it can be updated in place
+    recover_directory(FAISS_INDEX_PATH)
+    db, manifest = None, None
+    if not rebuild:
+        try:
+            manifest = load_manifest(embedding_model=model_name)
+            db = load_vectorstore(embeddings) if manifest else None
+        except Exception as e:
+            print(f"Error loading the existing FAISS index, rebuilding it: {e}")
+    if db is None:
+        print("Creating FAISS vector store...")
+        try:
+            db = new_vectorstore(embeddings)
+        except Exception as e:
+            print(f"Error creating FAISS vector store: {e}")
             return
-        print(f"Split into {len(texts)} chunks.")
-    except Exception as e:
-        print(f"Error splitting documents: {e}")
-        return
+        manifest = empty_manifest(model_name)
+    else:
+        print(f"Loaded FAISS index with {db.index.ntotal} vectors from {len(manifest['files'])} file(s).")
 
-    # Generate embeddings
-    print(f"Generating embeddings (Model: {DEFAULT_EMBEDDING_MODEL}). This may take a while...\nMake sure you have 'pip install sentence-transformers langchain-huggingface' and internet access for model download.")
-    try:
-        embeddings = HuggingFaceEmbeddings(model_name=DEFAULT_EMBEDDING_MODEL)
-    except Exception as e:
-        print(f"Error initializing HuggingFaceEmbeddings: {e}")
-        print("Please ensure you have the 'sentence-transformers' and 'langchain-huggingface' libraries installed and internet connectivity.")
-        return
+    text_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP
+    )
+
+    # Remove the vectors of deleted PDFs
+    changed_files = 0
+    for file_name in sorted(set(manifest["files"]) - set(pdf_files)):
+        entry = manifest["files"].pop(file_name)
+        remove_chunks(db, [int(chunk_id) for chunk_id in entry["chunks"]])
+        changed_files += 1
+        print(f"Removed {len(entry['chunks'])} chunks of deleted file {file_name}.")
+
+    # Find new and changed PDFs
+    unchanged_files, added, removed, kept = 0, 0, 0, 0
+    to_extract = {}
+    for file_name in pdf_files:
+        path = os.path.join(DATA_DIR, file_name)
+        sha256 = file_sha256(path)
+        entry = manifest["files"].get(file_name)
+        if entry and entry["sha256"] == sha256:
+            unchanged_files += 1
+        else:
+            print(f"Found {'changed' if entry else 'new'} file {file_name}.")
+            to_extract[path] = (file_name, sha256, entry)
+
+    # Stream their pages through the splitter into batched embedding,
+    # embedding only the chunks the store doesn't have
+    extractor = PageExtractor(workers, window)
+    progress = {}
+    pending = []
+
+    def flush():
+        if pending:
+            add_chunks(db, [chunk for _, _, chunk in pending], [chunk_id for _, chunk_id, _ in pending], embeddings)
+            for path, chunk_id, _ in pending:
+                progress[path]["embedded"].append(chunk_id)
+            pending.clear()
 
-    # Create FAISS vector store
-    print("Creating FAISS vector store...")
+    if to_extract:
+        print(f"Extracting and splitting {len(to_extract)} file(s) with {extractor.workers} worker(s)...")
+    for path, documents, done, error in extractor.iter_pages(list(to_extract)):
+        file_name, sha256, entry = to_extract[path]
+        state = progress.setdefault(path, {"ids": [], "hashes": [], "embedded": []})
+        old_ids = set(int(chunk_id) for chunk_id in entry["chunks"]) if entry else set()
+        try:
+            if error:
+                # Undo what was added for it, keeping whatever was indexed for it before
+                pending[:] = [item for item in pending if item[0] != path]
+                remove_chunks(db, state["embedded"])
+                print(f"Error loading {file_name}, skipping it: {error}")
+                continue
+
+            chunks = text_splitter.split_documents(documents)
+            ids, hashes = chunk_ids(file_name, chunks)
+            state["ids"].extend(ids)
+            state["hashes"].extend(hashes)
+            pending.extend((path, chunk_id, chunk) for chunk_id, chunk in zip(ids, chunks) if chunk_id not in old_ids)
+            if len(pending) >= EMBED_BATCH_SIZE:
+                flush()
+            if not done:
+                continue
+
+            stale_ids = old_ids - set(state["ids"])
+            remove_chunks(db, list(stale_ids))
+        except Exception as e:
+            print(f"Error embedding {file_name}: {e}")
+            return
+        new_chunks = len(state["embedded"]) + sum(item[0] == path for item in pending)
+        manifest["files"][file_name] = {
+            "sha256": sha256,
+            "size": os.path.getsize(path),
+            "chunks": {str(chunk_id): text_hash for chunk_id, text_hash in zip(state["ids"], state["hashes"])},
+        }
+        changed_files += 1
+        added += new_chunks
+        removed += len(stale_ids)
+        kept += len(state["ids"]) - new_chunks
+        print(f"{file_name}: {len(state['ids'])} chunks, {new_chunks} embedded, {len(stale_ids)} removed.")
     try:
-        db = FAISS.from_documents(texts, embeddings)
+        flush()
     except Exception as e:
-        print(f"Error creating FAISS vector store: {e}")
+        print(f"Error embedding: {e}")
         return
+    extractor.print_stats()
 
-    # Save FAISS index
-    faiss_index_path = os.path.join(VECTORSTORE_DIR, "faiss_index")
-    print(f"Saving FAISS index to {faiss_index_path}...")
-    try:
-        db.save_local(faiss_index_path)
-        print("FAISS index saved successfully.")
-    except Exception as e:
-        print(f"Error saving FAISS index: {e}")
+    print(f"{unchanged_files} file(s) unchanged; embedded {added} new chunks, kept {kept}, removed {removed}.")
+    model.print_stats()
+    embeddings.cache.print_stats()
+    if not db.index.ntotal:
+        print("No text chunks were generated. This might happen if documents are empty or unparseable. Exiting.")
         return
+    if not changed_files and os.path.exists(os.path.join(FAISS_INDEX_PATH, BM25_FILE)):
+        print("FAISS index is up to date.")
+    else:
+        # Save FAISS index
+        print(f"Saving FAISS index ({db.index.ntotal} vectors) to {FAISS_INDEX_PATH}...")
+        try:
+            save_vectorstore(db, manifest)
+            print("FAISS index saved successfully.")
+        except Exception as e:
+            print(f"Error saving FAISS index: {e}")
+            return
+
+    # Build the compressed serving index qa_logic loads if asked for one,
+    # and rebuild an existing one (same type) whenever faiss_index changed
+    recover_directory(SERVING_INDEX_PATH)
+    current_type = serving_index_type()
+    index_type = index_type or current_type
+    if index_type and (changed_files or current_type != index_type or not serving_index_is_current()):
+        print(f"Building {index_type} serving index...")
+        try:
+            export_serving_index(db.index, db.docstore, db.index_to_docstore_id, index_type,
+                                 embedding_model=model_name)
+        except Exception as e:
+            print(f"Error building the serving index: {e}")
+            # Don't leave qa_logic an index that no longer matches faiss_index
+            if os.path.exists(SERVING_INDEX_PATH):
+                shutil.rmtree(SERVING_INDEX_PATH)
+                print(f"Removed the out-of-date {SERVING_INDEX_PATH}.")
+            return
 
     print("Data ingestion and embedding complete.")
 
 if __name__ == "__main__":
-    embed_all() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Embed the PDFs in legal_data into the FAISS vector store")
+    parser.add_argument("--rebuild", action="store_true", help="Re-embed every file instead of only new or changed ones")
+    parser.add_argument("--workers", type=int, default=None, help="PDF extraction processes (default: one per core)")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW, help="Pages extracted ahead of the splitter at most")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Chunks per forward pass of the model")
+    parser.add_argument("--threads", type=int, default=None, help="torch threads (default: torch's choice)")
+    parser.add_argument("--precision", choices=PRECISIONS, default=DEFAULT_PRECISION,
+                        help="Model precision; int8 quantizes the Linear layers dynamically")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=None,
+                        help=f"Also build a compressed serving index of this type in {SERVING_INDEX_PATH}")
+    args = parser.parse_args()
+    embed_all(rebuild=args.rebuild, workers=args.workers, window=args.window, batch_size=args.batch_size,
+              threads=args.threads, precision=args.precision, index_type=args.index_type)
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from legal_chatbot_logic.chat_metrics import LatencyStats
+
+# LLM calls in flight at once; the rest wait in the queue
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Calls allowed to wait for a slot before new ones are turned away
+DEFAULT_MAX_QUEUE = 32
+
+class PoolFull(Exception):
+    """Raised when an LLM call is shed because the wait queue is full."""
+
+class LLMPool:
+    """
+    Bounds the LLM calls of an asyncio server.
+
+    At most ``max_concurrency`` calls run at once and at most ``max_queue``
+    wait for a slot; beyond that ``slot()`` raises PoolFull straight away,
+    so a traffic spike is answered with a quick 429 instead of piling up
+    on the upstream API. Waiting respects the caller's deadline (wrap it
+    in ``asyncio.wait_for``). Use from a single event loop.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, max_queue=DEFAULT_MAX_QUEUE):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.waiting = 0
+        self.latencies = LatencyStats()
+        self.counts = {"admitted": 0, "shed": 0, "abandoned": 0, "peak_in_flight": 0, "peak_waiting": 0}
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def acquire(self, timeout=None):
+        """
+        Wait (at most ``timeout`` seconds) for a slot; raises PoolFull if too
+        many calls are already waiting. Raising TimeoutError or
+        CancelledError means no slot was taken, even if one freed up just
+        as the wait ended.
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.counts["shed"] += 1
+            raise PoolFull(f"{self.waiting} LLM calls already waiting")
+        started = time.perf_counter()
+        self.waiting += 1
+        self.counts["peak_waiting"] = max(self.counts["peak_waiting"], self.waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            # Deadline passed or the client went away while queued
+            self.counts["abandoned"] += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        self.counts["admitted"] += 1
+        self.counts["peak_in_flight"] = max(self.counts["peak_in_flight"], self.in_flight)
+        self.latencies.record(queue_wait=time.perf_counter() - started)
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        stats = dict(self.counts, in_flight=self.in_flight, waiting=self.waiting,
+                     max_concurrency=self.max_concurrency, max_queue=self.max_queue)
+        stats.update(self.latencies.summary())
+        return stats
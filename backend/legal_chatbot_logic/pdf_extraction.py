@@ -0,0 +1,108 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from langchain_core.documents import Document
+from pypdf import PdfReader
+
+# Pages extracted per task: enough to amortize opening the PDF in the
+# worker, few enough to spread one large book over every core
+PAGES_PER_TASK = 16
+
+# Pages in flight (submitted but not yet consumed) at any time; this is
+# what bounds memory, however large the PDFs are
+DEFAULT_WINDOW = 256
+
+def page_count(path):
+    return len(PdfReader(path).pages)
+
+def extract_page_range(path, start, stop):
+    """Text of pages [start, stop) of a PDF, plus the CPU seconds it took."""
+    started = time.process_time()
+    reader = PdfReader(path)
+    texts = [reader.pages[number].extract_text() for number in range(start, stop)]
+    return texts, time.process_time() - started
+
+class PageExtractor:
+    """
+    Extracts PDF pages in a process pool and streams them back in order.
+
+    PDF text extraction is CPU-bound and holds the GIL, so pages are
+    extracted in worker processes, PAGES_PER_TASK at a time, with at most
+    ``window`` pages in flight. Pages come back as Documents shaped like
+    PyPDFLoader's (one per page, ``source`` and 0-based ``page`` metadata)
+    and per-file pages/sec is recorded in ``stats``.
+    """
+
+    def __init__(self, workers=None, window=DEFAULT_WINDOW, pages_per_task=PAGES_PER_TASK):
+        self.workers = workers or os.cpu_count() or 1
+        self.pages_per_task = pages_per_task
+        self.max_tasks = max(1, window // pages_per_task)
+        self.stats = {}
+
+    def iter_pages(self, paths, max_pages=None):
+        """
+        Yield ``(path, documents, done, error)`` for each page range of each PDF
+        (only its first ``max_pages`` pages, if given).
+
+        ``done`` is set on a file's last range. A file that fails to open
+        or extract yields once with ``error`` set (and done=True), and
+        nothing more for that file.
+        """
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            counts = {}
+            for path, future in [(path, pool.submit(page_count, path)) for path in paths]:
+                try:
+                    counts[path] = min(future.result(), max_pages or float("inf"))
+                except Exception as e:
+                    yield path, [], True, e
+            tasks = [(path, start, min(start + self.pages_per_task, counts[path]))
+                     for path in paths if path in counts
+                     for start in range(0, counts[path], self.pages_per_task)]
+            empty = [path for path in paths if counts.get(path) == 0]
+            for path in empty:
+                yield path, [], True, None
+
+            in_flight = deque()
+            failed = set()
+            next_task = 0
+            while next_task < len(tasks) or in_flight:
+                while next_task < len(tasks) and len(in_flight) < self.max_tasks:
+                    path, start, stop = tasks[next_task]
+                    if path not in self.stats:
+                        self.stats[path] = {"pages": 0, "cpu_seconds": 0.0, "started": time.perf_counter(), "seconds": 0.0}
+                    in_flight.append((path, start, stop, pool.submit(extract_page_range, path, start, stop)))
+                    next_task += 1
+
+                path, start, stop, future = in_flight.popleft()
+                if path in failed:
+                    future.cancel()
+                    continue
+                done = stop == counts[path]
+                try:
+                    texts, cpu_seconds = future.result()
+                except Exception as e:
+                    failed.add(path)
+                    yield path, [], True, e
+                    continue
+                stats = self.stats[path]
+                stats["pages"] += len(texts)
+                stats["cpu_seconds"] += cpu_seconds
+                stats["seconds"] = time.perf_counter() - stats["started"]
+                documents = [
+                    Document(page_content=text, metadata={"source": path, "page": number, "total_pages": counts[path]})
+                    for number, text in zip(range(start, stop), texts)
+                ]
+                yield path, documents, done, None
+
+    def print_stats(self):
+        total_pages = sum(stats["pages"] for stats in self.stats.values())
+        for path, stats in self.stats.items():
+            seconds = stats["seconds"] or 1e-9
+            print(f"  {os.path.basename(path)}: {stats['pages']} pages in {seconds:.1f}s "
+                  f"({stats['pages'] / seconds:.1f} pages/sec, {stats['cpu_seconds']:.1f}s CPU)")
+        if self.stats:
+            seconds = max(stats["started"] + stats["seconds"] for stats in self.stats.values()) - \
+                min(stats["started"] for stats in self.stats.values())
+            print(f"Extracted {total_pages} pages with {self.workers} worker(s) "
+                  f"({total_pages / (seconds or 1e-9):.1f} pages/sec overall).")
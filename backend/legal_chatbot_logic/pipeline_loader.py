@@ -0,0 +1,127 @@
+import os
+import sys
+import threading
+import time
+import traceback
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from legal_chatbot_logic.qa_logic import load_gemini_llm, qa_pipeline
+from legal_chatbot_logic.answer_cache import SemanticAnswerCache
+from legal_chatbot_logic.vector_index import load_index_manifest, manifest_chunks_digest
+
+# Load stages in order (the first four are timed by qa_pipeline)
+LOAD_STAGES = ["embeddings", "vectorstore", "llm", "chain", "answer_cache", "warmup"]
+
+# Retrieved once after loading, so the first real question doesn't pay
+# for lazy initialization and cold index pages
+WARMUP_QUESTION = "What is the punishment for cheating under Section 420?"
+
+class PipelineLoader:
+    """
+    Loads the QA pipeline (and the answer cache) for the chat servers.
+
+    ``start()`` loads on a background thread so the server can bind and
+    answer health checks at once; ``load()`` does the same in the calling
+    thread. ``status()`` reports the state ("loading", "ready" or
+    "failed"), the stage in progress and the time each finished stage
+    took. Until ``ready``, ``unavailable()`` gives the error to answer
+    chat requests with.
+    """
+
+    def __init__(self, llm=None, answer_cache=True):
+        self.llm = llm
+        self.use_answer_cache = answer_cache
+        self.chain = None
+        self.answer_cache = None
+        self.state = "idle"
+        self.error = None
+        self.timings = {}
+        self.started = None
+        self.finished = None
+        self._thread = None
+        self._done = threading.Event()
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def start(self):
+        """Begin loading on a daemon thread (once)."""
+        if self._thread is None and self.state == "idle":
+            self._thread = threading.Thread(target=self.load, name="qa-pipeline-loader", daemon=True)
+            self._thread.start()
+        return self
+
+    def load(self):
+        """Load every stage in this thread; returns True when ready."""
+        self.state = "loading"
+        self.started = time.perf_counter()
+        try:
+            chain = qa_pipeline(llm=self.llm, timings=self.timings)
+            if not chain:
+                raise RuntimeError("QA pipeline failed to initialize (see the log above)")
+
+            started = time.perf_counter()
+            if self.use_answer_cache:
+                # Saved answers are only reused while the index holds the same chunks
+                manifest = load_index_manifest()
+                self.answer_cache = SemanticAnswerCache(
+                    chain.retriever.vectorstore.embeddings,
+                    index_digest=manifest_chunks_digest(manifest) if manifest else None
+                )
+            self.timings["answer_cache"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            chain.retriever.invoke(WARMUP_QUESTION)
+            self.timings["warmup"] = time.perf_counter() - started
+
+            self.chain = chain
+            self.state = "ready"
+        except Exception as e:
+            print(f"Error loading QA pipeline: {e}")
+            print(traceback.format_exc())
+            self.error = str(e)
+            self.state = "failed"
+        finally:
+            self.finished = time.perf_counter()
+            self._done.set()
+        print(f"QA pipeline {self.state} after {self.finished - self.started:.1f}s "
+              f"({', '.join(f'{stage} {seconds:.1f}s' for stage, seconds in self.timings.items())}).")
+        return self.ready
+
+    def wait(self, timeout=None):
+        """Block until loading finished; returns True when ready."""
+        self._done.wait(timeout)
+        return self.ready
+
+    def after_fork(self):
+        """
+        Re-create the Gemini client in a forked worker: its gRPC channel
+        can't be shared with the parent. Everything else (model weights,
+        index, docstore) stays shared copy-on-write.
+        """
+        if self.ready and self.llm is None:
+            llm = load_gemini_llm()
+            if llm:
+                self.chain.combine_documents_chain.llm_chain.llm = llm
+
+    def unavailable(self):
+        """(error message, HTTP status) while chats can't be answered, else None."""
+        if self.ready:
+            return None
+        if self.state == "failed":
+            return "Chatbot not initialized properly", 500
+        return "Chatbot is still loading, please retry shortly", 503
+
+    def status(self):
+        stage = next((stage for stage in LOAD_STAGES if stage not in self.timings), None)
+        status = {
+            "status": self.state,
+            "stage": stage if self.state == "loading" else None,
+            "timings_ms": {name: round(seconds * 1000, 1) for name, seconds in self.timings.items()},
+        }
+        if self.started is not None:
+            status["elapsed_ms"] = round(((self.finished or time.perf_counter()) - self.started) * 1000, 1)
+        if self.error:
+            status["error"] = self.error
+        return status
@@ -1,7 +1,8 @@
 import os
+import sys
+import time
 import traceback
 from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings # Embeddings can remain HuggingFace
 #from langchain_community.embeddings import HuggingFaceEmbeddings
 #from langchain_huggingface import HuggingFaceEndpoint # Removing HuggingFaceEndpoint
 # from langchain_google_genai import ChatGoogleGenerativeAI # Import for Gemini
@@ -11,6 +12,15 @@ import google.generativeai as genai # Import for listing models
 
 from langchain.chains import RetrievalQA
 from langchain.prompts import PromptTemplate
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from legal_chatbot_logic.embedding_cache import CachedEmbeddings
+from legal_chatbot_logic.embedding_model import BatchedEmbeddings, split_cache_name
+from legal_chatbot_logic.vector_index import (
+    SERVING_INDEX_PATH, indexed_embedding_model, load_serving_vectorstore, serving_index_is_current
+)
+from legal_chatbot_logic.bm25_index import load_bm25_index
+from legal_chatbot_logic.hybrid_retriever import HybridRetriever
 # from langchain_huggingface import HuggingFaceEndpoint # Using deprecated HuggingFaceHub instead
 # from langchain_openai import ChatOpenAI # Commented out OpenAI
 # from huggingface_hub import InferenceClient # No longer needed for this version
@@ -25,6 +35,16 @@ DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-mpnet-base-v2"
 # DEFAULT_LLM_TASK = "text-generation" # No longer needed for HuggingFace
 DEFAULT_GEMINI_MODEL = "gemini-1.5-flash-latest" # Using Gemini 1.5 Flash latest
 
+# Chunks passed to the LLM; with a BM25 index, the candidates taken from
+# FAISS and from BM25, the reciprocal rank fusion constant and the BM25
+# weight for questions citing a section/article
+# (tune them with benchmarks/eval_retrieval.py)
+RETRIEVER_K = 2
+DENSE_K = 10
+SPARSE_K = 10
+RRF_K = 60
+REFERENCE_WEIGHT = 2.0
+
 # --- Function to List Models ---
 def list_available_models():
     """Lists available Gemini models."""
@@ -62,11 +82,18 @@ def load_custom_prompt():
     )
     return prompt
 
-def retrieval_qa_chain(llm, prompt, db):
+def retrieval_qa_chain(llm, prompt, db, bm25=None):
     """
     Creates and returns a RetrievalQA chain.
+
+    With a BM25 index (built by ingest.py) retrieval is hybrid: FAISS and
+    BM25 results fused by reciprocal rank, see HybridRetriever.
     """
-    retriever = db.as_retriever(search_kwargs={"k": 2})
+    if bm25 is not None:
+        retriever = HybridRetriever(vectorstore=db, bm25=bm25, k=RETRIEVER_K, dense_k=DENSE_K,
+                                    sparse_k=SPARSE_K, rrf_k=RRF_K, reference_weight=REFERENCE_WEIGHT)
+    else:
+        retriever = db.as_retriever(search_kwargs={"k": RETRIEVER_K})
     chain = RetrievalQA.from_chain_type(
         llm=llm,
         chain_type="stuff",
@@ -76,36 +103,10 @@ def retrieval_qa_chain(llm, prompt, db):
     )
     return chain
 
-# Removed direct_hf_client_test as we are focusing on LangChain integration with downgraded libraries
-
-def qa_pipeline():
+def load_gemini_llm():
     """
-    Initializes and returns the full QA pipeline.
+    Creates the ChatGoogleGenerativeAI LLM, or returns None if it can't.
     """
-    print("Initializing QA pipeline with Google Gemini...")
-
-    # Load Embeddings
-    try:
-        print(f"Loading HuggingFace embeddings (Model: {DEFAULT_EMBEDDING_MODEL})...")
-        embeddings = HuggingFaceEmbeddings(model_name=DEFAULT_EMBEDDING_MODEL)
-    except Exception as e:
-        print(f"Error loading HuggingFaceEmbeddings: {e}")
-        return None
-
-    # Load FAISS Vector Store
-    if not os.path.exists(VECTORSTORE_PATH):
-        print(f"Vector store not found at {VECTORSTORE_PATH}. Please run ingest.py first.")
-        return None
-    try:
-        print(f"Loading FAISS vector store from {VECTORSTORE_PATH}...")
-        db = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
-        print("FAISS vector store loaded successfully.")
-    except Exception as e:
-        print(f"Error loading FAISS vector store: {e}")
-        return None
-
-    # Load LLM using ChatGoogleGenerativeAI
-    llm = None 
     try:
         print(f"Loading LLM from Google (Model: {DEFAULT_GEMINI_MODEL})...")
         if not os.getenv("GOOGLE_API_KEY"):
@@ -120,23 +121,127 @@ def qa_pipeline():
             convert_system_message_to_human=True # Often helpful for RAG prompts
         )
         print(f"ChatGoogleGenerativeAI instance created for model {DEFAULT_GEMINI_MODEL}.")
+        return llm
 
     except Exception as e:
         print(f"Error during ChatGoogleGenerativeAI loading (Type: {type(e)}):")
         print(traceback.format_exc())
         return None
-    
+
+def stuff_prompt(chain, question, documents):
+    """
+    The RetrievalQA chain's LLM and its "stuff" prompt for the question,
+    filled in the same way the chain does.
+    """
+    llm_chain = chain.combine_documents_chain.llm_chain
+    context = "\n\n".join(doc.page_content for doc in documents)
+    return llm_chain.llm, llm_chain.prompt.format(context=context, question=question)
+
+def chunk_text(chunk):
+    """Text of a streamed LLM chunk (chat models yield messages, LLMs strings)."""
+    return getattr(chunk, "content", chunk)
+
+def stream_qa(chain, question):
+    """
+    Answer a question like the RetrievalQA chain does, but as a stream.
+
+    Yields ("sources", documents) as soon as retrieval is done, then
+    ("token", text) for each piece of the answer as the LLM produces it.
+    Closing the generator stops the LLM stream.
+    """
+    documents = chain.retriever.invoke(question)
+    yield "sources", documents
+
+    llm, prompt = stuff_prompt(chain, question, documents)
+    tokens = llm.stream(prompt)
+    try:
+        for chunk in tokens:
+            text = chunk_text(chunk)
+            if text:
+                yield "token", text
+    finally:
+        tokens.close()
+
+# Removed direct_hf_client_test as we are focusing on LangChain integration with downgraded libraries
+
+def qa_pipeline(llm=None, timings=None):
+    """
+    Initializes and returns the full QA pipeline.
+
+    Pass ``llm`` (e.g. a langchain FakeListLLM) to use it instead of
+    Gemini, which also makes GOOGLE_API_KEY unnecessary. Seconds spent on
+    each stage ("embeddings", "vectorstore", "llm", "chain") are added to
+    ``timings`` as they finish.
+    """
+    print("Initializing QA pipeline with Google Gemini...")
+    timings = {} if timings is None else timings
+
+    # Load Embeddings
+    started = time.perf_counter()
+    try:
+        # Questions are embedded by the model, at the precision, the index
+        # was built with (ingest.py --precision)
+        cache_name = indexed_embedding_model(VECTORSTORE_PATH) or DEFAULT_EMBEDDING_MODEL
+        model_name, precision = split_cache_name(cache_name)
+        print(f"Loading HuggingFace embeddings (Model: {model_name}, {precision})...")
+        # Repeated questions are embedded once; the cache is shared with ingest.py
+        embeddings = CachedEmbeddings(BatchedEmbeddings(model_name, precision=precision), cache_name)
+    except Exception as e:
+        print(f"Error loading the embedding model: {e}")
+        return None
+    timings["embeddings"] = time.perf_counter() - started
+
+    # Load FAISS Vector Store: the memory-mapped serving index if one was
+    # built (ingest.py --index-type) from the current faiss_index, shared
+    # by every server process
+    started = time.perf_counter()
+    if not os.path.exists(VECTORSTORE_PATH) and not os.path.exists(SERVING_INDEX_PATH):
+        print(f"Vector store not found at {VECTORSTORE_PATH}. Please run ingest.py first.")
+        return None
+    try:
+        use_serving_index = os.path.exists(SERVING_INDEX_PATH)
+        if use_serving_index and not serving_index_is_current(SERVING_INDEX_PATH, VECTORSTORE_PATH):
+            print(f"{SERVING_INDEX_PATH} is out of date with {VECTORSTORE_PATH} (re-run ingest.py to rebuild it); "
+                  f"not using it.")
+            use_serving_index = False
+        if use_serving_index:
+            print(f"Loading FAISS serving index from {SERVING_INDEX_PATH}...")
+            db = load_serving_vectorstore(embeddings, SERVING_INDEX_PATH)
+        else:
+            print(f"Loading FAISS vector store from {VECTORSTORE_PATH}...")
+            db = FAISS.load_local(VECTORSTORE_PATH, embeddings, allow_dangerous_deserialization=True)
+        print("FAISS vector store loaded successfully.")
+        bm25 = load_bm25_index(VECTORSTORE_PATH)
+        if bm25 is None:
+            print("No BM25 index found (re-run ingest.py to build one); using dense retrieval only.")
+        else:
+            print(f"BM25 index loaded ({len(bm25)} chunks, {len(bm25.vocabulary)} terms); using hybrid retrieval.")
+    except Exception as e:
+        print(f"Error loading FAISS vector store: {e}")
+        return None
+    timings["vectorstore"] = time.perf_counter() - started
+
+    # Load LLM using ChatGoogleGenerativeAI, unless one was given
+    started = time.perf_counter()
+    if llm is None:
+        llm = load_gemini_llm()
+    else:
+        print(f"Using the given LLM ({type(llm).__name__}) instead of Gemini.")
+
     if not llm:
         print("LLM object is None after ChatGoogleGenerativeAI loading attempt. Cannot proceed.")
         return None
+    timings["llm"] = time.perf_counter() - started
 
     # Load Prompt
+    started = time.perf_counter()
     print("Loading custom prompt...")
     prompt = load_custom_prompt()
 
     # Create RetrievalQA Chain
     print("Creating RetrievalQA chain...")
-    qa_chain = retrieval_qa_chain(llm, prompt, db)
+    qa_chain = retrieval_qa_chain(llm, prompt, db, bm25)
+    timings["chain"] = time.perf_counter() - started
     print("QA pipeline initialized successfully with Gemini.")
     return qa_chain
 
@@ -165,6 +270,7 @@ if __name__ == "__main__":
                 break
             
             if user_question.lower() == 'exit':
+                chain.retriever.vectorstore.embeddings.cache.print_stats()
                 print("Exiting QA system.")
                 break
             if not user_question.strip():
@@ -0,0 +1,306 @@
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import pickle
+import shutil
+import sys
+import time
+import faiss
+import numpy as np
+from langchain_core.documents import Document
+
+VECTORSTORE_DIR = "vectorstore"
+FAISS_INDEX_PATH = os.path.join(VECTORSTORE_DIR, "faiss_index")
+
+# Compressed, memory-mapped copy of faiss_index that qa_logic serves from
+# when it exists (faiss_index itself stays the exact, editable master)
+SERVING_INDEX_PATH = os.path.join(VECTORSTORE_DIR, "serving_index")
+
+# flat is exact; the rest trade a little recall for memory and speed.
+# The _sq8 variants store vectors as 8-bit scalars (4x smaller than float32)
+INDEX_TYPES = ["flat", "ivf_flat", "ivf_pq", "ivf_sq8", "hnsw", "hnsw_sq8"]
+DEFAULT_INDEX_TYPE = "ivf_sq8"
+
+# Search-time knobs: IVF lists probed per query, HNSW candidate list size
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+HNSW_M = 32
+
+# k-means wants this many training points per IVF list
+MIN_POINTS_PER_LIST = 39
+
+def default_nlist(count):
+    """About 4·sqrt(n) IVF lists, but never more than the vectors can train."""
+    return max(1, min(int(4 * math.sqrt(count)), count // MIN_POINTS_PER_LIST))
+
+def default_pq_m(dimension):
+    """PQ sub-quantizers: 16 dimensions each where the dimension allows."""
+    for m in (dimension // 16, dimension // 8, dimension // 4, 1):
+        if m and dimension % m == 0:
+            return m
+
+def index_factory_string(index_type, count, dimension, nlist=None, pq_m=None):
+    nlist = nlist or default_nlist(count)
+    # A PQ codebook has 2^bits centroids to train; shrink it for small corpora
+    pq_bits = max(1, min(8, int(math.log2(max(count // MIN_POINTS_PER_LIST, 2)))))
+    return {
+        "flat": "IDMap,Flat",
+        "ivf_flat": f"IVF{nlist},Flat",
+        "ivf_pq": f"IVF{nlist},PQ{pq_m or default_pq_m(dimension)}x{pq_bits}",
+        "ivf_sq8": f"IVF{nlist},SQ8",
+        # HNSW graphs can't take ids themselves
+        "hnsw": f"IDMap,HNSW{HNSW_M}",
+        "hnsw_sq8": f"IDMap,HNSW{HNSW_M}_SQ8",
+    }[index_type]
+
+def set_search_params(index, nprobe=DEFAULT_NPROBE, ef_search=DEFAULT_EF_SEARCH):
+    """Apply nprobe / efSearch to an IVF or HNSW index (also inside an IDMap)."""
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexIVF):
+        inner.nprobe = min(nprobe, inner.nlist)
+    elif isinstance(inner, faiss.IndexHNSW):
+        inner.hnsw.efSearch = ef_search
+    return index
+
+def build_index(vectors, ids, index_type=DEFAULT_INDEX_TYPE, nlist=None, pq_m=None):
+    """An index of the given type, trained on the vectors and holding them under their ids."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    spec = index_factory_string(index_type, len(vectors), vectors.shape[1], nlist, pq_m)
+    index = faiss.index_factory(vectors.shape[1], spec, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(vectors)
+    index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+    return set_search_params(index)
+
+def stored_vectors(index):
+    """(ids, vectors) held by ingest.py's IDMap-over-Flat index."""
+    ids = faiss.vector_to_array(index.id_map).astype(np.int64)
+    vectors = index.index.reconstruct_n(0, index.ntotal)
+    return ids, vectors
+
+def recall_at_k(exact_index, index, queries, k):
+    """Share of the exact top-k neighbours the index finds, and its search time per query."""
+    _, expected = exact_index.search(queries, k)
+    started = time.perf_counter()
+    _, found = index.search(queries, k)
+    seconds = time.perf_counter() - started
+    hits = sum(len(set(row_found) & set(row_expected) - {-1}) for row_found, row_expected in zip(found, expected))
+    return hits / (k * len(queries)), seconds / len(queries)
+
+def chunks_digest(ids):
+    """A fingerprint of a set of chunk ids (ingest.py's ids hash each chunk's file and text)."""
+    return hashlib.sha256(np.sort(np.asarray(list(ids), dtype=np.int64)).tobytes()).hexdigest()
+
+def manifest_chunks_digest(manifest):
+    """chunks_digest() of the chunks ingest.py's manifest says the exact index holds."""
+    return chunks_digest(int(chunk_id) for entry in manifest["files"].values() for chunk_id in entry["chunks"])
+
+def load_index_manifest(index_path=FAISS_INDEX_PATH):
+    """ingest.py's manifest of the exact index, or None if there is none."""
+    manifest_path = os.path.join(index_path, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def indexed_embedding_model(index_path=FAISS_INDEX_PATH):
+    """The embedding_cache_name() (model and precision) the exact index was built with, or None if unknown."""
+    manifest = load_index_manifest(index_path)
+    return manifest["embedding_model"] if manifest else None
+
+def serving_index_is_current(path=SERVING_INDEX_PATH, index_path=FAISS_INDEX_PATH):
+    """
+    Whether the serving index holds the chunks, embedded by the same model,
+    that ingest.py's manifest says the exact index holds (True if there is
+    no manifest to compare with).
+    """
+    manifest = load_index_manifest(index_path)
+    if manifest is None:
+        return True
+    meta_path = os.path.join(path, "meta.json")
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    return (meta.get("embedding_model") == manifest["embedding_model"]
+            and meta.get("chunks_digest") == manifest_chunks_digest(manifest))
+
+def index_size(index):
+    """Bytes the index takes when serialized."""
+    return faiss.serialize_index(index).nbytes
+
+def swap_directory(tmp_path, path):
+    """
+    Replace directory ``path`` by ``tmp_path`` (two renames; the old one is
+    kept as ``path.old`` in between, see recover_directory()).
+    """
+    old_path = path + ".old"
+    if os.path.exists(path):
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+def recover_directory(path):
+    """Put the previous directory back if a swap_directory() was interrupted between its renames."""
+    old_path = path + ".old"
+    if os.path.exists(old_path):
+        if os.path.exists(path):
+            shutil.rmtree(old_path)
+        else:
+            print(f"Restoring {path} from an interrupted save...")
+            os.rename(old_path, path)
+
+def write_docstore(path, ids, documents):
+    """
+    Write documents as a memory-mappable docstore.
+
+    docs.bin holds one JSON record per document, offsets.npy where each
+    starts (plus the end), ids.npy the sorted vector ids they belong to.
+    """
+    order = np.argsort(np.asarray(ids, dtype=np.int64))
+    sorted_ids = np.asarray(ids, dtype=np.int64)[order]
+    offsets = [0]
+    with open(os.path.join(path, "docs.bin"), "wb") as f:
+        for i in order:
+            document = documents[i]
+            record = json.dumps({"page_content": document.page_content, "metadata": document.metadata},
+                                ensure_ascii=False).encode("utf-8")
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(os.path.join(path, "offsets.npy"), np.array(offsets, dtype=np.int64))
+    np.save(os.path.join(path, "ids.npy"), sorted_ids)
+
+class MmapDocstore:
+    """
+    Read-only docstore over write_docstore() files, memory-mapped.
+
+    Nothing is unpickled or copied at load time: processes serving the
+    same index share its pages through the OS page cache. Documents are
+    looked up by vector id (binary search) and decoded on demand.
+    """
+
+    def __init__(self, path):
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "docs.bin"), "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def __len__(self):
+        return len(self.ids)
+
+    def search(self, search):
+        """The Document stored for a vector id (the langchain Docstore interface)."""
+        row = int(np.searchsorted(self.ids, int(search)))
+        if row >= len(self.ids) or self.ids[row] != int(search):
+            return f"ID {search} not found."
+        record = json.loads(self.data[self.offsets[row]:self.offsets[row + 1]].decode("utf-8"))
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+class IdentityMapping:
+    """index_to_docstore_id for a serving index: the docstore is keyed by vector id itself."""
+
+    def __init__(self, count):
+        self.count = count
+
+    def __getitem__(self, vector_id):
+        return int(vector_id)
+
+    def __len__(self):
+        return self.count
+
+def read_index(path):
+    """Read an index memory-mapped where faiss supports it, falling back to loading it."""
+    flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0) | faiss.IO_FLAG_READ_ONLY
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+def export_serving_index(exact_index, docstore, index_to_docstore_id, index_type=DEFAULT_INDEX_TYPE,
+                         path=SERVING_INDEX_PATH, nlist=None, pq_m=None, k=4, sample=200, embedding_model=None):
+    """
+    Build a compressed index from ingest.py's exact store and save it with a mmap docstore.
+
+    Its recall@k against the exact index (over a sample of the stored
+    chunks as queries) is measured, printed and kept in meta.json.
+    """
+    ids, vectors = stored_vectors(exact_index)
+    index = build_index(vectors, ids, index_type, nlist, pq_m)
+    queries = vectors[np.random.default_rng(0).choice(len(vectors), min(sample, len(vectors)), replace=False)]
+    recall, seconds = recall_at_k(exact_index, index, queries, k)
+    print(f"{index_type} index: recall@{k} {recall:.3f} vs flat, {seconds * 1000:.2f} ms/query, "
+          f"{index_size(index) / 1e6:.1f} MB (flat: {index_size(exact_index) / 1e6:.1f} MB)")
+
+    documents = [docstore.search(index_to_docstore_id[int(vector_id)]) for vector_id in ids]
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    if os.path.exists(tmp_path):
+        shutil.rmtree(tmp_path)
+    os.makedirs(tmp_path)
+    faiss.write_index(index, os.path.join(tmp_path, "index.faiss"))
+    write_docstore(tmp_path, ids, documents)
+    with open(os.path.join(tmp_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"index_type": index_type, "count": len(ids), "dimension": int(vectors.shape[1]),
+                   "embedding_model": embedding_model, "chunks_digest": chunks_digest(ids),
+                   f"recall@{k}": recall}, f, indent=2)
+    recover_directory(path)
+    swap_directory(tmp_path, path)
+    print(f"Saved serving index to {path}.")
+
+def load_serving_vectorstore(embeddings, path=SERVING_INDEX_PATH, nprobe=DEFAULT_NPROBE, ef_search=DEFAULT_EF_SEARCH):
+    """A langchain FAISS store over a serving index, with the index and docstore memory-mapped."""
+    from langchain_community.vectorstores import FAISS
+
+    recover_directory(path)
+    index = set_search_params(read_index(os.path.join(path, "index.faiss")), nprobe, ef_search)
+    docstore = MmapDocstore(path)
+    return FAISS(embeddings, index, docstore, IdentityMapping(len(docstore)))
+
+def evaluate(index_types, k, sample, nlist=None, pq_m=None, nprobe=DEFAULT_NPROBE, ef_search=DEFAULT_EF_SEARCH):
+    """Print recall@k, query time and size of each index type over the ingested vectors."""
+    exact = faiss.read_index(os.path.join(FAISS_INDEX_PATH, "index.faiss"))
+    ids, vectors = stored_vectors(exact)
+    queries = vectors[np.random.default_rng(0).choice(len(vectors), min(sample, len(vectors)), replace=False)]
+    print(f"{len(vectors)} vectors of {vectors.shape[1]} dims, {len(queries)} sampled chunks as queries\n")
+    print(f"{'index':<10} {'recall@' + str(k):>9} {'ms/query':>9} {'MB':>8} {'build s':>8}")
+    for index_type in index_types:
+        started = time.perf_counter()
+        index = set_search_params(build_index(vectors, ids, index_type, nlist, pq_m), nprobe, ef_search)
+        build_seconds = time.perf_counter() - started
+        recall, seconds = recall_at_k(exact, index, queries, k)
+        print(f"{index_type:<10} {recall:>9.3f} {seconds * 1000:>9.3f} {index_size(index) / 1e6:>8.1f} {build_seconds:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or compare compressed FAISS indexes of the legal vectorstore")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help=f"Build {SERVING_INDEX_PATH} from {FAISS_INDEX_PATH}")
+    build.add_argument("--type", choices=INDEX_TYPES, default=DEFAULT_INDEX_TYPE)
+
+    compare = commands.add_parser("evaluate", help="Compare recall@k, speed and size of index types")
+    compare.add_argument("--types", default=",".join(INDEX_TYPES), help="Comma-separated index types")
+    compare.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE, help="IVF lists probed per query")
+    compare.add_argument("--ef-search", type=int, default=DEFAULT_EF_SEARCH, help="HNSW candidate list size")
+
+    for command in (build, compare):
+        command.add_argument("--k", type=int, default=4, help="Neighbours compared for recall@k")
+        command.add_argument("--sample", type=int, default=200, help="Stored chunks used as queries")
+        command.add_argument("--nlist", type=int, default=None, help="IVF lists (default: about 4*sqrt(n))")
+        command.add_argument("--pq-m", type=int, default=None, help="PQ sub-quantizers (default: dimension/16)")
+    args = parser.parse_args()
+
+    if not os.path.exists(os.path.join(FAISS_INDEX_PATH, "index.faiss")):
+        sys.exit(f"No index at {FAISS_INDEX_PATH}; run ingest.py first.")
+    if args.command == "evaluate":
+        evaluate(args.types.split(","), args.k, args.sample, args.nlist, args.pq_m, args.nprobe, args.ef_search)
+    else:
+        embedding_model = indexed_embedding_model()
+        # Written by ingest.py (FAISS.save_local), so trusted like in qa_logic
+        with open(os.path.join(FAISS_INDEX_PATH, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        exact_index = faiss.read_index(os.path.join(FAISS_INDEX_PATH, "index.faiss"))
+        export_serving_index(exact_index, docstore, index_to_docstore_id, args.type, nlist=args.nlist,
+                             pq_m=args.pq_m, k=args.k, sample=args.sample, embedding_model=embedding_model)
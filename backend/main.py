@@ -1,8 +1,12 @@
 #backend server for legal chatbot
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from legal_chatbot_logic.qa_logic import qa_pipeline
+from legal_chatbot_logic.qa_logic import stream_qa
+from legal_chatbot_logic.pipeline_loader import PipelineLoader
+from legal_chatbot_logic.chat_metrics import LatencyStats
+import json
 import os
+import time
 
 app = Flask(__name__)
 
@@ -15,8 +19,17 @@ CORS(app, resources={
     }
 })
 
-# Initialize QA pipeline
-qa_chain = qa_pipeline()
+# Initialize QA pipeline on a background thread, so the server is up (and
+# answers /healthz and /readyz) while the model and index load.
+# PRELOAD_PIPELINE=1 loads it before serving instead, as gunicorn.conf.py
+# does ahead of forking workers.
+# Answers to near-duplicate questions are served from a semantic cache
+# (set ANSWER_CACHE=0 to turn it off)
+pipeline = PipelineLoader(answer_cache=os.getenv("ANSWER_CACHE", "1") != "0")
+if os.getenv("PRELOAD_PIPELINE") == "1":
+    pipeline.load()
+else:
+    pipeline.start()
 
 # Add this at the top of your file
 GREETINGS = [
@@ -28,12 +41,62 @@ SMALL_TALK = [
     "how are you", "how's it going", "what's up", "how do you do", "how are you doing"
 ]
 
+# Time to first byte, first token and last byte of /api/chat/stream
+stream_stats = LatencyStats()
+
+def canned_answer(message):
+    """The reply to a greeting or small talk, or None for a real question."""
+    user_message = message.strip().lower()
+
+    # Handle greetings
+    if any(greet in user_message for greet in GREETINGS):
+        return "Hello! How can I assist you with your legal questions today?"
+
+    # Handle small talk
+    if any(talk in user_message for talk in SMALL_TALK):
+        return "I'm here to help you with legal matters. Please let me know your legal question or concern!"
+    return None
+
+def format_sources(documents):
+    """Source file and page of each retrieved document."""
+    sources = []
+    for doc in documents or []:
+        sources.append({
+            "source": doc.metadata.get('source', 'Unknown'),
+            "page": doc.metadata.get('page', 'N/A')
+        })
+    return sources
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def unavailable_response():
+    """The error to answer with while the QA pipeline isn't ready, else None."""
+    unavailable = pipeline.unavailable()
+    if not unavailable:
+        return None
+    error, status = unavailable
+    response = jsonify({"error": error, "stage": pipeline.status()["stage"]})
+    if status == 503:
+        response.headers["Retry-After"] = "5"
+    return response, status
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    # Liveness: the process is up and serving, loaded or not
+    return jsonify({"status": "ok"})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    # Readiness: 200 once chats can be answered, with per-stage load timings
+    return jsonify(pipeline.status()), 200 if pipeline.ready else 503
+
 @app.route("/api/chat", methods=["POST"])
 def chat():
-    if not qa_chain:
-        return jsonify({
-            "error": "Chatbot not initialized properly"
-        }), 500
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    qa_chain, answer_cache = pipeline.chain, pipeline.answer_cache
     
     try:
         # Get request data
@@ -43,43 +106,144 @@ def chat():
                 "error": "Message is required"
             }), 400
         
-        user_message = data["message"].strip().lower()
-
-        # Handle greetings
-        if any(greet in user_message for greet in GREETINGS):
+        # Handle greetings and small talk
+        answer = canned_answer(data["message"])
+        if answer:
             return jsonify({
-                "answer": "Hello! How can I assist you with your legal questions today?",
+                "answer": answer,
                 "sources": []
             })
 
-        # Handle small talk
-        if any(talk in user_message for talk in SMALL_TALK):
-            return jsonify({
-                "answer": "I'm here to help you with legal matters. Please let me know your legal question or concern!",
-                "sources": []
-            })
+        # Answered before (or something very close to it)?
+        cached = answer_cache.lookup(data["message"]) if answer_cache else None
+        if cached:
+            result = jsonify(cached)
+            result.headers['X-Cache'] = 'HIT'
+            return result
 
         # Otherwise, use the QA pipeline
         response = qa_chain.invoke({"query": data["message"]})
         
         # Format sources
-        sources = []
-        if response.get("source_documents"):
-            for doc in response["source_documents"]:
-                sources.append({
-                    "source": doc.metadata.get('source', 'Unknown'),
-                    "page": doc.metadata.get('page', 'N/A')
-                })
-        
-        return jsonify({
+        sources = format_sources(response.get("source_documents"))
+
+        if answer_cache:
+            answer_cache.store(data["message"], response["result"], sources)
+        result = jsonify({
             "answer": response["result"],
             "sources": sources
         })
+        result.headers['X-Cache'] = 'MISS'
+        return result
         
     except Exception as e:
         return jsonify({
             "error": str(e)
         }), 500
 
+@app.route("/api/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    /api/chat as Server-Sent Events: a "sources" event as soon as
+    retrieval is done, a "token" event per piece of the answer, then
+    "done" (or "error"). A client that disconnects stops the LLM call.
+    """
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    qa_chain, answer_cache = pipeline.chain, pipeline.answer_cache
+
+    data = request.get_json(silent=True)
+    if not data or "message" not in data:
+        return jsonify({
+            "error": "Message is required"
+        }), 400
+    message = data["message"]
+    started = time.perf_counter()
+
+    def events():
+        timings = {}
+        answer = []
+        finished = False
+        stream = None
+
+        def sent(name):
+            # The first event sent is the first byte
+            timings.setdefault("ttfb", time.perf_counter() - started)
+            if name == "token":
+                timings.setdefault("first_token", time.perf_counter() - started)
+
+        try:
+            canned = canned_answer(message)
+            cached = None if canned else (answer_cache.lookup(message) if answer_cache else None)
+            if canned or cached:
+                stream_stats.count("cached" if cached else "canned")
+                sent("sources")
+                yield sse_event("sources", {"sources": cached["sources"] if cached else []})
+                sent("token")
+                yield sse_event("token", {"text": cached["answer"] if cached else canned})
+                answer.append(cached["answer"] if cached else canned)
+            else:
+                stream = stream_qa(qa_chain, message)
+                for kind, value in stream:
+                    if kind == "sources":
+                        sources = format_sources(value)
+                        sent("sources")
+                        yield sse_event("sources", {"sources": sources})
+                    else:
+                        answer.append(value)
+                        sent("token")
+                        yield sse_event("token", {"text": value})
+                if answer_cache:
+                    answer_cache.store(message, "".join(answer), sources)
+            timings["total"] = time.perf_counter() - started
+            yield sse_event("done", {
+                "ttfb_ms": round(timings["ttfb"] * 1000, 1),
+                "total_ms": round(timings["total"] * 1000, 1)
+            })
+            finished = True
+        except GeneratorExit:
+            # The client went away: stop generating (and paying for) the answer
+            stream_stats.count("cancelled")
+            raise
+        except Exception as e:
+            stream_stats.count("errors")
+            yield sse_event("error", {"error": str(e)})
+        finally:
+            if stream is not None:
+                stream.close()
+            if finished:
+                stream_stats.count("completed")
+                stream_stats.record(**timings)
+
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Don't let a reverse proxy buffer the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+@app.route("/api/stats/chat-stream", methods=["GET"])
+def chat_stream_stats():
+    return jsonify(stream_stats.summary())
+
+@app.route("/api/stats/embedding-cache", methods=["GET"])
+def embedding_cache_stats():
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    return jsonify(pipeline.chain.retriever.vectorstore.embeddings.cache.stats())
+
+@app.route("/api/stats/answer-cache", methods=["GET"])
+def answer_cache_stats():
+    unavailable = unavailable_response()
+    if unavailable:
+        return unavailable
+    answer_cache = pipeline.answer_cache
+    if not answer_cache:
+        return jsonify({
+            "error": "Answer cache is disabled"
+        }), 404
+    return jsonify(answer_cache.stats())
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8000, debug=True) 
\ No newline at end of file
@@ -1,9 +1,12 @@
-from .scraper import SchemeScraper
+from .async_fetcher import AsyncFetcher
+from .crawl_queue import CrawlQueue
+from .scraper import SchemeScraper, get_all_scheme_urls
 from .batch_scraper import process_all_categories
-from .fetch_all_scheme_urls import get_all_scheme_urls
 from .reset_and_scrape import reset_database
 
 __all__ = [
+    'AsyncFetcher',
+    'CrawlQueue',
     'SchemeScraper',
     'process_all_categories',
     'get_all_scheme_urls',
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from typing import AsyncIterator, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import httpx
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# httpx logs every request at INFO; keep crawl logs readable
+logging.getLogger('httpx').setLevel(logging.WARNING)
+
+# Requests in flight at once, across all hosts
+DEFAULT_CONCURRENCY = 8
+
+# Sustained requests per second to any one host, and how many may burst
+DEFAULT_RATE_PER_HOST = 4.0
+DEFAULT_BURST = 4
+
+# Retries after the first attempt, with jittered exponential backoff
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+DEFAULT_TIMEOUT = 30.0
+
+# Responses worth retrying; other errors are final
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Send every request to this origin instead (e.g. a local replay server,
+# see http_replay.py), keeping the path and query
+BASE_URL_ENV = 'SCRAPER_BASE_URL'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+class TokenBucket:
+    """Token-bucket rate limiter, usable from threads and from asyncio.
+
+    Tokens refill at ``rate`` per second up to ``burst``. Each caller
+    reserves a token up front and is told how long to wait for it, so
+    waiting callers are served in order and never busy-loop.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token, returning the delay (seconds) before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            # A negative balance is a queue of reservations ahead of us
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def wait(self):
+        """Block the calling thread until a token is available."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire(self):
+        """Wait (without blocking the event loop) until a token is available."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+class HostRateLimiter:
+    """One TokenBucket per host."""
+
+    def __init__(self, rate: float = DEFAULT_RATE_PER_HOST, burst: int = DEFAULT_BURST):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Get the bucket for the URL's host."""
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate, self.burst)
+            return self._buckets[host]
+
+def rewrite_url(url: str, base_url: Optional[str]) -> str:
+    """Move a URL onto ``base_url``'s scheme and host (unchanged if base_url is empty)."""
+    if not base_url:
+        return url
+    base = urlsplit(base_url)
+    parts = urlsplit(url)
+    return urlunsplit((base.scheme, base.netloc, parts.path, parts.query, parts.fragment))
+
+def base_url_override() -> Optional[str]:
+    """The SCRAPER_BASE_URL origin override, if set."""
+    return os.environ.get(BASE_URL_ENV) or None
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Full-jitter exponential backoff for the given retry (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+def retry_after_delay(response: httpx.Response) -> Optional[float]:
+    """Seconds the server asked us to wait (Retry-After in seconds), if any."""
+    value = response.headers.get('Retry-After', '')
+    return float(value) if value.isdigit() else None
+
+class AsyncFetcher:
+    """Concurrent, polite HTTP fetcher built on httpx.
+
+    One AsyncClient (HTTP/2 where the server supports it) is shared by
+    every request so connections are reused. At most ``concurrency``
+    requests are in flight, each host is rate limited by a token bucket,
+    and transient failures are retried with jittered exponential backoff.
+
+    ``base_url`` (default: the SCRAPER_BASE_URL environment variable)
+    sends requests to another origin, and a ``recorder`` (an
+    http_replay.HttpCorpus) keeps a copy of every successful response.
+
+    Use it as an async context manager::
+
+        async with AsyncFetcher() as fetcher:
+            html = await fetcher.fetch_text(url)
+    """
+
+    def __init__(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate_per_host: float = DEFAULT_RATE_PER_HOST,
+        burst: int = DEFAULT_BURST,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        timeout: float = DEFAULT_TIMEOUT,
+        http2: bool = True,
+        headers: Optional[Dict[str, str]] = None,
+        base_url: Optional[str] = None,
+        recorder=None
+    ):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.http2 = http2
+        self.headers = dict(DEFAULT_HEADERS, **(headers or {}))
+        self.rate_limiter = HostRateLimiter(rate_per_host, burst)
+        self.base_url = base_url if base_url is not None else base_url_override()
+        self.recorder = recorder
+        self.client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats = {
+            'requests': 0,
+            'retries': 0,
+            'failures': 0,
+            'bytes': 0,
+            'seconds': 0.0,
+        }
+
+    async def __aenter__(self) -> 'AsyncFetcher':
+        self.client = httpx.AsyncClient(
+            http2=self.http2,
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency
+            )
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._started = time.perf_counter()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.stats['seconds'] = time.perf_counter() - self._started
+        await self.client.aclose()
+        self.client = None
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        """GET a URL, retrying transient failures. Returns None if it failed."""
+        request_url = rewrite_url(url, self.base_url)
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                await self.rate_limiter.bucket(request_url).acquire()
+                self.stats['requests'] += 1
+                delay = None
+                try:
+                    response = await self.client.get(request_url, headers=headers)
+                    if response.status_code in RETRY_STATUSES:
+                        delay = retry_after_delay(response)
+                        error = f"HTTP {response.status_code}"
+                    elif response.status_code == 304:
+                        # Not Modified: the answer to a conditional request
+                        return response
+                    else:
+                        response.raise_for_status()
+                        self.stats['bytes'] += len(response.content)
+                        if self.recorder is not None:
+                            self.recorder.record_response(url, response)
+                        return response
+                except httpx.HTTPStatusError as e:
+                    # Not retryable (e.g. 404)
+                    logger.error(f"Error fetching {url}: {str(e)}")
+                    self.stats['failures'] += 1
+                    return None
+                except httpx.TransportError as e:
+                    error = f"{type(e).__name__}: {str(e)}"
+
+                if attempt < self.max_retries:
+                    self.stats['retries'] += 1
+                    delay = min(delay, BACKOFF_MAX) if delay is not None else backoff_delay(attempt)
+                    logger.warning(f"Retrying {url} in {delay:.1f}s after {error} (attempt {attempt + 1})")
+                    await asyncio.sleep(delay)
+
+            logger.error(f"Giving up on {url} after {self.max_retries + 1} attempts: {error}")
+            self.stats['failures'] += 1
+            return None
+
+    async def fetch_text(self, url: str) -> Optional[str]:
+        """GET a URL and return its decoded body, or None if it failed."""
+        response = await self.fetch(url)
+        return response.text if response is not None else None
+
+    async def fetch_many(self, urls: Iterable[str]) -> AsyncIterator[Tuple[str, Optional[str]]]:
+        """Fetch URLs concurrently, yielding (url, text) as each one finishes."""
+        async def fetch_one(url: str) -> Tuple[str, Optional[str]]:
+            return url, await self.fetch_text(url)
+
+        tasks = [asyncio.ensure_future(fetch_one(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # Stop outstanding requests if the consumer bails out early
+            for task in tasks:
+                task.cancel()
@@ -1,8 +1,20 @@
+import argparse
+import asyncio
 import json
 import os
+import sys
 import logging
-from typing import List, Dict
+import time
+from typing import Dict, List, Optional
 from tqdm import tqdm
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from web_scraping_components.async_fetcher import AsyncFetcher, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST
+from web_scraping_components.crawl_queue import CrawlQueue, DEFAULT_QUEUE_PATH
+from web_scraping_components.html_parsing import make_soup
+from web_scraping_components.pipeline import ScrapePipeline
+from web_scraping_components.revalidation import (
+    CrawlReport, FAILED, FETCHED, REMOVED, UNCHANGED_OUTCOMES, compare_fields, revalidate_many
+)
 from web_scraping_components.scraper import SchemeScraper
 from data_management.database import Database
 
@@ -30,8 +42,134 @@ def load_urls_from_json(json_file: str) -> List[str]:
         logger.error(f"Error loading URLs from {json_file}: {str(e)}")
         return []
 
-def process_all_categories():
-    """Process all scheme URLs from category JSON files."""
+# Scraped schemes written to the database per transaction
+SAVE_BATCH_SIZE = 50
+
+# Longest wait (seconds) for failed URLs to come due before ending a run;
+# later retries are left for the next run
+RETRY_WAIT_LIMIT = 300
+
+def load_category_urls(output_dir: str, json_files: List[str]) -> Dict[str, List[str]]:
+    """Map each scheme URL to the categories whose files list it."""
+    url_categories = {}
+    for json_file in json_files:
+        category = json_file.replace('_urls.json', '')
+        urls = load_urls_from_json(os.path.join(output_dir, json_file))
+        logger.info(f"Found {len(urls)} URLs for category {category}")
+        for url in urls:
+            categories = url_categories.setdefault(url, [])
+            if category not in categories:
+                categories.append(category)
+    return url_categories
+
+async def scrape_and_save(
+    scraper: SchemeScraper,
+    db: Database,
+    urls: List[str],
+    url_categories: Dict[str, List[str]],
+    concurrency: int,
+    rate_per_host: float,
+    crawl_queue: Optional[CrawlQueue] = None,
+    report: Optional[CrawlReport] = None,
+    conditional: bool = True
+) -> Dict[str, int]:
+    """Crawl the URLs concurrently, saving changed schemes SAVE_BATCH_SIZE at a time.
+
+    With a ``crawl_queue`` each URL is marked done once its batch is
+    committed, or failed (to be retried) if it couldn't be scraped or
+    saved. When ``conditional``, pages are revalidated against the
+    fingerprints the queue stored last time: a page that answers 304,
+    hashes the same or yields the same fields is not written again.
+    Every URL's outcome is recorded in ``report``.
+    """
+    counts = {'processed': 0, 'success': 0, 'unchanged': 0, 'failed': 0}
+    report = report if report is not None else CrawlReport()
+    previous = crawl_queue.fingerprints(urls) if crawl_queue and conditional else {}
+    batch = []
+    batch_fingerprints = {}
+
+    def flush():
+        saved = db.save_schemes_bulk(batch, batch_size=len(batch))
+        counts['success'] += saved['schemes']
+        counts['failed'] += saved['failed']
+        # A batch is one transaction: it was saved whole or not at all
+        batch_urls = [scheme_data['url'] for scheme_data in batch]
+        if saved['failed']:
+            report.record_many(batch_urls, FAILED)
+            if crawl_queue:
+                crawl_queue.fail(batch_urls, "database write failed")
+        elif crawl_queue:
+            crawl_queue.complete(batch_urls, batch_fingerprints)
+        batch.clear()
+        batch_fingerprints.clear()
+
+    async with AsyncFetcher(concurrency=concurrency, rate_per_host=rate_per_host) as fetcher:
+        with tqdm(total=len(urls), desc="Scraping schemes") as progress:
+            async for url, outcome, html, fingerprint in revalidate_many(fetcher, urls, previous):
+                progress.update(1)
+                counts['processed'] += 1
+                error = "fetch failed"
+                if outcome == FETCHED:
+                    scheme_data = scraper.parse_scheme_details(make_soup(html), url)
+                    if scheme_data:
+                        # Add categories to scheme data
+                        scheme_data['categories'] = url_categories.get(url, [])
+                        outcome = compare_fields(scheme_data, fingerprint, previous.get(url))
+                    else:
+                        outcome, error = FAILED, "no scheme data on page"
+                report.record(url, outcome)
+
+                if outcome == FAILED:
+                    counts['failed'] += 1
+                    if crawl_queue:
+                        crawl_queue.fail([url], error)
+                elif outcome in UNCHANGED_OUTCOMES:
+                    counts['unchanged'] += 1
+                    if crawl_queue:
+                        crawl_queue.complete([url], {url: fingerprint})
+                else:
+                    batch.append(scheme_data)
+                    batch_fingerprints[url] = fingerprint
+                    if len(batch) >= SAVE_BATCH_SIZE:
+                        flush()
+        if batch:
+            flush()
+
+    stats = fetcher.stats
+    logger.info(f"Fetched {stats['requests']} pages ({stats['bytes'] / 1e6:.1f} MB) in {stats['seconds']:.1f}s, "
+                f"{stats['retries']} retries, {stats['failures']} failures")
+    return counts
+
+def process_all_categories(
+    concurrency: int = DEFAULT_CONCURRENCY,
+    rate_per_host: float = DEFAULT_RATE_PER_HOST,
+    parse_workers: int = 0,
+    fresh: bool = False,
+    queue_path: str = DEFAULT_QUEUE_PATH,
+    stats_file: Optional[str] = None,
+    full: bool = False,
+    report_file: Optional[str] = None
+):
+    """Process all scheme URLs from category JSON files.
+
+    Pages are fetched concurrently (at most ``concurrency`` at once and
+    ``rate_per_host`` requests per second to the site); a scheme listed
+    in several category files is fetched once and gets all of them.
+    With ``parse_workers`` > 0 pages are parsed by that many worker
+    processes (see ScrapePipeline) instead of on the fetching thread.
+
+    Progress is kept in a CrawlQueue, so a run picks up where the last
+    one stopped: only URLs that are new, unfinished or due for a retry
+    are scraped. ``fresh`` starts over from the first URL. Queue stats
+    are written to ``stats_file`` (JSON) at the end if one is given.
+
+    Re-crawls are incremental: requests carry the ETag/Last-Modified
+    from the last crawl and only schemes whose fields changed are
+    written. ``full`` (implies ``fresh``) ignores what was stored and
+    rewrites every scheme, e.g. into a new database. The changed,
+    unchanged, removed and failed URLs are logged and written to
+    ``report_file`` (JSON) if one is given.
+    """
     # Initialize scraper and database
     scraper = SchemeScraper()
     db = Database()
@@ -40,50 +178,78 @@ def process_all_categories():
     output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
     json_files = [f for f in os.listdir(output_dir) if f.endswith('_urls.json')]
     
-    total_processed = 0
-    total_success = 0
-    total_failed = 0
+    url_categories = load_category_urls(output_dir, json_files)
+    logger.info(f"Found {len(url_categories)} unique scheme URLs in {len(json_files)} categories")
+
+    crawl_queue = CrawlQueue(queue_path)
+    if fresh or full:
+        crawl_queue.reset(clear_fingerprints=full)
+    logger.info(f"Queued {crawl_queue.add(url_categories)} new URLs")
+    crawl_queue.release_claims()
+    report = CrawlReport()
+    report.record_many(crawl_queue.mark_removed(url_categories), REMOVED)
     
-    # Process each category file
-    for json_file in json_files:
-        category = json_file.replace('_urls.json', '')
-        logger.info(f"Processing category: {category}")
-        
-        # Load URLs for this category
-        urls = load_urls_from_json(os.path.join(output_dir, json_file))
-        logger.info(f"Found {len(urls)} URLs for category {category}")
-        
-        # Process each URL
-        for url in tqdm(urls, desc=f"Processing {category}"):
-            try:
-                # Extract scheme details
-                scheme_data = scraper.extract_scheme_details(url)
-                if scheme_data:
-                    # Add category to scheme data
-                    scheme_data['categories'] = [category]
-                    
-                    # Save to database
-                    scheme_id = db.save_scheme(scheme_data)
-                    if scheme_id:
-                        total_success += 1
-                    else:
-                        total_failed += 1
-                else:
-                    total_failed += 1
-                
-                total_processed += 1
-                
-            except Exception as e:
-                logger.error(f"Error processing URL {url}: {str(e)}")
-                total_failed += 1
-                total_processed += 1
+    counts = {'processed': 0, 'success': 0, 'unchanged': 0, 'failed': 0}
+    try:
+        while True:
+            urls = crawl_queue.claim()
+            if not urls:
+                wait = crawl_queue.seconds_until_due()
+                if wait is None:
+                    break
+                if wait > RETRY_WAIT_LIMIT:
+                    logger.info(f"Next retry is due in {wait:.0f}s; leaving it for the next run")
+                    break
+                logger.info(f"Waiting {wait:.0f}s for failed URLs to come due")
+                time.sleep(wait)
                 continue
+
+            logger.info(f"Scraping {len(urls)} scheme URLs")
+            if parse_workers:
+                pipeline = ScrapePipeline(db, concurrency, rate_per_host, parse_workers,
+                                          crawl_queue=crawl_queue, conditional=not full)
+                stats = pipeline.run(urls, url_categories, report)
+                run_counts = {
+                    'processed': stats['fetch']['items'],
+                    'success': stats['write']['items'],
+                    'unchanged': stats['fetch']['unchanged'] + stats['parse']['unchanged'],
+                    'failed': stats['fetch']['failed'] + stats['parse']['failed'] + stats['write']['failed'],
+                }
+            else:
+                run_counts = asyncio.run(scrape_and_save(
+                    scraper, db, urls, url_categories, concurrency, rate_per_host, crawl_queue, report, not full
+                ))
+            for key in counts:
+                counts[key] += run_counts[key]
+    finally:
+        crawl_queue.log_stats()
+        if stats_file:
+            crawl_queue.export_stats(stats_file)
+        crawl_queue.close()
+        report.log()
+        if report_file:
+            report.export(report_file)
     
     # Print summary
     logger.info("\nScraping Summary:")
-    logger.info(f"Total URLs processed: {total_processed}")
-    logger.info(f"Successfully scraped: {total_success}")
-    logger.info(f"Failed to scrape: {total_failed}")
+    logger.info(f"Total URLs processed: {counts['processed']}")
+    logger.info(f"Successfully scraped: {counts['success']}")
+    logger.info(f"Unchanged (not rewritten): {counts['unchanged']}")
+    logger.info(f"Failed to scrape: {counts['failed']}")
 
 if __name__ == "__main__":
-    process_all_categories() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Scrape every scheme listed in output/*_urls.json")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help="Requests in flight at once")
+    parser.add_argument('--rate', type=float, default=DEFAULT_RATE_PER_HOST, help="Requests per second to the site")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="Parse pages in this many worker processes (0: parse on the fetching thread)")
+    parser.add_argument('--fresh', action='store_true',
+                        help="Ignore earlier progress and revisit every URL (unchanged pages are still skipped)")
+    parser.add_argument('--full', action='store_true',
+                        help="Like --fresh, but re-parse and rewrite every page regardless of stored validators")
+    parser.add_argument('--queue', default=DEFAULT_QUEUE_PATH, help="Crawl queue database file")
+    parser.add_argument('--stats-file', help="Write crawl queue stats to this JSON file when done")
+    parser.add_argument('--report', help="Write the changed/unchanged/removed URLs to this JSON file")
+    args = parser.parse_args()
+    process_all_categories(args.concurrency, args.rate, args.parse_workers, args.fresh, args.queue,
+                           args.stats_file, args.full, args.report)
@@ -0,0 +1,315 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Mapping, Optional
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from web_scraping_components.async_fetcher import backoff_delay
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Kept next to the URL files, apart from the scheme database, so resetting
+# one never touches the other
+DEFAULT_QUEUE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output', 'crawl_queue.db')
+
+# URL states
+PENDING = 'pending'
+IN_PROGRESS = 'in_progress'
+DONE = 'done'
+FAILED = 'failed'
+REMOVED = 'removed'
+STATUSES = [PENDING, IN_PROGRESS, DONE, FAILED, REMOVED]
+
+# What is remembered about a page between crawls to tell whether it changed
+FINGERPRINT_COLUMNS = ['etag', 'last_modified', 'content_hash', 'fields_hash']
+
+# Largest number of URLs bound into one IN (...) list
+IN_CHUNK_SIZE = 500
+
+# Attempts before a URL is given up on (until retry_failed())
+DEFAULT_MAX_ATTEMPTS = 5
+
+# Backoff between attempts at a failed URL, in seconds (jittered, doubling)
+RETRY_BASE = 60.0
+RETRY_MAX = 3600.0
+
+class CrawlQueue:
+    """Persistent work queue of scheme URLs, stored in its own SQLite file.
+
+    Every URL has a status (pending, in_progress, done, failed or
+    removed), an attempt count, the last error and the fingerprint of
+    its last successful crawl: the ETag and Last-Modified validators, a
+    hash of the normalized page and a hash of the extracted fields (see
+    revalidation.py). A crawler claims the URLs that are due, then
+    reports each one as done or failed; a failed URL is retried after a
+    jittered exponential backoff until it has used up ``max_attempts``.
+    Because progress is committed as it happens, a
+    crawl that crashes or is interrupted resumes where it stopped.
+
+    Meant for one crawler at a time: ``release_claims()`` hands back
+    URLs left in progress by an earlier run that didn't finish.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._lock = threading.Lock()
+        self._create_tables()
+
+    def _create_tables(self):
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS crawl_queue (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                fields_hash TEXT,
+                next_attempt_at REAL NOT NULL DEFAULT 0,
+                updated_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_crawl_queue_status_due ON crawl_queue(status, next_attempt_at);
+        ''')
+        # Queues created before content hashing was added
+        columns = {row['name'] for row in self._conn.execute('PRAGMA table_info(crawl_queue)')}
+        for column in ['content_hash', 'fields_hash']:
+            if column not in columns:
+                self._conn.execute(f'ALTER TABLE crawl_queue ADD COLUMN {column} TEXT')
+
+    def close(self):
+        self._conn.close()
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Queue URLs that aren't in the queue yet (or were removed). Returns how many were added."""
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute('BEGIN IMMEDIATE')
+            self._conn.executemany('''
+                INSERT INTO crawl_queue (url, updated_at) VALUES (?, ?)
+                ON CONFLICT(url) DO UPDATE SET status = 'pending', attempts = 0, next_attempt_at = 0
+                WHERE status = 'removed'
+            ''', [(url, now) for url in urls])
+            self._conn.execute('COMMIT')
+            return self._conn.total_changes - before
+
+    def claim(self, limit: Optional[int] = None) -> List[str]:
+        """Mark up to ``limit`` due URLs (all of them by default) in progress and return them."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute('''
+                    SELECT url FROM crawl_queue
+                    WHERE status = ? AND next_attempt_at <= ?
+                    ORDER BY next_attempt_at, url
+                    LIMIT ?
+                ''', (PENDING, now, -1 if limit is None else limit)).fetchall()
+                urls = [row['url'] for row in rows]
+                self._conn.executemany(
+                    'UPDATE crawl_queue SET status = ?, attempts = attempts + 1, updated_at = ? WHERE url = ?',
+                    [(IN_PROGRESS, now, url) for url in urls]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return urls
+
+    def complete(self, urls: Iterable[str], fingerprints: Optional[Mapping[str, Mapping]] = None):
+        """Record URLs as scraped and saved, storing their new fingerprints if given."""
+        now = time.time()
+        fingerprints = fingerprints or {}
+        assignments = ', '.join(f'{column} = ?' for column in FINGERPRINT_COLUMNS)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for url in urls:
+                if url in fingerprints:
+                    values = [fingerprints[url].get(column) for column in FINGERPRINT_COLUMNS]
+                    self._conn.execute(
+                        f'UPDATE crawl_queue SET status = ?, last_error = NULL, updated_at = ?, {assignments} WHERE url = ?',
+                        (DONE, now, *values, url)
+                    )
+                else:
+                    self._conn.execute(
+                        'UPDATE crawl_queue SET status = ?, last_error = NULL, updated_at = ? WHERE url = ?',
+                        (DONE, now, url)
+                    )
+            self._conn.execute('COMMIT')
+
+    def fingerprints(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """Get the stored fingerprint of each URL that has been crawled successfully."""
+        urls = list(urls)
+        fingerprints = {}
+        for offset in range(0, len(urls), IN_CHUNK_SIZE):
+            chunk = urls[offset:offset + IN_CHUNK_SIZE]
+            marks = ', '.join('?' for _ in chunk)
+            for row in self._conn.execute(
+                f'SELECT url, {", ".join(FINGERPRINT_COLUMNS)} FROM crawl_queue '
+                f'WHERE url IN ({marks}) AND fields_hash IS NOT NULL', chunk
+            ):
+                fingerprints[row['url']] = {column: row[column] for column in FINGERPRINT_COLUMNS}
+        return fingerprints
+
+    def mark_removed(self, current_urls: Iterable[str]) -> List[str]:
+        """Mark URLs that are no longer listed anywhere as removed and return them."""
+        current = set(current_urls)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            removed = [
+                row['url'] for row in self._conn.execute('SELECT url FROM crawl_queue WHERE status != ?', (REMOVED,))
+                if row['url'] not in current
+            ]
+            self._conn.executemany(
+                'UPDATE crawl_queue SET status = ?, updated_at = ? WHERE url = ?',
+                [(REMOVED, now, url) for url in removed]
+            )
+            self._conn.execute('COMMIT')
+        if removed:
+            logger.info(f"{len(removed)} URLs are no longer listed in any category")
+        return removed
+
+    def fail(self, urls: Iterable[str], error: str):
+        """Record a failed attempt, scheduling a retry or giving up on the URL."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            for url in urls:
+                row = self._conn.execute('SELECT attempts FROM crawl_queue WHERE url = ?', (url,)).fetchone()
+                attempts = row['attempts'] if row else 0
+                if attempts >= self.max_attempts:
+                    status, next_attempt_at = FAILED, now
+                    logger.warning(f"Giving up on {url} after {attempts} attempts: {error}")
+                else:
+                    status, next_attempt_at = PENDING, now + backoff_delay(attempts - 1, RETRY_BASE, RETRY_MAX)
+                self._conn.execute('''
+                    UPDATE crawl_queue SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ?
+                    WHERE url = ?
+                ''', (status, error, next_attempt_at, now, url))
+            self._conn.execute('COMMIT')
+
+    def release_claims(self) -> int:
+        """Return URLs left in progress by an interrupted run to the queue."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE crawl_queue SET status = ?, attempts = MAX(attempts - 1, 0) WHERE status = ?',
+                (PENDING, IN_PROGRESS)
+            )
+        if cursor.rowcount:
+            logger.info(f"Released {cursor.rowcount} URLs left in progress by an earlier run")
+        return cursor.rowcount
+
+    def retry_failed(self) -> int:
+        """Give URLs that used up their attempts another full set."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'UPDATE crawl_queue SET status = ?, attempts = 0, next_attempt_at = 0 WHERE status = ?',
+                (PENDING, FAILED)
+            )
+        return cursor.rowcount
+
+    def reset(self, clear_fingerprints: bool = False):
+        """Put every listed URL back to pending with no attempts, to crawl them all again.
+
+        Fingerprints are kept, so pages that haven't changed are still
+        skipped, unless ``clear_fingerprints`` is set.
+        """
+        with self._lock:
+            self._conn.execute('''
+                UPDATE crawl_queue SET status = ?, attempts = 0, last_error = NULL, next_attempt_at = 0
+                WHERE status != ?
+            ''', (PENDING, REMOVED))
+            if clear_fingerprints:
+                self._conn.execute(
+                    f'UPDATE crawl_queue SET {", ".join(f"{column} = NULL" for column in FINGERPRINT_COLUMNS)}'
+                )
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next pending URL is due (0 if one is due now, None if none are pending)."""
+        row = self._conn.execute(
+            'SELECT MIN(next_attempt_at) AS due FROM crawl_queue WHERE status = ?', (PENDING,)
+        ).fetchone()
+        if row['due'] is None:
+            return None
+        return max(0.0, row['due'] - time.time())
+
+    def stats(self) -> Dict:
+        """Progress counters: URLs per status, retries waiting and the commonest errors."""
+        counts = dict.fromkeys(STATUSES, 0)
+        for row in self._conn.execute('SELECT status, COUNT(*) AS n FROM crawl_queue GROUP BY status'):
+            counts[row['status']] = row['n']
+        total = sum(counts.values())
+        retrying = self._conn.execute(
+            'SELECT COUNT(*) FROM crawl_queue WHERE status = ? AND attempts > 0', (PENDING,)
+        ).fetchone()[0]
+        attempts = self._conn.execute('SELECT COALESCE(SUM(attempts), 0) FROM crawl_queue').fetchone()[0]
+        errors = [
+            {'error': row['last_error'], 'urls': row['n']}
+            for row in self._conn.execute('''
+                SELECT last_error, COUNT(*) AS n FROM crawl_queue
+                WHERE last_error IS NOT NULL AND status != ?
+                GROUP BY last_error ORDER BY n DESC LIMIT 10
+            ''', (DONE,))
+        ]
+        return {
+            'total': total,
+            **counts,
+            'retrying': retrying,
+            'attempts': attempts,
+            'percent_done': round(100.0 * counts[DONE] / total, 1) if total else 0.0,
+            'next_retry_in': self.seconds_until_due(),
+            'top_errors': errors,
+            'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+
+    def export_stats(self, path: str) -> Dict:
+        """Write ``stats()`` to a JSON file and return it."""
+        stats = self.stats()
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+        logger.info(f"Wrote crawl queue stats to {path}")
+        return stats
+
+    def log_stats(self):
+        stats = self.stats()
+        logger.info(f"Crawl queue: {stats['done']}/{stats['total']} done ({stats['percent_done']}%), "
+                    f"{stats['pending']} pending ({stats['retrying']} waiting to retry), "
+                    f"{stats['failed']} failed, {stats['in_progress']} in progress, {stats['removed']} removed")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or manage the persistent crawl queue")
+    parser.add_argument('--path', default=DEFAULT_QUEUE_PATH, help="Queue database file")
+    parser.add_argument('--export', help="Write progress stats to this JSON file")
+    parser.add_argument('--retry-failed', action='store_true', help="Requeue URLs that used up their attempts")
+    parser.add_argument('--reset', action='store_true', help="Mark every URL pending again")
+    parser.add_argument('--clear-fingerprints', action='store_true',
+                        help="With --reset, forget validators and hashes so every page is re-parsed and rewritten")
+    args = parser.parse_args()
+
+    crawl_queue = CrawlQueue(args.path)
+    if args.reset:
+        crawl_queue.reset(args.clear_fingerprints)
+        logger.info("Reset crawl queue")
+    if args.retry_failed:
+        logger.info(f"Requeued {crawl_queue.retry_failed()} failed URLs")
+    if args.export:
+        crawl_queue.export_stats(args.export)
+    else:
+        print(json.dumps(crawl_queue.stats(), indent=2))
+    crawl_queue.close()
@@ -1,14 +1,39 @@
+import argparse
 import httpx
 import asyncio
 import json
 import os
+import sys
+import time
+from typing import Dict, List, Optional
 from playwright.async_api import async_playwright
 import re
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from web_scraping_components.async_fetcher import RETRY_STATUSES, backoff_delay, base_url_override, rewrite_url
 
 API_URL = "https://api.myscheme.gov.in/search/v4/schemes"
 CATEGORIES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "categories.json")
 OUTPUT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "output")
 
+# Schemes requested per API call (20 is what the site itself asks for; the
+# API may return fewer than asked), and API calls in flight across all categories
+DEFAULT_PAGE_SIZE = 20
+DEFAULT_CONCURRENCY = 6
+
+# Retries of a page after a transient error (429/5xx, network)
+MAX_RETRIES = 3
+
+# The sniffed x-api-key is reused until it expires or the API rejects it
+API_KEY_CACHE_FILE = os.path.join(OUTPUT_DIR, ".myscheme_api_key.json")
+API_KEY_TTL = 7 * 24 * 3600
+
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Firefox/138.0",
+    "Origin": "https://www.myscheme.gov.in",
+    "Referer": "https://www.myscheme.gov.in/",
+    "Accept": "application/json, text/plain, */*"
+}
+
 # Helper to clean category names for filenames
 def clean_filename(name):
     return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
@@ -34,82 +59,165 @@ async def get_x_api_key():
         raise Exception("Failed to extract x-api-key")
     return api_key
 
-async def fetch_category_scheme_urls(category, num_schemes, output_file, api_key):
+class ApiKeyRejected(Exception):
+    """The API refused the x-api-key (401/403)."""
+
+def load_cached_api_key(path: str = API_KEY_CACHE_FILE) -> Optional[str]:
+    """Get the cached x-api-key, or None if there is none or it has expired."""
+    try:
+        with open(path, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("expires_at", 0) <= time.time():
+        return None
+    return cached.get("api_key")
+
+def save_api_key(api_key: str, path: str = API_KEY_CACHE_FILE, ttl: float = API_KEY_TTL):
+    """Cache the x-api-key on disk for ``ttl`` seconds."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    now = time.time()
+    with open(path, "w") as f:
+        json.dump({"api_key": api_key, "fetched_at": now, "expires_at": now + ttl}, f)
+
+class ApiKeyProvider:
+    """Hands out the x-api-key, launching the browser only when it must.
+
+    The key comes from the on-disk cache while it is fresh. When the API
+    rejects it, the first task to notice sniffs a new one with Playwright
+    and the others wait for that instead of each opening a browser.
+    A known ``api_key`` is used as is.
+    """
+
+    def __init__(self, cache_file: str = API_KEY_CACHE_FILE, ttl: float = API_KEY_TTL,
+                 api_key: Optional[str] = None):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.api_key: Optional[str] = api_key
+        self.browser_launches = 0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> str:
+        async with self._lock:
+            if self.api_key is None:
+                self.api_key = load_cached_api_key(self.cache_file)
+                if self.api_key:
+                    print("Using cached x-api-key")
+                else:
+                    await self._sniff()
+            return self.api_key
+
+    async def refresh(self, rejected_key: str) -> str:
+        """Replace a key the API rejected (once, however many tasks report it)."""
+        async with self._lock:
+            if self.api_key == rejected_key:
+                print("Cached x-api-key was rejected, extracting a new one...")
+                await self._sniff()
+            return self.api_key
+
+    async def _sniff(self):
+        self.browser_launches += 1
+        self.api_key = await get_x_api_key()
+        save_api_key(self.api_key, self.cache_file, self.ttl)
+        print(f"Extracted x-api-key: {self.api_key}")
+
+async def fetch_page(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                     keys: ApiKeyProvider, params: Dict[str, str],
+                     api_url: str = API_URL, recorder=None) -> Dict:
+    """Get one page of search results, retrying transient errors."""
+    api_key = await keys.get()
+    key_refreshed = False
+    attempt = 0
+    while True:
+        async with semaphore:
+            try:
+                resp = await client.get(api_url, params=params, headers={"x-api-key": api_key})
+            except httpx.TransportError as e:
+                resp, error = None, e
+        if resp is not None and resp.status_code in (401, 403):
+            if key_refreshed:
+                raise ApiKeyRejected(f"API rejected a freshly extracted x-api-key ({resp.status_code})")
+            api_key = await keys.refresh(api_key)
+            key_refreshed = True
+            continue
+        if resp is not None and resp.status_code not in RETRY_STATUSES:
+            resp.raise_for_status()
+            if recorder is not None:
+                recorder.record_response(resp.url, resp)
+            return resp.json()
+        if attempt >= MAX_RETRIES:
+            raise Exception(f"Giving up after {attempt + 1} attempts: "
+                            f"{error if resp is None else f'HTTP {resp.status_code}'}")
+        await asyncio.sleep(backoff_delay(attempt))
+        attempt += 1
+
+async def fetch_category_scheme_urls(category, num_schemes, output_file, client, semaphore, keys,
+                                     page_size=DEFAULT_PAGE_SIZE, api_url=API_URL, recorder=None):
     all_urls = set()
     offset = 0
-    size = 20  # Fetch 20 at a time for efficiency
+    size = page_size
     tried_alternate = False
     orig_category = category
     
-    print(f"\nFetching schemes for category: {category} (up to {num_schemes})")
-    print("=" * 50)
+    print(f"Fetching schemes for category: {category} (up to {num_schemes})")
     
-    async with httpx.AsyncClient() as client:
-        while len(all_urls) < num_schemes:
-            try:
-                # Format query exactly as seen in browser
-                query = [{"identifier": "schemeCategory", "value": category}]
-                params = {
-                    "lang": "en",
-                    "q": json.dumps(query),
-                    "keyword": "",
-                    "sort": "",
-                    "from": str(offset),
-                    "size": str(size)
-                }
-                
-                headers = {
-                    "x-api-key": api_key,
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) Firefox/138.0",
-                    "Origin": "https://www.myscheme.gov.in",
-                    "Referer": "https://www.myscheme.gov.in/",
-                    "Accept": "application/json, text/plain, */*"
-                }
-                
-                print(f"\nMaking API request with params: {params}")
-                resp = await client.get(API_URL, params=params, headers=headers)
-                resp.raise_for_status()
-                data = resp.json()
-                
-                # Check if we got a successful response
-                if data.get("status") != "Success":
-                    print(f"API returned error: {data.get('errorDescription')}")
+    while len(all_urls) < num_schemes:
+        try:
+            # Format query exactly as seen in browser
+            query = [{"identifier": "schemeCategory", "value": category}]
+            params = {
+                "lang": "en",
+                "q": json.dumps(query),
+                "keyword": "",
+                "sort": "",
+                "from": str(offset),
+                "size": str(size)
+            }
+            
+            data = await fetch_page(client, semaphore, keys, params, api_url, recorder)
+            
+            # Check if we got a successful response
+            if data.get("status") != "Success":
+                print(f"[{orig_category}] API returned error: {data.get('errorDescription')}")
+                break
+            
+            # Extract scheme URLs from the response
+            if "data" in data and "hits" in data["data"] and "items" in data["data"]["hits"]:
+                items = data["data"]["hits"]["items"]
+                if not items:
+                    if not tried_alternate and orig_category == "Agriculture, Rural & Environment":
+                        print("No items found, trying alternate category name without space after comma...")
+                        category = "Agriculture,Rural & Environment"
+                        tried_alternate = True
+                        offset = 0
+                        continue
                     break
-                
-                # Extract scheme URLs from the response
-                if "data" in data and "hits" in data["data"] and "items" in data["data"]["hits"]:
-                    items = data["data"]["hits"]["items"]
-                    if not items:
-                        if not tried_alternate and orig_category == "Agriculture, Rural & Environment":
-                            print("No items found, trying alternate category name without space after comma...")
-                            category = "Agriculture,Rural & Environment"
-                            tried_alternate = True
-                            offset = 0
-                            continue
-                        print("No more items found")
-                        break
-                        
-                    for item in items:
-                        if "fields" in item and "slug" in item["fields"]:
-                            slug = item["fields"]["slug"]
-                            url = f"https://www.myscheme.gov.in/schemes/{slug}"
-                            all_urls.add(url)
                     
-                    print(f"Fetched {len(items)} schemes at offset {offset} (total: {len(all_urls)})")
-                    
-                    if len(items) < size:
-                        print("Received fewer items than requested, stopping pagination")
-                        break
-                        
-                    offset += size
-                else:
-                    print("Unexpected API response structure. Keys found:", list(data.keys()))
-                    print(json.dumps(data, indent=2)[:1000] + "...")
+                known = len(all_urls)
+                for item in items:
+                    if "fields" in item and "slug" in item["fields"]:
+                        slug = item["fields"]["slug"]
+                        url = f"https://www.myscheme.gov.in/schemes/{slug}"
+                        all_urls.add(url)
+                
+                print(f"[{orig_category}] Fetched {len(items)} schemes at offset {offset} (total: {len(all_urls)})")
+                
+                # A short page isn't necessarily the last one (the API may
+                # cap the page size): go on until a page brings nothing new
+                if len(all_urls) == known:
                     break
                     
-            except Exception as e:
-                print(f"Error fetching schemes: {e}")
+                offset += len(items)
+            else:
+                print(f"[{orig_category}] Unexpected API response structure. Keys found:", list(data.keys()))
+                print(json.dumps(data, indent=2)[:1000] + "...")
                 break
+                
+        except ApiKeyRejected:
+            raise
+        except Exception as e:
+            print(f"[{orig_category}] Error fetching schemes: {e}")
+            break
     
     # Save only up to num_schemes
     urls_to_save = list(all_urls)[:num_schemes]
@@ -120,19 +228,45 @@ async def fetch_category_scheme_urls(category, num_schemes, output_file, api_key
     print(f"Saved {len(urls_to_save)} scheme URLs to {output_file}")
     return urls_to_save
 
-async def main():
+async def fetch_all_categories(categories: List[Dict], page_size: int = DEFAULT_PAGE_SIZE,
+                               concurrency: int = DEFAULT_CONCURRENCY,
+                               keys: Optional[ApiKeyProvider] = None, base_url: Optional[str] = None,
+                               recorder=None) -> Dict[str, List[str]]:
+    """Discover the scheme URLs of every category concurrently.
+
+    All categories share one pooled HTTP client, and at most
+    ``concurrency`` API calls are in flight at once. ``base_url``
+    (default: SCRAPER_BASE_URL) sends the API calls to another origin,
+    and ``recorder`` (an http_replay.HttpCorpus) keeps the responses.
+    Returns the URLs found per category name.
+    """
+    keys = keys or ApiKeyProvider()
+    api_url = rewrite_url(API_URL, base_url if base_url is not None else base_url_override())
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(headers=REQUEST_HEADERS, limits=limits, timeout=30.0) as client:
+        results = await asyncio.gather(*[
+            fetch_category_scheme_urls(
+                cat["name"], cat["num_schemes"],
+                os.path.join(OUTPUT_DIR, f"{clean_filename(cat['name'])}_urls.json"),
+                client, semaphore, keys, page_size, api_url, recorder
+            )
+            for cat in categories
+        ])
+    return {cat["name"]: urls for cat, urls in zip(categories, results)}
+
+async def main(page_size: int = DEFAULT_PAGE_SIZE, concurrency: int = DEFAULT_CONCURRENCY):
     try:
-        print("Extracting x-api-key...")
-        api_key = await get_x_api_key()
-        print(f"Extracted x-api-key: {api_key}")
         # Load categories
         with open(CATEGORIES_FILE, "r") as f:
             categories = json.load(f)
-        for cat in categories:
-            name = cat["name"]
-            num = cat["num_schemes"]
-            filename = os.path.join(OUTPUT_DIR, f"{clean_filename(name)}_urls.json")
-            await fetch_category_scheme_urls(name, num, filename, api_key)
+        started = time.perf_counter()
+        # A replay server doesn't check the key, so don't launch a browser for one
+        keys = ApiKeyProvider(api_key="replay" if base_url_override() else None)
+        results = await fetch_all_categories(categories, page_size, concurrency, keys)
+        total = sum(len(urls) for urls in results.values())
+        print(f"\nFetched {total} scheme URLs for {len(results)} categories in "
+              f"{time.perf_counter() - started:.1f}s ({keys.browser_launches} browser launches)")
         
     except KeyboardInterrupt:
         print("\nScript interrupted by user")
@@ -140,4 +274,8 @@ async def main():
         print(f"Error: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch the scheme URLs of every category in categories.json")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Schemes per API request")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="API requests in flight at once")
+    args = parser.parse_args()
+    asyncio.run(main(args.page_size, args.concurrency))
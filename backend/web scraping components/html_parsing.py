@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional
+from bs4 import BeautifulSoup, Tag
+
+# Tree builders in order of preference: lxml is a C parser and several
+# times faster than Python's html.parser, which is always available
+PARSER_BACKENDS = ['lxml', 'html.parser']
+
+def _available_backend() -> str:
+    """Get the fastest tree builder that is installed."""
+    for backend in PARSER_BACKENDS:
+        try:
+            BeautifulSoup('', backend)
+            return backend
+        except Exception:
+            continue
+    return 'html.parser'
+
+# Backend used by make_soup unless one is passed explicitly
+DEFAULT_PARSER = _available_backend()
+
+def make_soup(markup, parser: Optional[str] = None) -> BeautifulSoup:
+    """Parse HTML with the configured backend (lxml when installed)."""
+    return BeautifulSoup(markup, parser or DEFAULT_PARSER)
+
+def index_sections(soup: BeautifulSoup) -> Dict[str, List[Tag]]:
+    """Split a page into its h3-delimited sections in one pass.
+
+    Maps each h3 title to the tags that follow it in document order, up
+    to the next h3: the same tags ``find_next()`` loops from
+    ``soup.find('h3', string=title)`` would visit, but found with a single
+    traversal for all sections. Only the first h3 with a given title
+    counts, as with ``soup.find``.
+    """
+    sections = {}
+    current = None
+    for tag in soup.find_all(True):
+        if tag.name == 'h3':
+            title = tag.string
+            if title is not None and str(title) not in sections:
+                current = sections[str(title)] = []
+            else:
+                current = None
+            continue
+        if current is not None:
+            current.append(tag)
+    return sections
@@ -0,0 +1,243 @@
+import argparse
+import asyncio
+import gzip
+import http.server
+import json
+import logging
+import os
+import sys
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Response headers worth keeping: enough to replay content types,
+# conditional requests and rate limiting
+RECORDED_HEADERS = ['content-type', 'etag', 'last-modified', 'retry-after']
+
+def corpus_key(url: str) -> str:
+    """Path and sorted query of a URL: what a replayed request is matched on.
+
+    The host is left out, so requests rewritten to the replay server
+    (see ``rewrite_url``) find what was recorded from the real site.
+    """
+    parts = urlsplit(str(url))
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return parts.path + ('?' + query if query else '')
+
+class HttpCorpus:
+    """Recorded HTTP responses, stored as gzip-compressed JSON lines.
+
+    Each line holds one response: url, status, a few headers and the
+    decoded body. Recording is thread-safe; the last response recorded
+    for a URL wins.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.responses: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self.responses)
+
+    def load(self, path: str):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                self.responses[corpus_key(record['url'])] = record
+        logger.info(f"Loaded {len(self.responses)} recorded responses from {path}")
+
+    def save(self, path: Optional[str] = None):
+        path = path or self.path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._lock, gzip.open(path, 'wt', encoding='utf-8') as f:
+            for record in self.responses.values():
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        logger.info(f"Saved {len(self.responses)} responses to {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    def record(self, url: str, status: int, headers: Dict[str, str], text: str):
+        record = {
+            'url': str(url),
+            'status': status,
+            'headers': {name: headers[name] for name in RECORDED_HEADERS if name in headers},
+            'text': text,
+        }
+        with self._lock:
+            self.responses[corpus_key(url)] = record
+
+    def record_response(self, url: str, response):
+        """Record a successful httpx or requests response."""
+        if 200 <= response.status_code < 300:
+            headers = {name.lower(): value for name, value in response.headers.items()}
+            self.record(url, response.status_code, headers, response.text)
+
+    def get(self, url: str) -> Optional[Dict]:
+        return self.responses.get(corpus_key(url))
+
+class ReplayServer:
+    """Local stand-in for the scheme site that serves a recorded corpus.
+
+    Every response is delayed by ``latency`` seconds (± ``jitter``), a
+    fraction ``error_rate`` of requests fail with ``error_status``, and
+    recorded ETags are honoured (``If-None-Match`` gets a 304). URLs
+    missing from the corpus get a 404. Point the scraper at it by
+    setting SCRAPER_BASE_URL to ``server.url``.
+    """
+
+    def __init__(
+        self,
+        corpus: HttpCorpus,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        seed: Optional[int] = None
+    ):
+        self.corpus = corpus
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'served': 0, 'not_modified': 0, 'missing': 0, 'errors_injected': 0}
+        self._stats_lock = threading.Lock()
+        self.httpd = http.server.ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def _handler_class(self):
+        server = self
+
+        class ReplayHandler(http.server.BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                server._count('requests')
+                with server._stats_lock:
+                    delay = max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter))
+                    inject_error = server.random.random() < server.error_rate
+                if delay:
+                    time.sleep(delay)
+                if inject_error:
+                    server._count('errors_injected')
+                    return self._send(server.error_status, {'Retry-After': '1'})
+
+                record = server.corpus.get(self.path)
+                if record is None:
+                    server._count('missing')
+                    return self._send(404)
+                headers = record['headers']
+                etag = headers.get('etag')
+                if etag and self.headers.get('If-None-Match') == etag:
+                    server._count('not_modified')
+                    return self._send(304, {'ETag': etag})
+                server._count('served')
+                self._send(record['status'], headers, record['text'].encode('utf-8'))
+
+            def _send(self, status: int, headers: Optional[Dict[str, str]] = None, body: bytes = b''):
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return ReplayHandler
+
+    def start(self) -> 'ReplayServer':
+        """Serve on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> 'ReplayServer':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+async def record_scheme_pages(urls: List[str], corpus: HttpCorpus, concurrency: int, rate_per_host: float):
+    """Fetch scheme pages from the live site into the corpus."""
+    from web_scraping_components.async_fetcher import AsyncFetcher
+
+    async with AsyncFetcher(concurrency=concurrency, rate_per_host=rate_per_host, recorder=corpus) as fetcher:
+        async for _ in fetcher.fetch_many(urls):
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description="Record scheme pages to a corpus, or replay a corpus locally")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="Fetch pages from the live site into a corpus")
+    record.add_argument('corpus', help="Corpus file to write (.jsonl.gz)")
+    record.add_argument('--limit', type=int, default=200, help="Scheme pages to record (from output/*_urls.json)")
+    record.add_argument('--discovery', action='store_true',
+                        help="Also record the category search API (re-runs URL discovery, rewriting output/*_urls.json)")
+    record.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once")
+    record.add_argument('--rate', type=float, default=4.0, help="Requests per second to the site")
+
+    serve = commands.add_parser('serve', help="Serve a corpus as a stand-in for the site")
+    serve.add_argument('corpus', help="Corpus file to serve (.jsonl.gz)")
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    serve.add_argument('--jitter', type=float, default=0.0, help="Random ± variation of the latency, in seconds")
+    serve.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with an error")
+    serve.add_argument('--error-status', type=int, default=503, help="Status code of injected errors")
+    args = parser.parse_args()
+
+    if args.command == 'record':
+        from web_scraping_components.batch_scraper import load_category_urls
+        from web_scraping_components.fetch_all_scheme_urls import fetch_all_categories, CATEGORIES_FILE
+
+        corpus = HttpCorpus(args.corpus)
+        if args.discovery:
+            with open(CATEGORIES_FILE, 'r') as f:
+                categories = json.load(f)
+            asyncio.run(fetch_all_categories(categories, recorder=corpus))
+        output_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'output')
+        json_files = [f for f in os.listdir(output_dir) if f.endswith('_urls.json')]
+        urls = list(load_category_urls(output_dir, json_files))[:args.limit]
+        asyncio.run(record_scheme_pages(urls, corpus, args.concurrency, args.rate))
+        corpus.save()
+    else:
+        server = ReplayServer(HttpCorpus(args.corpus), port=args.port, latency=args.latency,
+                              jitter=args.jitter, error_rate=args.error_rate, error_status=args.error_status)
+        logger.info(f"Replaying {len(server.corpus)} responses at {server.url} "
+                    f"(set SCRAPER_BASE_URL={server.url} to scrape from it)")
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            logger.info(f"Stopped after {server.stats}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from data_management.database import Database
+from web_scraping_components.async_fetcher import AsyncFetcher, DEFAULT_CONCURRENCY, DEFAULT_RATE_PER_HOST
+from web_scraping_components.crawl_queue import CrawlQueue
+from web_scraping_components.html_parsing import make_soup
+from web_scraping_components.revalidation import (
+    CrawlReport, FAILED, FETCHED, UNCHANGED_OUTCOMES, compare_fields, revalidate
+)
+from web_scraping_components.scraper import SchemeScraper
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Items allowed to wait between two stages before the upstream stage blocks
+DEFAULT_QUEUE_SIZE = 64
+
+# Schemes written to the database per transaction
+DEFAULT_WRITE_BATCH_SIZE = 50
+
+# Parse worker state: one scraper per process, created by the initializer
+_worker_scraper: Optional[SchemeScraper] = None
+
+def _init_worker():
+    """Set up a parse worker process."""
+    global _worker_scraper
+    _worker_scraper = SchemeScraper()
+
+def parse_page(url: str, html: str) -> Tuple[Dict, float]:
+    """Parse one scheme page in a worker. Returns (scheme_data, CPU seconds)."""
+    started = time.process_time()
+    scheme_data = _worker_scraper.parse_scheme_details(make_soup(html), url)
+    return scheme_data, time.process_time() - started
+
+class ScrapePipeline:
+    """Fetch -> parse -> write pipeline for scheme pages.
+
+    Pages are fetched concurrently on the event loop, parsed by a pool
+    of worker processes (BeautifulSoup is CPU-bound and would otherwise
+    hold the loop's one core) and written by a single database writer in
+    batches. Stages are joined by bounded queues, so a slow stage makes
+    the ones before it wait instead of piling pages up in memory.
+
+    Given a ``crawl_queue``, every URL's outcome is recorded there: done
+    once its batch is committed, failed (for a later retry) otherwise.
+    When ``conditional``, pages are revalidated against the fingerprints
+    stored in the queue, so unchanged pages are neither parsed (304 or
+    same content hash) nor written (same fields).
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        rate_per_host: float = DEFAULT_RATE_PER_HOST,
+        parse_workers: Optional[int] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        crawl_queue: Optional[CrawlQueue] = None,
+        conditional: bool = True
+    ):
+        self.db = db
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.write_batch_size = write_batch_size
+        self.crawl_queue = crawl_queue
+        self.conditional = conditional
+        self.report = CrawlReport()
+        self._previous: Dict[str, Dict] = {}
+        self.stats = self._new_stats()
+
+    @staticmethod
+    def _new_stats() -> Dict:
+        """Per-stage counters: items handled, busy seconds and errors."""
+        return {
+            'fetch': {'items': 0, 'seconds': 0.0, 'failed': 0, 'unchanged': 0},
+            'parse': {'items': 0, 'seconds': 0.0, 'cpu_seconds': 0.0, 'failed': 0, 'unchanged': 0},
+            'write': {'items': 0, 'seconds': 0.0, 'failed': 0, 'batches': 0},
+            'queues': {'parse_max_depth': 0, 'write_max_depth': 0},
+            'seconds': 0.0,
+        }
+
+    def run(self, urls: Iterable[str], url_categories: Optional[Mapping[str, List[str]]] = None,
+            report: Optional[CrawlReport] = None) -> Dict:
+        """Scrape and save the URLs, tagging each scheme with its categories.
+
+        Each URL's outcome is added to ``report`` (a new CrawlReport,
+        kept as ``self.report``, if not given). Returns the per-stage counters.
+        """
+        urls = list(urls)
+        self.stats = self._new_stats()
+        self.report = report if report is not None else CrawlReport()
+        self._previous = self.crawl_queue.fingerprints(urls) if self.crawl_queue and self.conditional else {}
+        started = time.perf_counter()
+        asyncio.run(self._run(urls, url_categories or {}))
+        self.stats['seconds'] = time.perf_counter() - started
+        self.log_stats()
+        return self.stats
+
+    async def _run(self, urls: List[str], url_categories: Mapping[str, List[str]]):
+        parse_queue = asyncio.Queue(self.queue_size)
+        write_queue = asyncio.Queue(self.queue_size)
+        pending_urls = iter(urls)
+
+        with ProcessPoolExecutor(self.parse_workers, initializer=_init_worker) as pool:
+            async with AsyncFetcher(concurrency=self.concurrency, rate_per_host=self.rate_per_host) as fetcher:
+                writer = asyncio.create_task(self._write_stage(write_queue))
+                # Two dispatchers per worker keep every process busy while
+                # results travel back
+                parsers = [
+                    asyncio.create_task(self._parse_stage(pool, parse_queue, write_queue, url_categories))
+                    for _ in range(self.parse_workers * 2)
+                ]
+                await asyncio.gather(*[
+                    self._fetch_stage(fetcher, pending_urls, parse_queue) for _ in range(self.concurrency)
+                ])
+
+                for _ in parsers:
+                    await parse_queue.put(None)
+                await asyncio.gather(*parsers)
+                await write_queue.put(None)
+                await writer
+
+    async def _fetch_stage(self, fetcher: AsyncFetcher, pending_urls, parse_queue: asyncio.Queue):
+        """Fetch URLs one at a time until none are left; only changed pages go on to be parsed."""
+        stats = self.stats['fetch']
+        for url in pending_urls:
+            started = time.perf_counter()
+            outcome, html, fingerprint = await revalidate(fetcher, url, self._previous.get(url))
+            stats['seconds'] += time.perf_counter() - started
+            stats['items'] += 1
+            if outcome == FAILED:
+                stats['failed'] += 1
+                self._record_failure(url, "fetch failed")
+                continue
+            if outcome != FETCHED:
+                stats['unchanged'] += 1
+                self._record_unchanged(url, outcome, fingerprint)
+                continue
+            await parse_queue.put((url, html, fingerprint))
+            self._track_depth('parse_max_depth', parse_queue)
+
+    async def _parse_stage(self, pool: ProcessPoolExecutor, parse_queue: asyncio.Queue,
+                           write_queue: asyncio.Queue, url_categories: Mapping[str, List[str]]):
+        """Hand fetched pages to the worker pool and pass the schemes on."""
+        loop = asyncio.get_running_loop()
+        stats = self.stats['parse']
+        while True:
+            item = await parse_queue.get()
+            if item is None:
+                return
+            url, html, fingerprint = item
+            started = time.perf_counter()
+            try:
+                scheme_data, cpu_seconds = await loop.run_in_executor(pool, parse_page, url, html)
+            except Exception as e:
+                logger.error(f"Error parsing {url}: {str(e)}")
+                scheme_data, cpu_seconds = {}, 0.0
+                error = f"parse error: {str(e)}"
+            else:
+                error = "no scheme data on page"
+            stats['seconds'] += time.perf_counter() - started
+            stats['cpu_seconds'] += cpu_seconds
+            stats['items'] += 1
+            if not scheme_data:
+                stats['failed'] += 1
+                self._record_failure(url, error)
+                continue
+            if url in url_categories:
+                scheme_data['categories'] = url_categories[url]
+            outcome = compare_fields(scheme_data, fingerprint, self._previous.get(url))
+            if outcome in UNCHANGED_OUTCOMES:
+                stats['unchanged'] += 1
+                self._record_unchanged(url, outcome, fingerprint)
+                continue
+            self.report.record(url, outcome)
+            await write_queue.put((scheme_data, fingerprint))
+            self._track_depth('write_max_depth', write_queue)
+
+    async def _write_stage(self, write_queue: asyncio.Queue):
+        """The only writer: save schemes in batches, off the event loop."""
+        batch = []
+        while True:
+            item = await write_queue.get()
+            if item is not None:
+                batch.append(item)
+            if batch and (item is None or len(batch) >= self.write_batch_size):
+                await self._write_batch(batch)
+                batch = []
+            if item is None:
+                return
+
+    async def _write_batch(self, batch: List[Tuple[Dict, Dict]]):
+        stats = self.stats['write']
+        schemes = [scheme_data for scheme_data, _ in batch]
+        started = time.perf_counter()
+        saved = await asyncio.to_thread(self.db.save_schemes_bulk, schemes, len(schemes))
+        stats['seconds'] += time.perf_counter() - started
+        stats['items'] += saved['schemes']
+        stats['failed'] += saved['failed']
+        stats['batches'] += 1
+        # A batch is one transaction: it was saved whole or not at all
+        urls = [scheme_data['url'] for scheme_data in schemes]
+        if saved['failed']:
+            self.report.record_many(urls, FAILED)
+            if self.crawl_queue:
+                self.crawl_queue.fail(urls, "database write failed")
+        elif self.crawl_queue:
+            self.crawl_queue.complete(urls, {scheme_data['url']: fingerprint for scheme_data, fingerprint in batch})
+
+    def _record_failure(self, url: str, error: str):
+        self.report.record(url, FAILED)
+        if self.crawl_queue:
+            self.crawl_queue.fail([url], error)
+
+    def _record_unchanged(self, url: str, outcome: str, fingerprint: Dict):
+        self.report.record(url, outcome)
+        if self.crawl_queue:
+            self.crawl_queue.complete([url], {url: fingerprint})
+
+    def _track_depth(self, name: str, stage_queue: asyncio.Queue):
+        queues = self.stats['queues']
+        queues[name] = max(queues[name], stage_queue.qsize())
+
+    def log_stats(self):
+        """Log throughput per stage; the slowest stage bounds the pipeline."""
+        wall = self.stats['seconds'] or 1e-9
+        logger.info(f"Pipeline finished in {wall:.1f}s with {self.parse_workers} parse workers")
+        for stage in ('fetch', 'parse', 'write'):
+            stats = self.stats[stage]
+            unchanged = f", {stats['unchanged']} unchanged" if 'unchanged' in stats else ''
+            logger.info(f"  {stage:<5}: {stats['items']} items, {stats['failed']} failed{unchanged}, "
+                        f"{stats['items'] / wall:.1f}/s overall, {stats['seconds']:.1f}s busy")
+        parse = self.stats['parse']
+        if parse['items']:
+            logger.info(f"  parse CPU: {parse['cpu_seconds'] * 1000 / parse['items']:.1f} ms/page")
+        queues = self.stats['queues']
+        logger.info(f"  queue high-water: parse {queues['parse_max_depth']}/{self.queue_size}, "
+                    f"write {queues['write_max_depth']}/{self.queue_size}")
@@ -1,6 +1,9 @@
+import argparse
 import os
+import sys
 import sqlite3
 import logging
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from web_scraping_components.batch_scraper import process_all_categories
 
 # Configure logging
@@ -76,13 +79,24 @@ def reset_database():
     logger.info("Created new database with tables")
 
 def main():
+    parser = argparse.ArgumentParser(description="Rebuild the scheme database from a full scrape")
+    parser.add_argument('--resume', action='store_true',
+                        help="Keep the database and continue the last interrupted scrape")
+    args = parser.parse_args()
+
+    if args.resume:
+        logger.info("Resuming the previous scrape...")
+        process_all_categories()
+        return
+
     # Reset database
     logger.info("Resetting database...")
     reset_database()
     
     # Run scraper
     logger.info("Starting scraper with new numbers...")
-    process_all_categories()
+    # The database is new, so every scheme must be written whether or not it changed
+    process_all_categories(full=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
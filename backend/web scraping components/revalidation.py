@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from typing import AsyncIterator, Dict, Iterable, Mapping, Optional, Tuple
+from web_scraping_components.async_fetcher import AsyncFetcher
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# What happened to a URL in a crawl
+NEW = 'new'                      # first time scraped
+UPDATED = 'updated'              # extracted fields differ from the last crawl
+NOT_MODIFIED = 'not_modified'    # the server answered 304
+SAME_CONTENT = 'same_content'    # page body hashes the same as last time; not parsed
+SAME_FIELDS = 'same_fields'      # page changed but the extracted fields didn't
+FAILED = 'failed'
+REMOVED = 'removed'              # no longer listed in any category file
+FETCHED = 'fetched'              # page changed; parse it to find out more
+
+CHANGED_OUTCOMES = [NEW, UPDATED]
+UNCHANGED_OUTCOMES = [NOT_MODIFIED, SAME_CONTENT, SAME_FIELDS]
+
+# Markup that changes between deploys of the site without the scheme
+# changing: scripts (build ids, nonces), styles and comments
+NOISE_PATTERN = re.compile(r'<(script|style|noscript)\b.*?</\1\s*>|<!--.*?-->', re.DOTALL | re.IGNORECASE)
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+def content_hash(html: str) -> str:
+    """Hash of a page with scripts, styles, comments and whitespace runs removed."""
+    normalized = WHITESPACE_PATTERN.sub(' ', NOISE_PATTERN.sub('', html)).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+def fields_hash(scheme_data: Dict) -> str:
+    """Hash of the extracted scheme fields (including its categories)."""
+    payload = json.dumps(scheme_data, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def conditional_headers(fingerprint: Optional[Mapping]) -> Dict[str, str]:
+    """If-None-Match / If-Modified-Since headers from the last crawl's validators."""
+    headers = {}
+    if fingerprint:
+        if fingerprint.get('etag'):
+            headers['If-None-Match'] = fingerprint['etag']
+        if fingerprint.get('last_modified'):
+            headers['If-Modified-Since'] = fingerprint['last_modified']
+    return headers
+
+async def revalidate(fetcher: AsyncFetcher, url: str,
+                     previous: Optional[Mapping] = None) -> Tuple[str, Optional[str], Dict]:
+    """Fetch a page unless it is known not to have changed.
+
+    ``previous`` is the fingerprint stored for the URL by the last crawl
+    (validators and hashes, see CrawlQueue.fingerprints). Returns
+    ``(outcome, html, fingerprint)``: html is only set for FETCHED, the
+    one outcome that needs parsing, and fingerprint is what to store
+    for the URL once it is handled.
+    """
+    previous = previous or {}
+    response = await fetcher.fetch(url, headers=conditional_headers(previous) or None)
+    if response is None:
+        return FAILED, None, dict(previous)
+    if response.status_code == 304:
+        return NOT_MODIFIED, None, dict(previous)
+
+    html = response.text
+    fingerprint = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_hash': content_hash(html),
+        'fields_hash': previous.get('fields_hash'),
+    }
+    if previous.get('content_hash') == fingerprint['content_hash'] and previous.get('fields_hash'):
+        return SAME_CONTENT, None, fingerprint
+    return FETCHED, html, fingerprint
+
+async def revalidate_many(fetcher: AsyncFetcher, urls: Iterable[str],
+                          fingerprints: Mapping[str, Mapping]) -> AsyncIterator[Tuple[str, str, Optional[str], Dict]]:
+    """Revalidate URLs concurrently, yielding (url, outcome, html, fingerprint) as each finishes."""
+    async def revalidate_one(url: str):
+        return (url, *await revalidate(fetcher, url, fingerprints.get(url)))
+
+    tasks = [asyncio.ensure_future(revalidate_one(url)) for url in urls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Stop outstanding requests if the consumer bails out early
+        for task in tasks:
+            task.cancel()
+
+def compare_fields(scheme_data: Dict, fingerprint: Dict, previous: Optional[Mapping] = None) -> str:
+    """Classify a parsed scheme as NEW, UPDATED or SAME_FIELDS, recording its fields hash."""
+    fingerprint['fields_hash'] = fields_hash(scheme_data)
+    previous_hash = (previous or {}).get('fields_hash')
+    if previous_hash is None:
+        return NEW
+    return SAME_FIELDS if previous_hash == fingerprint['fields_hash'] else UPDATED
+
+class CrawlReport:
+    """Outcome of every URL in a crawl: changed, unchanged, removed or failed.
+
+    A URL retried within the same crawl keeps its last outcome.
+    """
+
+    def __init__(self):
+        self.outcomes: Dict[str, str] = {}
+
+    def record(self, url: str, outcome: str):
+        self.outcomes[url] = outcome
+
+    def record_many(self, urls: Iterable[str], outcome: str):
+        for url in urls:
+            self.outcomes[url] = outcome
+
+    def summary(self) -> Dict[str, int]:
+        counts = dict.fromkeys(CHANGED_OUTCOMES + UNCHANGED_OUTCOMES + [REMOVED, FAILED], 0)
+        for outcome in self.outcomes.values():
+            counts[outcome] += 1
+        counts['changed'] = sum(counts[outcome] for outcome in CHANGED_OUTCOMES)
+        counts['unchanged'] = sum(counts[outcome] for outcome in UNCHANGED_OUTCOMES)
+        return counts
+
+    def to_dict(self) -> Dict:
+        """Summary counts plus the URLs behind each outcome."""
+        urls = {}
+        for url, outcome in sorted(self.outcomes.items()):
+            urls.setdefault(outcome, []).append(url)
+        return {'summary': self.summary(), 'urls': urls}
+
+    def export(self, path: str):
+        """Write the report as JSON."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        logger.info(f"Wrote crawl report to {path}")
+
+    def log(self):
+        counts = self.summary()
+        logger.info(f"Crawl report: {counts['changed']} changed ({counts[NEW]} new, {counts[UPDATED]} updated), "
+                    f"{counts['unchanged']} unchanged ({counts[NOT_MODIFIED]} not modified, "
+                    f"{counts[SAME_CONTENT]} same content, {counts[SAME_FIELDS]} same fields), "
+                    f"{counts[REMOVED]} removed, {counts[FAILED]} failed")
@@ -1,12 +1,17 @@
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, Tag
 import json
-import time
+import os
+import sys
 from tqdm import tqdm
 import logging
-from typing import Dict, List, Optional, Tuple
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 import re
+from itertools import islice
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from data_management.database import Database
+from web_scraping_components.async_fetcher import AsyncFetcher, HostRateLimiter, base_url_override, rewrite_url
+from web_scraping_components.html_parsing import index_sections, make_soup
 import asyncio
 from playwright.async_api import async_playwright
 
@@ -26,14 +31,27 @@ class SchemeScraper:
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.db = Database()
+        # Shared per-host rate limit instead of fixed sleeps between pages
+        self.rate_limiter = HostRateLimiter()
+        # Origin override for get_page, e.g. a local replay server
+        self.base_url = base_url_override()
+        self._db = None
+    
+    @property
+    def db(self) -> Database:
+        """Database, opened on first use (scrapes that only parse never open it)."""
+        if self._db is None:
+            self._db = Database()
+        return self._db
     
     def get_page(self, url: str) -> Optional[BeautifulSoup]:
         """Fetch and parse a webpage."""
         try:
+            url = rewrite_url(url, self.base_url)
+            self.rate_limiter.bucket(url).wait()
             response = self.session.get(url, headers=self.headers)
             response.raise_for_status()
-            return BeautifulSoup(response.text, 'html.parser')
+            return make_soup(response.text)
         except Exception as e:
             logger.error(f"Error fetching {url}: {str(e)}")
             return None
@@ -114,45 +132,63 @@ class SchemeScraper:
         
         return lines
 
-    def extract_section_content(self, soup: BeautifulSoup, section_title: str) -> List[str]:
-        """Extract content from a section between two h3 headings."""
-        content = []
+    def section_tags(self, soup: BeautifulSoup, section_title: str,
+                     sections: Optional[Dict[str, List[Tag]]] = None) -> List[Tag]:
+        """Get the tags between an h3 heading and the next one.
+
+        Pass ``sections`` from ``index_sections(soup)`` when reading
+        several sections of one page, so the page is walked only once.
+        """
+        if sections is not None:
+            return sections.get(section_title, [])
+        tags = []
         section = soup.find('h3', string=section_title)
         if section:
             current = section.find_next()
             while current and current.name != 'h3':
-                if current.name == 'div' and 'markdown-options' in current.get('class', []):
-                    text = current.text.strip()
-                    # Improved: Always split by lines, and format tables if detected
-                    if '|' in text or '\t' in text or text.count('\n') > 3:
-                        content.extend(self.format_table_data(text))
-                    else:
-                        # Split content into lines and clean each line
-                        lines = [line.strip() for line in text.split('\n') if line.strip()]
-                        content.extend(lines)
+                tags.append(current)
                 current = current.find_next()
+        return tags
+
+    def extract_section_content(self, soup: BeautifulSoup, section_title: str,
+                                sections: Optional[Dict[str, List[Tag]]] = None) -> List[str]:
+        """Extract content from a section between two h3 headings."""
+        content = []
+        for current in self.section_tags(soup, section_title, sections):
+            if current.name == 'div' and 'markdown-options' in current.get('class', []):
+                text = current.text.strip()
+                # Improved: Always split by lines, and format tables if detected
+                if '|' in text or '\t' in text or text.count('\n') > 3:
+                    content.extend(self.format_table_data(text))
+                else:
+                    # Split content into lines and clean each line
+                    lines = [line.strip() for line in text.split('\n') if line.strip()]
+                    content.extend(lines)
         return content
 
-    def extract_faqs(self, soup: BeautifulSoup) -> List[Dict[str, str]]:
+    def extract_faqs(self, soup: BeautifulSoup, sections: Optional[Dict[str, List[Tag]]] = None) -> List[Dict[str, str]]:
         """Extract FAQs from the page."""
         faqs = []
         try:
-            faq_section = soup.find('h3', string='Frequently Asked Questions')
-            if faq_section:
-                current = faq_section.find_next()
-                while current and current.name != 'h3':
-                    if current.name == 'div' and 'cursor-pointer' in current.get('class', []):
-                        question = current.text.strip()
-                        answer_div = current.find_next('div', class_='rounded-b')
-                        if answer_div:
-                            answer = answer_div.find('div', class_='markdown-options')
-                            answer_text = answer.text.strip() if answer else ""
-                            if question and answer_text:
-                                faqs.append({
-                                    'question': question,
-                                    'answer': answer_text
-                                })
-                    current = current.find_next()
+            tags = self.section_tags(soup, 'Frequently Asked Questions', sections)
+            for position, current in enumerate(tags):
+                if current.name == 'div' and 'cursor-pointer' in current.get('class', []):
+                    question = current.text.strip()
+                    # The answer normally follows within the section; look
+                    # past it only if it doesn't
+                    answer_div = next(
+                        (tag for tag in islice(tags, position + 1, None)
+                         if tag.name == 'div' and 'rounded-b' in tag.get('class', [])),
+                        None
+                    ) or current.find_next('div', class_='rounded-b')
+                    if answer_div:
+                        answer = answer_div.find('div', class_='markdown-options')
+                        answer_text = answer.text.strip() if answer else ""
+                        if question and answer_text:
+                            faqs.append({
+                                'question': question,
+                                'answer': answer_text
+                            })
         except Exception as e:
             logger.error(f"Error extracting FAQs: {str(e)}")
         return faqs
@@ -197,12 +233,35 @@ class SchemeScraper:
             logger.error(f"Error extracting state from name '{name}': {str(e)}")
             return "All India"
 
-    def extract_scheme_details(self, scheme_url: str) -> Dict:
-        """Extract details from an individual scheme page."""
+    def extract_scheme_details(self, scheme_url: str, save: bool = True) -> Dict:
+        """Extract details from an individual scheme page.
+
+        With save=False the scheme is only returned, so callers can write
+        many at once with Database.save_schemes_bulk.
+        """
         soup = self.get_page(scheme_url)
         if not soup:
             return {}
 
+        scheme_data = self.parse_scheme_details(soup, scheme_url)
+        if scheme_data and save:
+            self.db.save_scheme(scheme_data)
+        return scheme_data
+
+    async def extract_schemes_async(self, urls: Iterable[str], fetcher: AsyncFetcher) -> AsyncIterator[Tuple[str, Dict]]:
+        """Fetch scheme pages concurrently and parse each one as it arrives.
+
+        Yields (url, scheme_data) in completion order; scheme_data is
+        empty if the page could not be fetched or parsed. Nothing is saved.
+        """
+        async for url, html in fetcher.fetch_many(urls):
+            if html is None:
+                yield url, {}
+                continue
+            yield url, self.parse_scheme_details(make_soup(html), url)
+
+    def parse_scheme_details(self, soup: BeautifulSoup, scheme_url: str) -> Dict:
+        """Extract the scheme fields from a parsed scheme page."""
         try:
             # Basic scheme information
             name = None
@@ -281,14 +340,15 @@ class SchemeScraper:
                         #categories = categories[:3]
                         break
             
-            # Extract content from each section
-            eligibility_criteria = self.extract_section_content(soup, 'Eligibility')
-            benefits = self.extract_section_content(soup, 'Benefits')
-            application_process = self.extract_section_content(soup, 'Application Process')
-            required_documents = self.extract_section_content(soup, 'Documents Required')
+            # Extract content from each section (one walk over the page)
+            sections = index_sections(soup)
+            eligibility_criteria = self.extract_section_content(soup, 'Eligibility', sections)
+            benefits = self.extract_section_content(soup, 'Benefits', sections)
+            application_process = self.extract_section_content(soup, 'Application Process', sections)
+            required_documents = self.extract_section_content(soup, 'Documents Required', sections)
             
             # FAQs
-            faqs = self.extract_faqs(soup)
+            faqs = self.extract_faqs(soup, sections)
             
             # Extract state from <h3> tag or fallback
             state = self.extract_state(soup, name)
@@ -307,9 +367,6 @@ class SchemeScraper:
                 'state': state
             }
             
-            # Save to database
-            self.db.save_scheme(scheme_data)
-            
             return scheme_data
             
         except Exception as e:
@@ -340,9 +397,6 @@ class SchemeScraper:
                 
                 if scheme_details:
                     schemes.append(scheme_details)
-                
-                # Be nice to the server
-                time.sleep(1)
             
             page += 1
             
@@ -412,7 +466,6 @@ class SchemeScraper:
                             break
             
             page += 1
-            time.sleep(1)  # Be nice to the server
         
         logger.info(f"Found {len(urls)} URLs for category {category_url}")
         return urls
@@ -440,13 +493,14 @@ def main():
     scheme_urls = asyncio.run(get_all_scheme_urls())
     logger.info(f"Found {len(scheme_urls)} scheme URLs.")
 
-    count = 0
-    for url in scheme_urls:
-        scheme_data = scraper.extract_scheme_details(url)
-        if scheme_data:
-            count += 1
+    async def scrape_all() -> List[Dict]:
+        async with AsyncFetcher() as fetcher:
+            return [scheme_data async for _, scheme_data in scraper.extract_schemes_async(scheme_urls, fetcher) if scheme_data]
+
+    schemes = asyncio.run(scrape_all())
+    saved = scraper.db.save_schemes_bulk(schemes)
 
-    logger.info(f"Scraped {count} schemes successfully!")
+    logger.info(f"Scraped {saved['schemes']} schemes successfully!")
     logger.info("Scraping completed!")
 
 if __name__ == "__main__":
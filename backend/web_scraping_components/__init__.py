@@ -0,0 +1,9 @@
+#importable name for the "web scraping components" folder (a folder name
+#with spaces can't be imported): `from web_scraping_components.html_parsing
+#import make_soup` loads "web scraping components/html_parsing.py".
+#Only submodules are imported, so a script that needs the HTML parser
+#doesn't pull in playwright, httpx or the database through the folder's
+#__init__.py.
+import os
+
+__path__ = [os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "web scraping components")]